@@ -7,11 +7,13 @@ import authRoutes from './routes/authRoutes.js';
 import kpiRoutes from './routes/kpiRoutes.js';
 import mapRoutes from './routes/mapRoutes.js';
 import ingestionRoutes from './routes/ingestionRoutes.js';
+import { serverTiming } from './middleware/serverTiming.js';
 
 dotenv.config();
 
 const app = express();
 
+app.use(serverTiming);
 app.use(cors());
 app.use(express.json());
 
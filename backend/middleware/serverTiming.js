@@ -0,0 +1,18 @@
+// Reports how long the backend spent on each request in a `Server-Timing` header
+// (`app;dur=<ms>`), so clients can tell server time apart from network and decoding time.
+export const serverTiming = (req, res, next) => {
+  const started = process.hrtime.bigint();
+  const writeHead = res.writeHead;
+
+  res.writeHead = function writeHeadWithTiming (...args) {
+    if (!res.headersSent) {
+      const elapsedMs = Number(process.hrtime.bigint() - started) / 1e6;
+      res.setHeader('Server-Timing', `app;dur=${elapsedMs.toFixed(1)}`);
+    }
+    return writeHead.apply(this, args);
+  };
+
+  next();
+};
+
+export default serverTiming;
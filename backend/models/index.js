@@ -7,7 +7,17 @@ export const Route = sequelize.define('Route', {
   origin_county: DataTypes.STRING,
   destination_county: DataTypes.STRING,
   mode: DataTypes.STRING
-}, { tableName: 'routes', underscored: true });
+}, {
+  tableName: 'routes',
+  underscored: true,
+  indexes: [
+    {
+      // Lets `route_code LIKE 'prefix%'` use an index regardless of the database collation.
+      name: 'routes_route_code_prefix',
+      fields: [{ name: 'route_code', operator: 'varchar_pattern_ops' }]
+    }
+  ]
+});
 
 export const OrbcommData = sequelize.define('OrbcommData', {
   id: { type: DataTypes.INTEGER, autoIncrement: true, primaryKey: true },
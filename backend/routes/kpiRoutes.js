@@ -1,6 +1,18 @@
 import { Router } from 'express';
 import { authenticate, authorize } from '../middleware/auth.js';
-import { calculateKPIs, fetchKpiTrend, listAvailableRoutes } from '../services/kpiService.js';
+import { encodeTrend, sendArrow, wantsArrow } from '../services/arrowService.js';
+import {
+  LEADERBOARD_METRICS,
+  MAX_KPI_BATCH_SIZE,
+  TREND_RESOLUTIONS,
+  calculateKPIs,
+  calculateKPIsBatch,
+  fetchKpiTrend,
+  listAvailableRoutes,
+  listRouteWeeks,
+  rankRoutesForWeek,
+  searchRoutes
+} from '../services/kpiService.js';
 
 const router = Router();
 
@@ -13,6 +25,63 @@ router.get('/', authenticate, authorize(['admin', 'analyst', 'business']), async
   }
 });
 
+router.get('/routes', authenticate, authorize(['admin', 'analyst', 'business']), async (req, res) => {
+  try {
+    const { prefix = '', cursor = null, limit } = req.query;
+    const page = await searchRoutes({ prefix, cursor, limit });
+    return res.json(page);
+  } catch (error) {
+    return res.status(500).json({ message: error.message });
+  }
+});
+
+router.get('/routes/:routeCode/weeks', authenticate, authorize(['admin', 'analyst', 'business']), async (req, res) => {
+  try {
+    const data = await listRouteWeeks({ routeCode: req.params.routeCode });
+    if (!data) {
+      return res.status(404).json({ message: 'Route not found' });
+    }
+    return res.json(data);
+  } catch (error) {
+    return res.status(500).json({ message: error.message });
+  }
+});
+
+router.get('/leaderboard', authenticate, authorize(['admin', 'analyst', 'business']), async (req, res) => {
+  try {
+    const { week, metric = 'sdei', order = 'desc', limit } = req.query;
+    if (week === undefined || week === '') {
+      return res.status(400).json({ message: 'Query must contain a "week"' });
+    }
+    if (!LEADERBOARD_METRICS.includes(metric)) {
+      return res.status(400).json({ message: `"metric" must be one of: ${LEADERBOARD_METRICS.join(', ')}` });
+    }
+    if (!['asc', 'desc'].includes(order)) {
+      return res.status(400).json({ message: '"order" must be asc or desc' });
+    }
+    const leaderboard = await rankRoutesForWeek({ week, metric, order, limit });
+    return res.json(leaderboard);
+  } catch (error) {
+    return res.status(500).json({ message: error.message });
+  }
+});
+
+router.post('/batch', authenticate, authorize(['admin', 'analyst', 'business']), async (req, res) => {
+  try {
+    const { pairs } = req.body || {};
+    if (!Array.isArray(pairs) || pairs.some(pair => !pair || !pair.routeCode || pair.week === undefined || pair.week === null)) {
+      return res.status(400).json({ message: 'Body must contain a "pairs" array of { routeCode, week } objects' });
+    }
+    if (pairs.length > MAX_KPI_BATCH_SIZE) {
+      return res.status(400).json({ message: `At most ${MAX_KPI_BATCH_SIZE} pairs can be requested at once` });
+    }
+    const results = await calculateKPIsBatch({ pairs });
+    return res.json({ results });
+  } catch (error) {
+    return res.status(500).json({ message: error.message });
+  }
+});
+
 router.get('/:routeCode/:week', authenticate, authorize(['admin', 'analyst', 'business']), async (req, res) => {
   try {
     const { routeCode, week } = req.params;
@@ -29,9 +98,18 @@ router.get('/:routeCode/:week', authenticate, authorize(['admin', 'analyst', 'bu
 router.post('/:routeCode/trend', authenticate, authorize(['admin', 'analyst', 'business']), async (req, res) => {
   try {
     const { routeCode } = req.params;
-    const { weeks } = req.body;
-    const data = await fetchKpiTrend({ routeCode, weeks });
-    return res.json(data);
+    const { weeks } = req.body || {};
+    const resolution = `${(req.body && req.body.resolution) || req.query.resolution || 'week'}`.toLowerCase();
+    if (!TREND_RESOLUTIONS.includes(resolution)) {
+      return res.status(400).json({ message: `"resolution" must be one of: ${TREND_RESOLUTIONS.join(', ')}` });
+    }
+    const { resolution: applied, points } = await fetchKpiTrend({ routeCode, weeks, resolution });
+    res.set('X-Trend-Resolution', applied);
+    res.vary('Accept');
+    if (wantsArrow(req)) {
+      return sendArrow(res, encodeTrend(points, { resolution: applied }));
+    }
+    return res.json(points);
   } catch (error) {
     return res.status(500).json({ message: error.message });
   }
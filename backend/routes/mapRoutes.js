@@ -1,6 +1,8 @@
 import { Router } from 'express';
 import { authenticate, authorize } from '../middleware/auth.js';
 import { Route, OrbcommData } from '../models/index.js';
+import { encodeTelemetry, sendArrow, wantsArrow } from '../services/arrowService.js';
+import { parseSimplificationOptions, simplifyTelemetry } from '../services/mapService.js';
 
 const router = Router();
 
@@ -24,15 +26,24 @@ router.get('/:routeCode', authenticate, authorize(['admin', 'analyst', 'business
       event_timestamp: point.event_timestamp
     }));
 
-    res.json({
-      route: {
-        code: route.route_code,
-        origin: route.origin_county,
-        destination: route.destination_county,
-        mode: route.mode
-      },
-      telemetry
-    });
+    const routeSummary = {
+      code: route.route_code,
+      origin: route.origin_county,
+      destination: route.destination_county,
+      mode: route.mode
+    };
+
+    const simplificationOptions = parseSimplificationOptions(req.query);
+    const payload = simplificationOptions
+      ? { route: routeSummary, ...simplifyTelemetry(telemetry, simplificationOptions) }
+      : { route: routeSummary, telemetry };
+
+    res.vary('Accept');
+    if (wantsArrow(req)) {
+      const { telemetry: points, ...metadata } = payload;
+      return sendArrow(res, encodeTelemetry(points, metadata));
+    }
+    return res.json(payload);
   } catch (error) {
     res.status(500).json({ message: error.message });
   }
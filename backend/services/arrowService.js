@@ -0,0 +1,47 @@
+// Arrow IPC encoding for the trend and map endpoints.
+//
+// Clients that prefer `application/vnd.apache.arrow.stream` in their `Accept` header get
+// the rows as a single Arrow IPC stream instead of a JSON array, which they can map into
+// columnar frames without parsing. Fields that are not rows (route summary, simplification
+// stats, trend resolution) travel as JSON strings in the schema metadata. Every other
+// client, including one that sends `*/*` or no `Accept` header, still gets JSON.
+import { Float64, Int32, Table, TimestampMillisecond, Utf8, tableToIPC, vectorFromArray } from 'apache-arrow';
+
+export const ARROW_STREAM_TYPE = 'application/vnd.apache.arrow.stream';
+
+// Lists JSON first so it wins ties, e.g. for `*/*`.
+export const wantsArrow = req => req.accepts(['application/json', ARROW_STREAM_TYPE]) === ARROW_STREAM_TYPE;
+
+const column = (rows, name, type, convert = value => value) => vectorFromArray(
+  rows.map(row => (row[name] === null || row[name] === undefined ? null : convert(row[name]))),
+  type
+);
+
+const toEpochMillis = value => (value instanceof Date ? value.getTime() : new Date(value).getTime());
+
+const encodeTable = (columns, metadata = {}) => {
+  const table = new Table(columns);
+  Object.entries(metadata).forEach(([key, value]) => {
+    if (value !== undefined) {
+      table.schema.metadata.set(key, JSON.stringify(value));
+    }
+  });
+  return Buffer.from(tableToIPC(table, 'stream'));
+};
+
+export const encodeTrend = (points, metadata) => encodeTable({
+  week: column(points, 'week', new Utf8(), value => `${value}`),
+  weeks: column(points, 'weeks', new Int32()),
+  sdei: column(points, 'sdei', new Float64()),
+  sdcui: column(points, 'sdcui', new Float64()),
+  sii: column(points, 'sii', new Float64())
+}, metadata);
+
+export const encodeTelemetry = (telemetry, metadata) => encodeTable({
+  id: column(telemetry, 'id', new Int32()),
+  latitude: column(telemetry, 'latitude', new Float64()),
+  longitude: column(telemetry, 'longitude', new Float64()),
+  event_timestamp: column(telemetry, 'event_timestamp', new TimestampMillisecond('UTC'), toEpochMillis)
+}, metadata);
+
+export const sendArrow = (res, buffer) => res.type(ARROW_STREAM_TYPE).send(buffer);
@@ -21,20 +21,7 @@ const normalizeWeekFilter = weekInput => {
   return { [Op.in]: values };
 };
 
-export const calculateKPIs = async ({ routeCode, week }) => {
-  const weekFilter = normalizeWeekFilter(week);
-  const orbcommRecord = await OrbcommData.findOne({
-    where: { route_code: routeCode, week: weekFilter }
-  });
-
-  if (!orbcommRecord) {
-    return null;
-  }
-
-  const transearchRecord = await TransearchData.findOne({
-    where: { route_code: routeCode, week: weekFilter }
-  });
-
+const buildKpiPayload = ({ routeCode, week, orbcommRecord, transearchRecord }) => {
   const sdei = safeDivide(orbcommRecord.available, orbcommRecord.loaded);
   const sdcui = safeDivide(orbcommRecord.used, orbcommRecord.total);
   const stopRatio = safeDivide(orbcommRecord.trips_over_five, orbcommRecord.total_trips);
@@ -61,7 +48,263 @@ export const calculateKPIs = async ({ routeCode, week }) => {
   };
 };
 
-export const fetchKpiTrend = async ({ routeCode, weeks }) => {
+export const calculateKPIs = async ({ routeCode, week }) => {
+  const weekFilter = normalizeWeekFilter(week);
+  const orbcommRecord = await OrbcommData.findOne({
+    where: { route_code: routeCode, week: weekFilter }
+  });
+
+  if (!orbcommRecord) {
+    return null;
+  }
+
+  const transearchRecord = await TransearchData.findOne({
+    where: { route_code: routeCode, week: weekFilter }
+  });
+
+  return buildKpiPayload({ routeCode, week, orbcommRecord, transearchRecord });
+};
+
+export const MAX_KPI_BATCH_SIZE = 1000;
+
+const weekKey = week => {
+  const numeric = Number(week);
+  return Number.isNaN(numeric) ? `${week}` : `${numeric}`;
+};
+
+const pairKey = (routeCode, week) => `${routeCode}\u0000${weekKey(week)}`;
+
+const indexByPair = records => records.reduce((acc, record) => {
+  acc.set(pairKey(record.route_code, record.week), record);
+  return acc;
+}, new Map());
+
+// Matches exactly the requested (route, week) pairs: one `route_code = ? AND week IN (...)`
+// branch per route, so a batch spread over many routes and weeks reads only its own rows
+// rather than every route x week combination.
+const pairWhere = pairs => {
+  const weeksByRoute = new Map();
+  pairs.forEach(({ routeCode, week }) => {
+    if (!weeksByRoute.has(routeCode)) {
+      weeksByRoute.set(routeCode, new Set());
+    }
+    weeksByRoute.get(routeCode).add(`${week}`).add(weekKey(week));
+  });
+  return {
+    [Op.or]: Array.from(weeksByRoute, ([routeCode, weeks]) => ({
+      route_code: routeCode,
+      week: { [Op.in]: Array.from(weeks) }
+    }))
+  };
+};
+
+export const calculateKPIsBatch = async ({ pairs }) => {
+  if (!Array.isArray(pairs) || pairs.length === 0) {
+    return [];
+  }
+
+  const where = pairWhere(pairs);
+  const [orbcommRecords, transearchRecords] = await Promise.all([
+    OrbcommData.findAll({ where }),
+    TransearchData.findAll({ where })
+  ]);
+
+  const orbcommByPair = indexByPair(orbcommRecords);
+  const transearchByPair = indexByPair(transearchRecords);
+
+  return pairs.map(({ routeCode, week }) => {
+    const orbcommRecord = orbcommByPair.get(pairKey(routeCode, week));
+    if (!orbcommRecord) {
+      return null;
+    }
+    const transearchRecord = transearchByPair.get(pairKey(routeCode, week));
+    return buildKpiPayload({ routeCode, week, orbcommRecord, transearchRecord });
+  });
+};
+
+export const LEADERBOARD_METRICS = ['sdei', 'sdcui', 'sii', 'rpi'];
+export const DEFAULT_LEADERBOARD_LIMIT = 100;
+export const MAX_LEADERBOARD_LIMIT = 1000;
+
+const compareMetric = (metric, direction) => (a, b) => {
+  const left = a[metric];
+  const right = b[metric];
+  if (left === null && right === null) return a.routeCode.localeCompare(b.routeCode);
+  if (left === null) return 1;
+  if (right === null) return -1;
+  return (left - right) * direction || a.routeCode.localeCompare(b.routeCode);
+};
+
+// Ranks every route that reports `week`, not just one page of the route catalogue. The
+// week's rows (one per route) come from two set-based queries, KPIs are computed as in
+// `calculateKPIs`, and routes without the metric are ranked last. Returns the top `limit`
+// rows together with `total`, the number of routes ranked.
+export const rankRoutesForWeek = async ({ week, metric = 'sdei', order = 'desc', limit = DEFAULT_LEADERBOARD_LIMIT }) => {
+  const pageSize = Math.min(Math.max(Number.parseInt(limit, 10) || DEFAULT_LEADERBOARD_LIMIT, 1), MAX_LEADERBOARD_LIMIT);
+  const where = { week: { [Op.in]: Array.from(new Set([`${week}`, weekKey(week)])) } };
+  const [orbcommRecords, transearchRecords] = await Promise.all([
+    OrbcommData.findAll({
+      where,
+      include: [{ model: Route, attributes: ['origin_county', 'destination_county'] }],
+      raw: true,
+      nest: true
+    }),
+    TransearchData.findAll({ attributes: ['route_code', 'week', 'performance_variation'], where, raw: true })
+  ]);
+
+  const transearchByPair = indexByPair(transearchRecords);
+  const seen = new Set();
+  const rows = [];
+  orbcommRecords.forEach(orbcommRecord => {
+    const routeCode = orbcommRecord.route_code;
+    if (seen.has(routeCode)) return;
+    seen.add(routeCode);
+    const transearchRecord = transearchByPair.get(pairKey(routeCode, week));
+    const { sdei, sdcui, sii, rpi } = buildKpiPayload({ routeCode, week, orbcommRecord, transearchRecord });
+    const route = orbcommRecord.Route || {};
+    rows.push({
+      routeCode,
+      origin: route.origin_county ?? null,
+      destination: route.destination_county ?? null,
+      sdei,
+      sdcui,
+      sii,
+      rpi
+    });
+  });
+
+  rows.sort(compareMetric(metric, order === 'asc' ? 1 : -1));
+  return {
+    week: `${week}`,
+    metric,
+    order,
+    total: rows.length,
+    results: rows.slice(0, pageSize).map((row, index) => ({ rank: index + 1, ...row }))
+  };
+};
+
+export const TREND_RESOLUTIONS = ['week', 'month', 'quarter', 'auto'];
+export const TREND_MAX_POINTS = 60;
+
+const TREND_ATTRIBUTES = [
+  'week',
+  'available',
+  'loaded',
+  'used',
+  'total',
+  'avg_stop_duration',
+  'trips_over_five',
+  'total_trips'
+];
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+// Weeks are stored as ISO "YYYYWW" strings. A week belongs to the month (and quarter)
+// that contains its Thursday, the same rule ISO 8601 uses to assign weeks to years.
+const weekThursday = week => {
+  const match = /^(\d{4})(\d{2})$/.exec(`${week}`.trim());
+  if (!match) return null;
+  const year = Number(match[1]);
+  const weekNumber = Number(match[2]);
+  if (weekNumber < 1 || weekNumber > 53) return null;
+  const januaryFourth = Date.UTC(year, 0, 4);
+  const weekOneMonday = januaryFourth - ((new Date(januaryFourth).getUTCDay() + 6) % 7) * DAY_MS;
+  return new Date(weekOneMonday + ((weekNumber - 1) * 7 + 3) * DAY_MS);
+};
+
+const trendPeriod = (week, resolution) => {
+  const label = `${week}`;
+  if (resolution === 'week') return label;
+  const thursday = weekThursday(week);
+  if (!thursday) return label;
+  const year = thursday.getUTCFullYear();
+  const month = thursday.getUTCMonth();
+  if (resolution === 'month') return `${year}-${String(month + 1).padStart(2, '0')}`;
+  return `${year}-Q${Math.floor(month / 3) + 1}`;
+};
+
+const resolveTrendResolution = (weeks, resolution) => {
+  if (resolution !== 'auto') return resolution;
+  return TREND_RESOLUTIONS
+    .filter(candidate => candidate !== 'auto')
+    .find(candidate => new Set(weeks.map(week => trendPeriod(week, candidate))).size <= TREND_MAX_POINTS) ||
+    'quarter';
+};
+
+const toNumber = value => (value === null || value === undefined ? null : Number(value));
+
+const toInput = value => {
+  const numeric = toNumber(value);
+  return numeric === null || Number.isNaN(numeric) ? null : numeric;
+};
+
+// Numerator / denominator pairs that are pooled together.
+const PAIRED_INPUTS = [['available', 'loaded'], ['used', 'total'], ['trips_over_five', 'total_trips']];
+
+// Pools the raw inputs of every week in a period so each KPI is a ratio of sums rather
+// than an average of weekly ratios. A ratio only pools the weeks that report both of its
+// inputs, and stop durations are weighted by the trips they cover.
+const poolTrendRecords = records => records.reduce((acc, record) => {
+  PAIRED_INPUTS.forEach(([numeratorName, denominatorName]) => {
+    const numerator = toInput(record[numeratorName]);
+    const denominator = toInput(record[denominatorName]);
+    if (numerator === null || denominator === null) return;
+    acc[numeratorName] = (acc[numeratorName] ?? 0) + numerator;
+    acc[denominatorName] = (acc[denominatorName] ?? 0) + denominator;
+  });
+  const duration = toInput(record.avg_stop_duration);
+  const trips = toInput(record.total_trips);
+  if (duration !== null && trips) {
+    acc.stop_duration_weight += duration * trips;
+    acc.stop_duration_trips += trips;
+  }
+  return acc;
+}, {
+  available: null,
+  loaded: null,
+  used: null,
+  total: null,
+  trips_over_five: null,
+  total_trips: null,
+  stop_duration_weight: 0,
+  stop_duration_trips: 0
+});
+
+// A single stored week keeps the per-row formulas the trend has always used.
+const singleWeekPoint = (label, record) => ({
+  week: label,
+  weeks: 1,
+  sdei: safeDivide(record.available, record.loaded),
+  sdcui: safeDivide(record.used, record.total),
+  sii: record.avg_stop_duration && record.total_trips
+    ? Number((record.avg_stop_duration * safeDivide(record.trips_over_five, record.total_trips)).toFixed(4))
+    : null
+});
+
+const trendPoint = (label, records) => {
+  if (records.length === 1) {
+    return singleWeekPoint(label, records[0]);
+  }
+  const pooled = poolTrendRecords(records);
+  const avgStopDuration = pooled.stop_duration_trips
+    ? pooled.stop_duration_weight / pooled.stop_duration_trips
+    : null;
+  const stopRatio = safeDivide(pooled.trips_over_five, pooled.total_trips);
+  return {
+    week: label,
+    weeks: records.length,
+    sdei: safeDivide(pooled.available, pooled.loaded),
+    sdcui: safeDivide(pooled.used, pooled.total),
+    sii: avgStopDuration && stopRatio !== null
+      ? Number((avgStopDuration * stopRatio).toFixed(4))
+      : null
+  };
+};
+
+// Returns `{ resolution, points }`. With `resolution` 'week' every stored week is its own
+// point; 'month' and 'quarter' pool the weeks of each calendar period and 'auto' picks the
+// finest of those that yields at most TREND_MAX_POINTS points.
+export const fetchKpiTrend = async ({ routeCode, weeks, resolution = 'week' }) => {
   const whereClause = { route_code: routeCode };
   if (Array.isArray(weeks) && weeks.length > 0) {
     const normalizedWeeks = weeks.reduce((acc, value) => {
@@ -76,28 +319,97 @@ export const fetchKpiTrend = async ({ routeCode, weeks }) => {
   }
 
   const records = await OrbcommData.findAll({
+    attributes: TREND_ATTRIBUTES,
     where: whereClause,
-    order: [['week', 'ASC']]
+    order: [['week', 'ASC']],
+    raw: true
   });
 
-  return records.map(record => ({
-    week: record.week,
-    sdei: safeDivide(record.available, record.loaded),
-    sdcui: safeDivide(record.used, record.total),
-    sii: record.avg_stop_duration && record.total_trips
-      ? Number((record.avg_stop_duration * safeDivide(record.trips_over_five, record.total_trips)).toFixed(4))
-      : null
-  }));
+  const effective = resolveTrendResolution(records.map(record => record.week), resolution);
+  const periods = records.reduce((acc, record) => {
+    const label = trendPeriod(record.week, effective);
+    if (!acc.has(label)) {
+      acc.set(label, []);
+    }
+    acc.get(label).push(record);
+    return acc;
+  }, new Map());
+
+  const points = Array.from(periods, ([label, periodRecords]) => trendPoint(label, periodRecords))
+    .sort((a, b) => `${a.week}`.localeCompare(`${b.week}`));
+  return { resolution: effective, points };
+};
+
+export const DEFAULT_ROUTE_PAGE_SIZE = 50;
+export const MAX_ROUTE_PAGE_SIZE = 500;
+
+const escapeLike = value => value.replace(/[\\%_]/g, match => `\\${match}`);
+
+const toRouteSummary = route => ({
+  code: route.route_code,
+  origin: route.origin_county,
+  destination: route.destination_county,
+  mode: route.mode
+});
+
+// Keyset-paginated route listing. Routes are ordered by code and `cursor` is the last
+// code of the previous page, so each page is an index range scan however deep it is.
+// Week lists are not included; fetch them per route with `listRouteWeeks`.
+export const searchRoutes = async ({ prefix = '', cursor = null, limit = DEFAULT_ROUTE_PAGE_SIZE } = {}) => {
+  const pageSize = Math.min(Math.max(Number.parseInt(limit, 10) || DEFAULT_ROUTE_PAGE_SIZE, 1), MAX_ROUTE_PAGE_SIZE);
+  const routeCode = {};
+  if (prefix) {
+    routeCode[Op.like] = `${escapeLike(`${prefix}`)}%`;
+  }
+  if (cursor) {
+    routeCode[Op.gt] = `${cursor}`;
+  }
+
+  const rows = await Route.findAll({
+    attributes: ['route_code', 'origin_county', 'destination_county', 'mode'],
+    where: Object.getOwnPropertySymbols(routeCode).length ? { route_code: routeCode } : {},
+    order: [['route_code', 'ASC']],
+    limit: pageSize + 1,
+    raw: true
+  });
+
+  const page = rows.slice(0, pageSize);
+  return {
+    routes: page.map(toRouteSummary),
+    nextCursor: rows.length > pageSize ? page[page.length - 1].route_code : null
+  };
+};
+
+export const listRouteWeeks = async ({ routeCode }) => {
+  const [route, records] = await Promise.all([
+    Route.findOne({ attributes: ['route_code'], where: { route_code: routeCode }, raw: true }),
+    OrbcommData.findAll({
+      attributes: ['week'],
+      where: { route_code: routeCode },
+      group: ['week'],
+      raw: true
+    })
+  ]);
+  if (!route) {
+    return null;
+  }
+
+  const weeks = records
+    .map(record => `${record.week}`)
+    .sort((a, b) => a.localeCompare(b));
+  return { code: route.route_code, weeks };
 };
 
 export const listAvailableRoutes = async () => {
   const routes = await Route.findAll({
-    order: [['route_code', 'ASC']]
+    order: [['route_code', 'ASC']],
+    raw: true
   });
 
   const telemetryWeeks = await OrbcommData.findAll({
     attributes: ['route_code', 'week'],
-    order: [['route_code', 'ASC'], ['week', 'ASC']]
+    order: [['route_code', 'ASC'], ['week', 'ASC']],
+    raw: true
   });
 
   const weeksByRoute = telemetryWeeks.reduce((acc, record) => {
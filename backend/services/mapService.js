@@ -0,0 +1,147 @@
+// Level-of-detail helpers for route telemetry.
+//
+// Paths are simplified with a priority-driven Douglas–Peucker: starting from the first and
+// last point, the point farthest from its enclosing segment is added until either the
+// remaining deviation drops below `tolerance` (in degrees) or `maxPoints` points are kept.
+// Every returned point is an original telemetry record, so ids and timestamps survive.
+
+const TILE_SIZE = 256;
+
+export const toleranceForZoom = zoom => 360 / (TILE_SIZE * 2 ** zoom);
+
+const perpendicularDistance = (point, start, end) => {
+  const dx = end.longitude - start.longitude;
+  const dy = end.latitude - start.latitude;
+  const lengthSquared = dx * dx + dy * dy;
+  if (lengthSquared === 0) {
+    return Math.hypot(point.longitude - start.longitude, point.latitude - start.latitude);
+  }
+  const cross = Math.abs(dy * point.longitude - dx * point.latitude + end.longitude * start.latitude - end.latitude * start.longitude);
+  return cross / Math.sqrt(lengthSquared);
+};
+
+class MaxHeap {
+  constructor () {
+    this.items = [];
+  }
+
+  get size () {
+    return this.items.length;
+  }
+
+  push (item) {
+    const { items } = this;
+    items.push(item);
+    let index = items.length - 1;
+    while (index > 0) {
+      const parent = (index - 1) >> 1;
+      if (items[parent].distance >= items[index].distance) break;
+      [items[parent], items[index]] = [items[index], items[parent]];
+      index = parent;
+    }
+  }
+
+  pop () {
+    const { items } = this;
+    const top = items[0];
+    const last = items.pop();
+    if (items.length > 0) {
+      items[0] = last;
+      let index = 0;
+      for (;;) {
+        const left = index * 2 + 1;
+        const right = left + 1;
+        let largest = index;
+        if (left < items.length && items[left].distance > items[largest].distance) largest = left;
+        if (right < items.length && items[right].distance > items[largest].distance) largest = right;
+        if (largest === index) break;
+        [items[largest], items[index]] = [items[index], items[largest]];
+        index = largest;
+      }
+    }
+    return top;
+  }
+}
+
+export const simplifyPath = (points, { tolerance = 0, maxPoints = Infinity } = {}) => {
+  const limit = Math.max(2, maxPoints);
+  if (points.length <= 2 || (points.length <= limit && !(tolerance > 0))) {
+    return points;
+  }
+
+  const last = points.length - 1;
+  const keep = new Uint8Array(points.length);
+  keep[0] = 1;
+  keep[last] = 1;
+  let kept = 2;
+
+  const heap = new MaxHeap();
+  const pushSegment = (start, end) => {
+    if (end - start < 2) return;
+    let farthest = -1;
+    let distance = -1;
+    for (let index = start + 1; index < end; index += 1) {
+      const candidate = perpendicularDistance(points[index], points[start], points[end]);
+      if (candidate > distance) {
+        distance = candidate;
+        farthest = index;
+      }
+    }
+    heap.push({ distance, start, end, index: farthest });
+  };
+
+  pushSegment(0, last);
+  while (heap.size > 0 && kept < limit) {
+    const segment = heap.pop();
+    if (segment.distance <= tolerance) break;
+    keep[segment.index] = 1;
+    kept += 1;
+    pushSegment(segment.start, segment.index);
+    pushSegment(segment.index, segment.end);
+  }
+
+  return points.filter((_, index) => keep[index] === 1);
+};
+
+const parseNumber = value => {
+  if (value === undefined || value === null || value === '') return null;
+  const numeric = Number(value);
+  return Number.isFinite(numeric) ? numeric : null;
+};
+
+export const parseSimplificationOptions = (query = {}) => {
+  const maxPoints = parseNumber(query.maxPoints);
+  const zoom = parseNumber(query.zoom);
+  let tolerance = parseNumber(query.tolerance);
+  if (tolerance === null && zoom !== null) {
+    tolerance = toleranceForZoom(zoom);
+  }
+  if (maxPoints === null && tolerance === null) {
+    return null;
+  }
+  return {
+    maxPoints: maxPoints === null ? Infinity : Math.max(2, Math.floor(maxPoints)),
+    tolerance: tolerance === null ? 0 : Math.max(0, tolerance)
+  };
+};
+
+export const simplifyTelemetry = (telemetry, options) => {
+  const located = telemetry.filter(point => point.latitude !== null && point.longitude !== null);
+  const simplified = simplifyPath(located, options);
+  return {
+    telemetry: simplified,
+    simplification: {
+      originalPoints: telemetry.length,
+      returnedPoints: simplified.length,
+      maxPoints: Number.isFinite(options.maxPoints) ? options.maxPoints : null,
+      tolerance: options.tolerance
+    }
+  };
+};
+
+export default {
+  parseSimplificationOptions,
+  simplifyPath,
+  simplifyTelemetry,
+  toleranceForZoom
+};
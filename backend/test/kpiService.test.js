@@ -0,0 +1,118 @@
+// Database-backed tests for the KPI service. They load into a throwaway schema and are
+// skipped unless DATABASE_URL points at a PostgreSQL server: `DATABASE_URL=... npm test`.
+import assert from 'node:assert/strict';
+import { after, before, describe, test } from 'node:test';
+
+const enabled = Boolean(process.env.DATABASE_URL);
+const schema = `kpi_test_${process.pid}`;
+
+describe('kpiService', { skip: !enabled && 'DATABASE_URL is not set' }, () => {
+  const ROUTES = 40;
+  const WEEKS = 40;
+  let sequelize;
+  let models;
+  let calculateKPIsBatch;
+  let fetchKpiTrend;
+  let rowsRead = 0;
+
+  const routeCode = index => `R${String(index).padStart(3, '0')}`;
+  const weekLabel = index => `2024${String(index + 1).padStart(2, '0')}`;
+
+  before(async () => {
+    ({ sequelize } = await import('../config/config.js'));
+    sequelize.addHook('afterConnect', connection => connection.query(`SET search_path TO ${schema}`));
+    await sequelize.createSchema(schema);
+    models = await import('../models/index.js');
+    ({ calculateKPIsBatch, fetchKpiTrend } = await import('../services/kpiService.js'));
+    await sequelize.sync();
+
+    const { Route, OrbcommData, TransearchData } = models;
+    const routes = Array.from({ length: ROUTES }, (_, index) => ({ route_code: routeCode(index) }));
+    const grid = routes.flatMap(({ route_code: code }, routeIndex) =>
+      Array.from({ length: WEEKS }, (_, weekIndex) => ({ route_code: code, week: weekLabel(weekIndex), routeIndex, weekIndex })));
+    await Route.bulkCreate(routes);
+    await OrbcommData.bulkCreate(grid.map(({ route_code: code, week, routeIndex, weekIndex }) => ({
+      route_code: code,
+      week,
+      available: routeIndex + 1,
+      loaded: weekIndex + 1,
+      used: 1,
+      total: 2,
+      avg_stop_duration: 3,
+      trips_over_five: 1,
+      total_trips: 4
+    })));
+    // A route whose weeks each miss one side of a ratio, for the trend tests.
+    await Route.create({ route_code: 'TREND' });
+    await OrbcommData.bulkCreate([
+      { route_code: 'TREND', week: '202401', available: null, loaded: 100, used: 5, total: null, avg_stop_duration: 10, trips_over_five: 2, total_trips: 4 },
+      { route_code: 'TREND', week: '202402', available: 50, loaded: 50, used: 1, total: 2, avg_stop_duration: 20, trips_over_five: null, total_trips: 4 }
+    ]);
+    await TransearchData.bulkCreate(grid.map(({ route_code: code, week, routeIndex }) => ({
+      route_code: code,
+      week,
+      performance_variation: routeIndex / 10
+    })));
+
+    // Count the rows each batch actually pulls from the database.
+    [OrbcommData, TransearchData].forEach(model => {
+      const findAll = model.findAll;
+      model.findAll = async function (...args) {
+        const rows = await findAll.apply(this, args);
+        rowsRead += rows.length;
+        return rows;
+      };
+    });
+  });
+
+  after(async () => {
+    if (!sequelize) return;
+    await sequelize.dropSchema(schema);
+    await sequelize.close();
+  });
+
+  test('reads only the requested pairs when their cross product is much larger', async () => {
+    // One week per route: the routes x weeks cross product is 1600 rows per table.
+    const pairs = Array.from({ length: ROUTES }, (_, index) => ({ routeCode: routeCode(index), week: weekLabel(index) }));
+    rowsRead = 0;
+    const results = await calculateKPIsBatch({ pairs });
+
+    assert.equal(rowsRead, 2 * pairs.length);
+    results.forEach((result, index) => {
+      assert.equal(result.routeCode, routeCode(index));
+      assert.equal(result.week, weekLabel(index));
+      assert.equal(result.sdei, Number(((index + 1) / (index + 1)).toFixed(4)));
+      assert.equal(result.rpi, Number((index / 10).toFixed(4)));
+    });
+  });
+
+  test('matches numeric weeks and repeated routes, and returns null for unknown pairs', async () => {
+    const pairs = [
+      { routeCode: routeCode(1), week: Number(weekLabel(0)) },
+      { routeCode: routeCode(1), week: weekLabel(3) },
+      { routeCode: routeCode(2), week: weekLabel(3) },
+      { routeCode: routeCode(2), week: '209999' },
+      { routeCode: 'missing', week: weekLabel(0) }
+    ];
+    rowsRead = 0;
+    const results = await calculateKPIsBatch({ pairs });
+
+    assert.equal(rowsRead, 2 * 3);
+    assert.deepEqual(results.map(result => result && result.sdei), [2, 0.5, 0.75, null, null]);
+    assert.equal(results[0].week, Number(weekLabel(0)));
+  });
+
+  test('pools each trend ratio over the weeks that report both of its inputs', async () => {
+    const { resolution, points } = await fetchKpiTrend({ routeCode: 'TREND', resolution: 'month' });
+    assert.equal(resolution, 'month');
+    assert.deepEqual(points, [{ week: '2024-01', weeks: 2, sdei: 1, sdcui: 0.5, sii: 15 * 0.5 }]);
+  });
+
+  test('keeps the per-row formulas for single-week trend points', async () => {
+    const { points } = await fetchKpiTrend({ routeCode: 'TREND', resolution: 'week' });
+    assert.deepEqual(points, [
+      { week: '202401', weeks: 1, sdei: null, sdcui: null, sii: 5 },
+      { week: '202402', weeks: 1, sdei: 1, sdcui: 0.5, sii: 0 }
+    ]);
+  });
+});
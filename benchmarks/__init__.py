@@ -0,0 +1,4 @@
+"""Micro-benchmarks for the Python utilities in ``code/`` and ``streamlit_app/``.
+
+Run individual modules from the repository root, e.g. ``python -m benchmarks.bench_payloads``.
+"""
@@ -0,0 +1,62 @@
+"""Measure the memory saved by ``compact=True`` on the county pair and Transearch loaders.
+
+Generates (or reuses) a synthetic extract with :mod:`benchmarks.datagen`, loads it with
+the default dtypes and in compact mode, and prints the per-column report from
+:func:`code.ingestion_utils.compaction_report` plus the load time of each mode.
+
+Usage::
+
+    python -m benchmarks.bench_compact --rows 1m
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Callable, Tuple
+
+import pandas as pd
+
+from code.ingestion_utils import compaction_report, load_parquet
+
+from .datagen import DEFAULT_OUTPUT_DIR, SCALES, GeneratorSpec, generate
+
+
+def _timed(load: Callable[[], pd.DataFrame]) -> Tuple[pd.DataFrame, float]:
+    started = time.perf_counter()
+    frame = load()
+    return frame, time.perf_counter() - started
+
+
+def run(path: Path) -> Tuple[pd.DataFrame, float, float]:
+    original, default_seconds = _timed(lambda: load_parquet(path))
+    compacted, compact_seconds = _timed(lambda: load_parquet(path, compact=True))
+    return compaction_report(original, compacted), default_seconds, compact_seconds
+
+
+def _print_report(title: str, report: pd.DataFrame, default_seconds: float, compact_seconds: float) -> None:
+    shown = report.assign(
+        mb_before=report["bytes_before"] / 2**20,
+        mb_after=report["bytes_after"] / 2**20,
+    )[["column", "dtype_before", "dtype_after", "mb_before", "mb_after", "ratio"]]
+    print(title)
+    print(shown.to_string(index=False, float_format=lambda value: f"{value:,.2f}"))
+    print(f"load: default {default_seconds:.2f}s, compact {compact_seconds:.2f}s\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="1m", help=f"Row count or one of {', '.join(SCALES)}")
+    parser.add_argument("--routes", type=int, default=500)
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR)
+    args = parser.parse_args()
+
+    rows = SCALES.get(str(args.rows).lower()) or int(args.rows)
+    dataset = generate(GeneratorSpec(rows=rows, routes=args.routes, weeks=args.weeks), args.output_dir)
+    _print_report("county_pair_moves", *run(dataset.county_pair_moves))
+    _print_report("transearch", *run(dataset.transearch))
+
+
+if __name__ == "__main__":
+    main()
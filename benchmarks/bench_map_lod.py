@@ -0,0 +1,94 @@
+"""Measure map payload size and render cost with and without path simplification.
+
+Usage::
+
+    python -m benchmarks.bench_map_lod --points 1000 10000 100000 --max-points 2000 --zoom 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import pydeck as pdk
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "streamlit_app"))
+
+from map_lod import simplify_telemetry, tolerance_for_zoom  # noqa: E402
+
+
+def make_telemetry(points: int, *, seed: int = 11) -> List[Dict]:
+    """Random-walk telemetry between Los Angeles and Phoenix with one point per minute."""
+    rng = np.random.default_rng(seed)
+    progress = np.linspace(0, 1, points)
+    latitude = 34.05 + (33.45 - 34.05) * progress + np.cumsum(rng.normal(0, 0.002, points))
+    longitude = -118.24 + (-112.07 + 118.24) * progress + np.cumsum(rng.normal(0, 0.002, points))
+    timestamps = pd.date_range("2024-01-01", periods=points, freq="min").strftime("%Y-%m-%dT%H:%M:%SZ")
+    return [
+        {"id": index, "latitude": float(lat), "longitude": float(lon), "event_timestamp": stamp}
+        for index, (lat, lon, stamp) in enumerate(zip(latitude, longitude, timestamps))
+    ]
+
+
+def render_deck(telemetry: List[Dict]) -> str:
+    """Replicate the DataFrame and pydeck work done by ``render_map`` and serialise the deck."""
+    frame = pd.DataFrame(telemetry).dropna(subset=["latitude", "longitude"]).sort_values("event_timestamp")
+    layer = pdk.Layer("PathLayer", data=[{"path": frame[["longitude", "latitude"]].values.tolist()}], width_min_pixels=5)
+    deck = pdk.Deck(
+        layers=[layer],
+        initial_view_state=pdk.ViewState(latitude=frame["latitude"].mean(), longitude=frame["longitude"].mean(), zoom=5),
+        map_provider="carto",
+    )
+    return deck.to_json()
+
+
+def run(point_counts: List[int], *, max_points: int, zoom: float) -> List[Dict[str, float]]:
+    rows = []
+    tolerance = tolerance_for_zoom(zoom)
+    for count in point_counts:
+        telemetry = make_telemetry(count)
+
+        started = time.perf_counter()
+        simplified = simplify_telemetry(telemetry, tolerance=tolerance, max_points=max_points)
+        simplify_seconds = time.perf_counter() - started
+
+        full_render = time.perf_counter()
+        render_deck(telemetry)
+        full_render = time.perf_counter() - full_render
+
+        lod_render = time.perf_counter()
+        render_deck(simplified)
+        lod_render = time.perf_counter() - lod_render
+
+        rows.append(
+            {
+                "points": count,
+                "kept": len(simplified),
+                "full_kb": len(json.dumps({"telemetry": telemetry})) / 1024,
+                "lod_kb": len(json.dumps({"telemetry": simplified})) / 1024,
+                "simplify_ms": simplify_seconds * 1000,
+                "full_render_ms": full_render * 1000,
+                "lod_render_ms": lod_render * 1000,
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--max-points", type=int, default=2_000)
+    parser.add_argument("--zoom", type=float, default=5)
+    args = parser.parse_args()
+
+    rows = run(args.points, max_points=args.max_points, zoom=args.zoom)
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda value: f"{value:,.1f}"))
+
+
+if __name__ == "__main__":
+    main()
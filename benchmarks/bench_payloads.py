@@ -0,0 +1,76 @@
+"""Compare the per-row payload path with the column-wise batch builders.
+
+Usage::
+
+    python -m benchmarks.bench_payloads --rows 200000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from code.ingestion_utils import (
+    build_orbcomm_payloads,
+    iter_dict_rows,
+    prepare_orbcomm_payload,
+)
+
+
+def make_county_pair_frame(rows: int, *, seed: int = 7) -> pd.DataFrame:
+    """Build a synthetic county pair frame with the columns found in the real extracts."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "route_code": rng.choice([f"R{index:04d}" for index in range(500)], rows),
+            "week": rng.integers(202401, 202453, rows).astype(str),
+            "available": rng.uniform(0, 500, rows),
+            "loaded": rng.uniform(0, 500, rows),
+            "used": rng.uniform(0, 500, rows),
+            "total": rng.uniform(0, 500, rows),
+            "avg_stop_duration": rng.uniform(0, 60, rows),
+            "trips_over_five": rng.integers(0, 50, rows),
+            "total_trips": rng.integers(0, 100, rows),
+            "latitude": rng.uniform(32, 42, rows),
+            "longitude": rng.uniform(-124, -110, rows),
+            "event_timestamp": pd.to_datetime(rng.integers(1_700_000_000, 1_730_000_000, rows), unit="s"),
+            "origin_county": "06037",
+            "destination_county": "04019",
+            "mode": "truck",
+        }
+    )
+
+
+def _time(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run(rows: int) -> Dict[str, float]:
+    frame = make_county_pair_frame(rows)
+    results = {
+        "per_row": _time(lambda: [prepare_orbcomm_payload(row) for row in iter_dict_rows(frame)]),
+    }
+    for output in ("records", "recarray", "arrow"):
+        results[f"batch_{output}"] = _time(lambda: build_orbcomm_payloads(frame, output=output))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="Number of synthetic rows to build payloads for")
+    args = parser.parse_args()
+
+    results = run(args.rows)
+    baseline = results["per_row"]
+    print(f"{'path':<16}{'seconds':>10}{'rows/s':>14}{'speedup':>10}")
+    for name, seconds in results.items():
+        print(f"{name:<16}{seconds:>10.3f}{args.rows / seconds:>14,.0f}{baseline / seconds:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Compare JSON and Arrow IPC responses for the trend and map endpoints.
+
+Each case fetches the same payload through :class:`BackendClient` against the stub
+backend, once as JSON and once as Arrow, and reports the body size and the median time
+from request to a ready pandas DataFrame (``fetch_trend_frame`` / ``fetch_map_frame``).
+``client_ms`` subtracts the stub's ``Server-Timing`` (synthesis and encoding), leaving
+transfer, decoding and DataFrame construction; ``speedup`` compares that column.
+
+Usage::
+
+    python -m benchmarks.bench_wire_format --points 2000 20000 200000 --weeks 520
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "streamlit_app"))
+
+from backend_client import BackendClient  # noqa: E402
+from instrumentation import Instrumentation  # noqa: E402
+
+from .stub_backend import StubBackend  # noqa: E402
+
+
+def _median_ms(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def _http_stats(client: BackendClient, endpoint: str) -> Dict[str, float]:
+    for row in client.instrumentation.snapshot():
+        if row["stage"] == f"http.{endpoint}":
+            return {"body_kb": (row["mean_bytes"] or 0) / 1024, "server_ms": row["server_ms"] or 0.0}
+    return {"body_kb": 0.0, "server_ms": 0.0}
+
+
+def _measure(backend: StubBackend, case: str, endpoint: str, fetch: Callable[[BackendClient], object], repeat: int) -> List[Dict]:
+    rows = []
+    for wire in ("json", "arrow"):
+        client = BackendClient(backend.base_url, cache=None, instrumentation=Instrumentation(), arrow=wire == "arrow")
+        client.login("bench@example.com", "bench")
+        fetch(client)
+        client.instrumentation.reset()
+        milliseconds = _median_ms(lambda: fetch(client), repeat)
+        stats = _http_stats(client, endpoint)
+        rows.append({"case": case, "wire": wire, **stats, "ms": milliseconds, "client_ms": milliseconds - stats["server_ms"]})
+    return rows
+
+
+def run(point_counts: List[int], *, weeks: int, repeat: int) -> pd.DataFrame:
+    rows: List[Dict] = []
+    with StubBackend(routes=2, weeks=weeks) as backend:
+        rows += _measure(
+            backend,
+            f"trend/{weeks}w",
+            "trend",
+            lambda client: client.fetch_trend_frame(backend.route_codes[0], []),
+            repeat,
+        )
+    for points in point_counts:
+        with StubBackend(routes=2, weeks=1, map_points=points) as backend:
+            rows += _measure(
+                backend,
+                f"map/{points}",
+                "map",
+                lambda client: client.fetch_map_frame(backend.route_codes[0]),
+                repeat,
+            )
+
+    frame = pd.DataFrame(rows)
+    json_rows = frame[frame["wire"] == "json"].set_index("case")
+    frame["size_ratio"] = frame["body_kb"] / frame["case"].map(json_rows["body_kb"])
+    frame["speedup"] = frame["case"].map(json_rows["client_ms"]) / frame["client_ms"]
+    return frame
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, nargs="+", default=[2_000, 20_000, 200_000], help="Telemetry points per map")
+    parser.add_argument("--weeks", type=int, default=520, help="Weeks in the trend case")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per case")
+    args = parser.parse_args()
+
+    frame = run(args.points, weeks=args.weeks, repeat=args.repeat)
+    print(frame.to_string(index=False, float_format=lambda value: f"{value:,.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Deterministic synthetic county-pair and Transearch Parquet extracts.
+
+The generator writes ``routes`` × ``weeks`` blocks of telemetry in bounded chunks, so
+files from 10k up to 100M rows can be produced without holding them in memory. Every
+chunk draws from its own seeded random generator, which makes the output byte-for-byte
+reproducible for the same arguments.
+
+Usage::
+
+    python -m benchmarks.datagen --rows 1000000 --routes 500 --weeks 52 --output-dir data/bench
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parent.parent / "data" / "bench"
+DEFAULT_ROW_GROUP_SIZE = 1_000_000
+CHUNK_ROWS = 1_000_000
+FIRST_WEEK = (2024, 1)
+SCALES: Dict[str, int] = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+    "100m": 100_000_000,
+}
+
+COUNTY_PAIR_SCHEMA = pa.schema(
+    [
+        ("route_code", pa.string()),
+        ("week", pa.string()),
+        ("available", pa.float64()),
+        ("loaded", pa.float64()),
+        ("used", pa.float64()),
+        ("total", pa.float64()),
+        ("avg_stop_duration", pa.float64()),
+        ("trips_over_five", pa.int64()),
+        ("total_trips", pa.int64()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("event_timestamp", pa.timestamp("us")),
+        ("origin_county", pa.string()),
+        ("destination_county", pa.string()),
+        ("mode", pa.string()),
+    ]
+)
+TRANSEARCH_SCHEMA = pa.schema(
+    [
+        ("route_code", pa.string()),
+        ("week", pa.string()),
+        ("performance_variation", pa.float64()),
+        ("origin_county", pa.string()),
+        ("destination_county", pa.string()),
+        ("mode", pa.string()),
+    ]
+)
+_MODES = ("truck", "rail", "intermodal")
+_EPOCH_2024 = np.datetime64("2024-01-01T00:00:00", "us")
+
+
+@dataclass(frozen=True)
+class GeneratorSpec:
+    """Shape of a synthetic dataset. Equal specs always produce identical files."""
+
+    rows: int
+    routes: int = 500
+    weeks: int = 52
+    seed: int = 7
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE
+
+    @property
+    def label(self) -> str:
+        return f"{self.rows}r-{self.routes}x{self.weeks}-s{self.seed}"
+
+
+@dataclass(frozen=True)
+class GeneratedDataset:
+    county_pair_moves: Path
+    transearch: Path
+    spec: GeneratorSpec
+
+
+def week_labels(count: int, start: Tuple[int, int] = FIRST_WEEK) -> List[str]:
+    """``count`` consecutive ``YYYYWW`` labels, rolling over after week 52."""
+    year, week = start
+    labels = []
+    for _ in range(count):
+        labels.append(f"{year}{week:02d}")
+        week += 1
+        if week > 52:
+            year, week = year + 1, 1
+    return labels
+
+
+def _route_table(spec: GeneratorSpec) -> List[Tuple[str, str, str, str, float, float, float, float]]:
+    rng = np.random.default_rng([spec.seed, 0])
+    routes = []
+    seen = set()
+    while len(routes) < spec.routes:
+        origin, destination = (f"{value:05d}" for value in rng.integers(1001, 56045, 2))
+        code = f"{origin}-{destination}"
+        if origin == destination or code in seen:
+            continue
+        seen.add(code)
+        start = rng.uniform([25.0, -124.0], [48.0, -70.0])
+        end = rng.uniform([25.0, -124.0], [48.0, -70.0])
+        routes.append((code, origin, destination, _MODES[len(routes) % len(_MODES)], *start, *end))
+    return routes
+
+
+def _rows_per_block(spec: GeneratorSpec) -> np.ndarray:
+    blocks = spec.routes * spec.weeks
+    counts = np.full(blocks, spec.rows // blocks, dtype=np.int64)
+    counts[: spec.rows % blocks] += 1
+    return counts.reshape(spec.routes, spec.weeks)
+
+
+def _county_pair_chunks(spec: GeneratorSpec) -> Iterator[pa.Table]:
+    routes = _route_table(spec)
+    labels = np.asarray(week_labels(spec.weeks), dtype=object)
+    counts = _rows_per_block(spec)
+
+    for route_index, (code, origin, destination, mode, lat0, lon0, lat1, lon1) in enumerate(routes):
+        week_index = 0
+        while week_index < spec.weeks:
+            # Group consecutive weeks of one route until the chunk budget is reached.
+            stop = week_index + 1
+            while stop < spec.weeks and counts[route_index, week_index:stop + 1].sum() <= CHUNK_ROWS:
+                stop += 1
+            block_counts = counts[route_index, week_index:stop]
+            rows = int(block_counts.sum())
+            if rows == 0:
+                week_index = stop
+                continue
+
+            rng = np.random.default_rng([spec.seed, 1, route_index, week_index])
+            weeks = np.repeat(np.arange(week_index, stop), block_counts)
+            progress = np.concatenate([np.sort(rng.random(count)) for count in block_counts])
+            offsets = (weeks * 7 * 86_400 + progress * 7 * 86_400) * 1_000_000
+            total = rng.uniform(50, 500, rows)
+            total_trips = rng.integers(1, 100, rows)
+
+            yield pa.table(
+                {
+                    "route_code": pa.array(np.full(rows, code, dtype=object), pa.string()),
+                    "week": pa.array(labels[weeks], pa.string()),
+                    "available": rng.uniform(0, 1, rows) * total,
+                    "loaded": rng.uniform(0.5, 1, rows) * total,
+                    "used": rng.uniform(0, 1, rows) * total,
+                    "total": total,
+                    "avg_stop_duration": rng.gamma(2.0, 8.0, rows),
+                    "trips_over_five": (total_trips * rng.uniform(0, 0.5, rows)).astype(np.int64),
+                    "total_trips": total_trips,
+                    "latitude": lat0 + (lat1 - lat0) * progress + rng.normal(0, 0.01, rows),
+                    "longitude": lon0 + (lon1 - lon0) * progress + rng.normal(0, 0.01, rows),
+                    "event_timestamp": pa.array(_EPOCH_2024 + offsets.astype("timedelta64[us]"), pa.timestamp("us")),
+                    "origin_county": pa.array(np.full(rows, origin, dtype=object), pa.string()),
+                    "destination_county": pa.array(np.full(rows, destination, dtype=object), pa.string()),
+                    "mode": pa.array(np.full(rows, mode, dtype=object), pa.string()),
+                },
+                schema=COUNTY_PAIR_SCHEMA,
+            )
+            week_index = stop
+
+
+def _transearch_table(spec: GeneratorSpec) -> pa.Table:
+    routes = _route_table(spec)
+    rng = np.random.default_rng([spec.seed, 2])
+    labels = week_labels(spec.weeks)
+    count = spec.routes * spec.weeks
+    return pa.table(
+        {
+            "route_code": [route[0] for route in routes for _ in labels],
+            "week": labels * spec.routes,
+            "performance_variation": rng.normal(0, 0.15, count),
+            "origin_county": [route[1] for route in routes for _ in labels],
+            "destination_county": [route[2] for route in routes for _ in labels],
+            "mode": [route[3] for route in routes for _ in labels],
+        },
+        schema=TRANSEARCH_SCHEMA,
+    )
+
+
+def generate(spec: GeneratorSpec, output_dir: Path = DEFAULT_OUTPUT_DIR, *, overwrite: bool = False) -> GeneratedDataset:
+    """Write the county-pair and Transearch files for ``spec`` and return their paths.
+
+    Files are named after the spec and a ``.json`` sidecar records it, so an existing
+    dataset with the same spec is reused unless ``overwrite`` is set.
+    """
+    if spec.rows < 1 or spec.routes < 1 or spec.weeks < 1:
+        raise ValueError("rows, routes and weeks must all be positive")
+    directory = Path(output_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    county_path = directory / f"county_pair_moves-{spec.label}.parquet"
+    transearch_path = directory / f"transearch-{spec.label}.parquet"
+    sidecar = directory / f"{spec.label}.json"
+    dataset = GeneratedDataset(county_pair_moves=county_path, transearch=transearch_path, spec=spec)
+
+    if not overwrite and sidecar.exists() and county_path.exists() and transearch_path.exists():
+        if json.loads(sidecar.read_text(encoding="utf-8")) == asdict(spec):
+            return dataset
+
+    with pq.ParquetWriter(str(county_path), COUNTY_PAIR_SCHEMA) as writer:
+        # Buffer small per-route chunks so row groups reach ``row_group_size``.
+        pending: List[pa.Table] = []
+        buffered = 0
+        for chunk in _county_pair_chunks(spec):
+            pending.append(chunk)
+            buffered += chunk.num_rows
+            if buffered >= spec.row_group_size:
+                writer.write_table(pa.concat_tables(pending), row_group_size=spec.row_group_size)
+                pending, buffered = [], 0
+        if pending:
+            writer.write_table(pa.concat_tables(pending), row_group_size=spec.row_group_size)
+    pq.write_table(_transearch_table(spec), str(transearch_path), row_group_size=spec.row_group_size)
+    sidecar.write_text(json.dumps(asdict(spec), indent=2), encoding="utf-8")
+    return dataset
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Write deterministic synthetic Parquet extracts.")
+    parser.add_argument("--rows", default="100k", help=f"Row count or one of {', '.join(SCALES)}")
+    parser.add_argument("--routes", type=int, default=500, help="Number of county-pair routes")
+    parser.add_argument("--weeks", type=int, default=52, help="Number of consecutive weeks per route")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE, help="Rows per Parquet row group")
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR, help="Destination directory")
+    parser.add_argument("--overwrite", action="store_true", help="Regenerate even if the files exist")
+    args = parser.parse_args(argv)
+
+    rows = SCALES.get(str(args.rows).lower()) or int(args.rows)
+    spec = GeneratorSpec(rows=rows, routes=args.routes, weeks=args.weeks, seed=args.seed, row_group_size=args.row_group_size)
+    dataset = generate(spec, args.output_dir, overwrite=args.overwrite)
+    for path in (dataset.county_pair_moves, dataset.transearch):
+        print(f"{path} ({path.stat().st_size / 1024 ** 2:.1f} MiB)")
+
+
+__all__ = [
+    "GeneratedDataset",
+    "GeneratorSpec",
+    "SCALES",
+    "generate",
+    "week_labels",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+"""Load test that replays dashboard traffic from many concurrent virtual users.
+
+Each virtual user follows a Streamlit session through its own :class:`BackendClient`:
+``login`` and ``list_routes``, then a series of interactions that each fetch the KPIs,
+trend and map of one route-week the way ``app.py`` does (concurrently, all route weeks
+in the trend), separated by exponentially distributed think times. After about
+``interactions_per_session`` interactions the user signs in again.
+
+Selections follow simple but skewed distributions: routes are drawn from a Zipf law over
+a shuffled route order, so a few routes get most of the traffic; a new route opens on a
+recent week (geometric in weeks back from the latest), and with ``stay_probability`` the
+next interaction steps to an adjacent week of the same route instead.
+
+Without ``--backend-url`` the test runs against a local :class:`StubBackend` with the given
+latency, jitter and injected error rate, in-process or, with ``--stub-process``, in a child
+process so the stub does not share the load generator's interpreter lock::
+
+    python -m benchmarks.load_test --users 50 --duration 60 --latency 0.02 --jitter 0.03
+    python -m benchmarks.load_test --users 20 --backend-url http://localhost:4000 --email analyst@example.com --password ...
+
+The report lists requests, errors, throughput and p50/p95/p99 latency per endpoint.
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import itertools
+import json
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .stub_backend import StubBackend
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "streamlit_app"))
+
+from backend_client import BackendClient, BackendError, RouteSummary  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+
+ENDPOINTS = ("login", "list_routes", "route_weeks", "kpis", "trend", "map")
+# Mirrors ``DEFAULT_MAP_ZOOM`` / ``DEFAULT_MAP_MAX_POINTS`` in ``streamlit_app/app.py``.
+DEFAULT_MAP_ZOOM = 5
+DEFAULT_MAP_MAX_POINTS = 2000
+
+
+@dataclass(frozen=True)
+class LoadProfile:
+    """How many users run for how long, and how they pick what to look at."""
+
+    users: int = 10
+    duration: float = 30.0
+    ramp_up: float = 5.0
+    think_time: float = 3.0
+    interactions_per_session: float = 20.0
+    route_skew: float = 1.1
+    week_recency: float = 0.35
+    stay_probability: float = 0.5
+    trend_resolution: str = "auto"
+    map_zoom: float = DEFAULT_MAP_ZOOM
+    map_max_points: int = DEFAULT_MAP_MAX_POINTS
+    frames: bool = True
+    sequential: bool = False
+    shared_cache: bool = False
+    seed: int = 7
+
+
+@dataclass(frozen=True)
+class Sample:
+    """One request: endpoint, start offset from the test start, duration and error label."""
+
+    endpoint: str
+    started: float
+    seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class LoadTestResult:
+    profile: LoadProfile
+    samples: List[Sample] = field(default_factory=list)
+    elapsed: float = 0.0
+    sessions: int = 0
+    interactions: int = 0
+
+
+# ----------------------------------------------------------------------
+# Selection model
+# ----------------------------------------------------------------------
+class SelectionModel:
+    """Zipf-distributed routes and recency-weighted weeks, seeded per virtual user."""
+
+    def __init__(self, routes: Sequence[RouteSummary], profile: LoadProfile, rng: random.Random) -> None:
+        self.profile = profile
+        self.rng = rng
+        # The popularity order is shuffled with the test seed, so every user shares the same hot routes.
+        self.routes = list(routes)
+        random.Random(profile.seed).shuffle(self.routes)
+        weights = [1.0 / rank ** profile.route_skew for rank in range(1, len(self.routes) + 1)]
+        self._cumulative = list(itertools.accumulate(weights))
+
+    def route(self) -> RouteSummary:
+        point = self.rng.random() * self._cumulative[-1]
+        return self.routes[min(bisect.bisect_left(self._cumulative, point), len(self.routes) - 1)]
+
+    def recent_week(self, weeks: Sequence[str]) -> str:
+        back = 0
+        while back < len(weeks) - 1 and self.rng.random() > self.profile.week_recency:
+            back += 1
+        return weeks[len(weeks) - 1 - back]
+
+    def adjacent_week(self, weeks: Sequence[str], week: str) -> str:
+        index = weeks.index(week) if week in weeks else len(weeks) - 1
+        step = self.rng.choice((-1, 1))
+        return weeks[min(max(index + step, 0), len(weeks) - 1)]
+
+
+# ----------------------------------------------------------------------
+# Virtual users
+# ----------------------------------------------------------------------
+def _error_label(error: BaseException) -> str:
+    if isinstance(error, BackendError):
+        if error.status_code is not None:
+            return f"HTTP {error.status_code}"
+        if error.__cause__ is not None:
+            return type(error.__cause__).__name__
+        return "BackendError"
+    return type(error).__name__
+
+
+class VirtualUser:
+    """One simulated dashboard session loop on its own client and thread."""
+
+    def __init__(
+        self,
+        index: int,
+        base_url: str,
+        profile: LoadProfile,
+        *,
+        email: str,
+        password: str,
+        record: Callable[[Sample], None],
+        origin: float,
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
+        self.index = index
+        self.profile = profile
+        self.email = email
+        self.password = password
+        self.record = record
+        self.origin = origin
+        self.rng = random.Random(profile.seed * 1_000_003 + index)
+        self.client = BackendClient(base_url, pool_size=3, cache=cache, instrumentation=None)
+        self.sessions = 0
+        self.interactions = 0
+        self._weeks: Dict[str, List[str]] = {}
+
+    def _call(self, endpoint: str, func: Callable[[], object]) -> Tuple[bool, object]:
+        started = time.perf_counter()
+        try:
+            value = func()
+        except Exception as exc:  # noqa: BLE001 - any failure is a sample, not a dead virtual user
+            self.record(Sample(endpoint, started - self.origin, time.perf_counter() - started, _error_label(exc)))
+            return False, None
+        self.record(Sample(endpoint, started - self.origin, time.perf_counter() - started))
+        return True, value
+
+    def _think(self, stop: threading.Event) -> None:
+        if self.profile.think_time > 0:
+            stop.wait(self.rng.expovariate(1.0 / self.profile.think_time))
+
+    def _route_weeks(self, route: RouteSummary) -> List[str]:
+        if route.weeks:
+            return sorted(route.weeks)
+        if route.code not in self._weeks:
+            ok, weeks = self._call("route_weeks", lambda: self.client.fetch_route_weeks(route.code))
+            if not ok:
+                return []
+            self._weeks[route.code] = sorted(weeks)
+        return self._weeks[route.code]
+
+    def _interact(self, executor: Optional[ThreadPoolExecutor], route: RouteSummary, weeks: List[str], week: str) -> None:
+        client = self.client
+        fetch_trend = client.fetch_trend_frame if self.profile.frames else client.fetch_trend
+        fetch_map = client.fetch_map_frame if self.profile.frames else client.fetch_map
+        calls = (
+            ("kpis", lambda: client.fetch_kpis(route.code, week)),
+            ("trend", lambda: fetch_trend(route.code, weeks, resolution=self.profile.trend_resolution)),
+            ("map", lambda: fetch_map(route.code, zoom=self.profile.map_zoom, max_points=self.profile.map_max_points)),
+        )
+        if executor is None:
+            for endpoint, func in calls:
+                self._call(endpoint, func)
+        else:
+            for future in [executor.submit(self._call, endpoint, func) for endpoint, func in calls]:
+                future.result()
+        self.interactions += 1
+
+    def run(self, stop: threading.Event) -> None:
+        executor = None if self.profile.sequential else ThreadPoolExecutor(max_workers=3, thread_name_prefix=f"vu{self.index}")
+        try:
+            while not stop.is_set():
+                self.sessions += 1
+                ok, _ = self._call("login", lambda: self.client.login(self.email, self.password))
+                ok = ok and not stop.is_set()
+                routes = self._call("list_routes", self.client.list_routes)[1] if ok else None
+                if not routes:
+                    self._think(stop)
+                    continue
+
+                model = SelectionModel(routes, self.profile, self.rng)
+                remaining = 1 + int(self.rng.expovariate(1.0 / max(self.profile.interactions_per_session - 1, 1e-9)))
+                route, week = None, None
+                while remaining > 0 and not stop.is_set():
+                    if route is not None and self.rng.random() < self.profile.stay_probability:
+                        week = model.adjacent_week(self._route_weeks(route), week)
+                    else:
+                        route = model.route()
+                        weeks = self._route_weeks(route)
+                        if not weeks:
+                            route = None
+                            self._think(stop)
+                            continue
+                        week = model.recent_week(weeks)
+                    self._interact(executor, route, self._route_weeks(route), week)
+                    remaining -= 1
+                    self._think(stop)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+
+def run_load_test(
+    base_url: str,
+    profile: LoadProfile = LoadProfile(),
+    *,
+    email: str = "loadtest@example.com",
+    password: str = "loadtest",
+) -> LoadTestResult:
+    """Run ``profile.users`` virtual users against ``base_url`` and collect every request sample.
+
+    Users start evenly over ``ramp_up`` seconds and stop after their current interaction
+    once ``duration`` has passed; the elapsed time covers the whole run including both.
+    """
+    result = LoadTestResult(profile=profile)
+    lock = threading.Lock()
+
+    def record(sample: Sample) -> None:
+        with lock:
+            result.samples.append(sample)
+
+    stop = threading.Event()
+    origin = time.perf_counter()
+    cache = ResponseCache() if profile.shared_cache else None
+    users = [
+        VirtualUser(index, base_url, profile, email=email, password=password, record=record, origin=origin, cache=cache)
+        for index in range(profile.users)
+    ]
+
+    def start(user: VirtualUser) -> None:
+        delay = profile.ramp_up * user.index / max(profile.users, 1)
+        if not stop.wait(delay):
+            user.run(stop)
+
+    threads = [threading.Thread(target=start, args=(user,), name=f"vu-{user.index}", daemon=True) for user in users]
+    for thread in threads:
+        thread.start()
+    stop.wait(profile.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    result.elapsed = time.perf_counter() - origin
+    result.sessions = sum(user.sessions for user in users)
+    result.interactions = sum(user.interactions for user in users)
+    return result
+
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+def summarize(result: LoadTestResult) -> List[Dict[str, object]]:
+    """Per-endpoint (and overall) request counts, error rates, throughput and latency percentiles in ms."""
+    groups: Dict[str, List[Sample]] = {}
+    for sample in result.samples:
+        groups.setdefault(sample.endpoint, []).append(sample)
+    ordered = [name for name in ENDPOINTS if name in groups] + sorted(set(groups) - set(ENDPOINTS))
+
+    rows = []
+    for name, samples in [(name, groups[name]) for name in ordered] + [("all", result.samples)]:
+        if not samples:
+            continue
+        latencies = np.array([sample.seconds for sample in samples]) * 1000
+        errors = Counter(sample.error for sample in samples if sample.error is not None)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        rows.append(
+            {
+                "endpoint": name,
+                "requests": len(samples),
+                "errors": sum(errors.values()),
+                "error_rate": sum(errors.values()) / len(samples),
+                "rps": len(samples) / result.elapsed if result.elapsed > 0 else float("inf"),
+                "mean_ms": float(latencies.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(latencies.max()),
+                "error_kinds": dict(errors),
+            }
+        )
+    return rows
+
+
+def format_report(result: LoadTestResult) -> str:
+    rows = summarize(result)
+    lines = [
+        f"{result.profile.users} users, {result.elapsed:.1f}s, {result.sessions:,} sessions, "
+        f"{result.interactions:,} interactions ({result.interactions / max(result.elapsed, 1e-9):.1f}/s)",
+        f"{'endpoint':<12}{'requests':>10}{'errors':>8}{'err %':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}",
+    ]
+    for row in rows:
+        lines.append(
+            f"{row['endpoint']:<12}{row['requests']:>10,}{row['errors']:>8,}{row['error_rate'] * 100:>7.2f}"
+            f"{row['rps']:>9.1f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+        )
+    kinds = Counter()
+    for row in rows:
+        if row["endpoint"] != "all":
+            kinds.update(row["error_kinds"])
+    if kinds:
+        lines.append("errors: " + ", ".join(f"{kind} × {count:,}" for kind, count in kinds.most_common()))
+    return "\n".join(lines)
+
+
+def write_report(result: LoadTestResult, path: Path, *, backend: Dict[str, object]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "profile": asdict(result.profile),
+        "backend": backend,
+        "elapsed": result.elapsed,
+        "sessions": result.sessions,
+        "interactions": result.interactions,
+        "endpoints": summarize(result),
+    }
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def spawn_stub(stub_args: Sequence[str], *, timeout: float = 30.0) -> Tuple[subprocess.Popen, str]:
+    """Start ``python -m benchmarks.stub_backend`` on a free port and wait until it accepts connections."""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_backend", "--port", str(port), *stub_args],
+        cwd=Path(__file__).resolve().parent.parent,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Stub backend exited with status {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Stub backend did not start in time")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=LoadProfile.users, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=LoadProfile.duration, help="Seconds to run after the start")
+    parser.add_argument("--ramp-up", type=float, default=LoadProfile.ramp_up, help="Seconds over which users start")
+    parser.add_argument("--think-time", type=float, default=LoadProfile.think_time, help="Mean seconds between interactions")
+    parser.add_argument("--interactions", type=float, default=LoadProfile.interactions_per_session, help="Mean interactions per session")
+    parser.add_argument("--route-skew", type=float, default=LoadProfile.route_skew, help="Zipf exponent of route popularity")
+    parser.add_argument("--week-recency", type=float, default=LoadProfile.week_recency, help="Chance a new route opens on its latest week")
+    parser.add_argument("--stay", type=float, default=LoadProfile.stay_probability, help="Chance to step to an adjacent week instead of a new route")
+    parser.add_argument("--trend-resolution", default=LoadProfile.trend_resolution)
+    parser.add_argument("--json", action="store_true", help="Fetch trends and maps as JSON instead of Arrow frames")
+    parser.add_argument("--sequential", action="store_true", help="Issue the three dashboard calls one after another")
+    parser.add_argument("--shared-cache", action="store_true", help="Share one response cache between users, like one Streamlit process")
+    parser.add_argument("--seed", type=int, default=LoadProfile.seed)
+    parser.add_argument("--backend-url", default=None, help="Real backend to test; omit to start the local stub")
+    parser.add_argument("--email", default="loadtest@example.com")
+    parser.add_argument("--password", default="loadtest")
+    parser.add_argument("--routes", type=int, default=200, help="Stub: number of synthetic routes")
+    parser.add_argument("--weeks", type=int, default=52, help="Stub: weeks per route")
+    parser.add_argument("--map-points", type=int, default=2_000, help="Stub: telemetry points per route")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub: fixed delay per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Stub: extra uniform random delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Stub: fraction of API requests answered with 503")
+    parser.add_argument("--stub-process", action="store_true", help="Stub: run in a child process instead of in-process")
+    parser.add_argument("--output", type=Path, default=None, help="Write the report as JSON here")
+    args = parser.parse_args(argv)
+
+    profile = LoadProfile(
+        users=args.users,
+        duration=args.duration,
+        ramp_up=args.ramp_up,
+        think_time=args.think_time,
+        interactions_per_session=args.interactions,
+        route_skew=args.route_skew,
+        week_recency=args.week_recency,
+        stay_probability=args.stay,
+        trend_resolution=args.trend_resolution,
+        frames=not args.json,
+        sequential=args.sequential,
+        shared_cache=args.shared_cache,
+        seed=args.seed,
+    )
+    if args.backend_url:
+        backend_info: Dict[str, object] = {"url": args.backend_url}
+        result = run_load_test(args.backend_url, profile, email=args.email, password=args.password)
+    else:
+        backend_info = {
+            "stub": "process" if args.stub_process else "in-process",
+            "routes": args.routes,
+            "weeks": args.weeks,
+            "map_points": args.map_points,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+        }
+        if args.stub_process:
+            process, url = spawn_stub(
+                [
+                    f"--routes={args.routes}",
+                    f"--weeks={args.weeks}",
+                    f"--map-points={args.map_points}",
+                    f"--latency={args.latency}",
+                    f"--jitter={args.jitter}",
+                    f"--error-rate={args.error_rate}",
+                ]
+            )
+            try:
+                result = run_load_test(url, profile, email=args.email, password=args.password)
+            finally:
+                process.terminate()
+                process.wait()
+        else:
+            stub = StubBackend(
+                routes=args.routes,
+                weeks=args.weeks,
+                map_points=args.map_points,
+                latency=args.latency,
+                jitter=args.jitter,
+                error_rate=args.error_rate,
+            )
+            with stub:
+                result = run_load_test(stub.base_url, profile, email=args.email, password=args.password)
+
+    print(format_report(result))
+    if args.output is not None:
+        write_report(result, args.output, backend=backend_info)
+        print(f"Wrote {args.output}")
+
+
+__all__ = [
+    "LoadProfile",
+    "LoadTestResult",
+    "Sample",
+    "SelectionModel",
+    "format_report",
+    "run_load_test",
+    "spawn_stub",
+    "summarize",
+]
+
+
+if __name__ == "__main__":
+    main()
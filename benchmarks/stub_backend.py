@@ -0,0 +1,447 @@
+"""In-process stand-in for the Express backend, for benchmarking :class:`BackendClient`.
+
+:class:`StubBackend` serves the routes the Streamlit client calls (login, route list,
+single and batch KPIs, the weekly leaderboard, trends and map telemetry) from deterministic synthetic data, with
+an optional per-request latency (and injected failure rate) so client-side concurrency
+and pooling can be measured without PostgreSQL. With ``require_auth`` the API answers
+``401`` unless the bearer token is the one last issued by login; :meth:`StubBackend.expire_token`
+rotates it to exercise client re-login. KPI payloads are computed with :func:`code.kpi_utils.summarize_kpis`
+so they have the same shape and rounding as the real service. Trend and map responses
+are sent as Arrow IPC streams when the ``Accept`` header prefers them, with the same
+columns as ``backend/services/arrowService.js``.
+
+Run it standalone to point the Streamlit app at it::
+
+    python -m benchmarks.stub_backend --port 4000 --latency 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pyarrow as pa
+
+from code.kpi_utils import TREND_RESOLUTIONS, aggregate_trend, summarize_kpis
+
+from .datagen import week_labels
+
+_KPI_PATH = re.compile(r"^/api/kpi/(?P<route>[^/]+)/(?P<week>[^/]+)$")
+_TREND_PATH = re.compile(r"^/api/kpi/(?P<route>[^/]+)/trend$")
+_MAP_PATH = re.compile(r"^/api/map/(?P<route>[^/]+)$")
+_WEEKS_PATH = re.compile(r"^/api/kpi/routes/(?P<route>[^/]+)/weeks$")
+
+LEADERBOARD_METRICS = ("sdei", "sdcui", "sii", "rpi")
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+_TREND_SCHEMA = pa.schema(
+    [
+        ("week", pa.string()),
+        ("weeks", pa.int32()),
+        ("sdei", pa.float64()),
+        ("sdcui", pa.float64()),
+        ("sii", pa.float64()),
+    ]
+)
+_TELEMETRY_SCHEMA = pa.schema(
+    [
+        ("id", pa.int32()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("event_timestamp", pa.timestamp("ms", tz="UTC")),
+    ]
+)
+
+
+def prefers_arrow(accept: Optional[str]) -> bool:
+    """Whether an ``Accept`` header ranks Arrow IPC above JSON (ties go to JSON, like Express)."""
+    quality = {"application/json": 0.0, ARROW_STREAM_TYPE: 0.0}
+    for media_range in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        for candidate in quality:
+            if media_type in (candidate, "*/*", f"{candidate.split('/')[0]}/*"):
+                quality[candidate] = max(quality[candidate], q)
+    return quality[ARROW_STREAM_TYPE] > quality["application/json"]
+
+
+def encode_arrow(rows: List[Dict[str, object]], schema: pa.Schema, metadata: Dict[str, object]) -> bytes:
+    """Serialise ``rows`` as one Arrow IPC stream with JSON-encoded schema ``metadata``."""
+    schema = schema.with_metadata({key: json.dumps(value) for key, value in metadata.items()})
+    columns = {name: [row.get(name) for row in rows] for name in schema.names}
+    if "event_timestamp" in columns:
+        columns["event_timestamp"] = np.array(
+            [stamp.rstrip("Z") for stamp in columns["event_timestamp"]], dtype="datetime64[ms]"
+        )
+    table = pa.Table.from_pydict(columns, schema=schema)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops SYNs when concurrent clients connect at once.
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class StubBackend:
+    """Threaded HTTP server with ``routes`` × ``weeks`` of synthetic KPI data."""
+
+    def __init__(
+        self,
+        *,
+        routes: int = 50,
+        weeks: int = 52,
+        map_points: int = 2_000,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        require_auth: bool = False,
+        seed: int = 7,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.route_codes = [f"R{index:05d}" for index in range(routes)]
+        self.weeks = week_labels(weeks)
+        self.map_points = map_points
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.require_auth = require_auth
+        self.seed = seed
+        self.token = "stub-token"
+        self.token_generation = 0
+        self.requests = 0
+        self.logins = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._known_routes = set(self.route_codes)
+        self._known_weeks = set(self.weeks)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubBackend":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-backend", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def __enter__(self) -> "StubBackend":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Synthetic payloads
+    # ------------------------------------------------------------------
+    def _raw(self, route_code: str, week: str) -> Dict[str, float]:
+        rng = np.random.default_rng([self.seed, int(route_code[1:]), int(week)])
+        total = float(rng.uniform(50, 500))
+        total_trips = int(rng.integers(1, 100))
+        return {
+            "available": round(float(rng.uniform(0, 1)) * total, 2),
+            "loaded": round(float(rng.uniform(0.5, 1)) * total, 2),
+            "used": round(float(rng.uniform(0, 1)) * total, 2),
+            "total": round(total, 2),
+            "avg_stop_duration": round(float(rng.gamma(2.0, 8.0)), 2),
+            "trips_over_five": int(total_trips * float(rng.uniform(0, 0.5))),
+            "total_trips": total_trips,
+            "performance_variation": round(float(rng.normal(0, 0.15)), 4),
+        }
+
+    def kpis(self, route_code: str, week: str) -> Optional[Dict[str, object]]:
+        if route_code not in self._known_routes or week not in self._known_weeks:
+            return None
+        raw = self._raw(route_code, week)
+        performance_variation = raw.pop("performance_variation")
+        kpis = summarize_kpis({**raw, "performance_variation": performance_variation})
+        return {"routeCode": route_code, "week": week, **kpis, "raw": raw}
+
+    @staticmethod
+    def _summary(route_code: str) -> Dict[str, object]:
+        return {"code": route_code, "origin": route_code[1:3], "destination": route_code[3:], "mode": "truck"}
+
+    def routes(self) -> List[Dict[str, object]]:
+        return [{**self._summary(code), "weeks": list(self.weeks)} for code in self.route_codes]
+
+    def search(self, prefix: str, cursor: Optional[str], limit: int) -> Dict[str, object]:
+        # ``route_codes`` is sorted, so a page is a slice starting at the prefix or cursor.
+        start = bisect.bisect_left(self.route_codes, prefix)
+        if cursor:
+            start = max(start, bisect.bisect_right(self.route_codes, cursor))
+        page = []
+        for code in self.route_codes[start:start + limit + 1]:
+            if not code.startswith(prefix):
+                break
+            page.append(code)
+        return {
+            "routes": [self._summary(code) for code in page[:limit]],
+            "nextCursor": page[limit - 1] if len(page) > limit else None,
+        }
+
+    def leaderboard(self, week: str, metric: str, descending: bool, limit: int) -> Dict[str, object]:
+        rows = []
+        for code in self.route_codes if week in self._known_weeks else []:
+            payload = self.kpis(code, week)
+            summary = self._summary(code)
+            rows.append(
+                {
+                    "routeCode": code,
+                    "origin": summary["origin"],
+                    "destination": summary["destination"],
+                    **{name: payload[name] for name in LEADERBOARD_METRICS},
+                }
+            )
+        # Routes without the metric go last, as in ``rankRoutesForWeek``.
+        ranked = sorted((row for row in rows if row[metric] is not None), key=lambda row: row["routeCode"])
+        ranked.sort(key=lambda row: row[metric], reverse=descending)
+        ranked += [row for row in rows if row[metric] is None]
+        return {
+            "week": week,
+            "metric": metric,
+            "order": "desc" if descending else "asc",
+            "total": len(ranked),
+            "results": [{"rank": rank, **row} for rank, row in enumerate(ranked[:limit], start=1)],
+        }
+
+    def trend(self, route_code: str, weeks: Optional[List[object]], resolution: str = "week") -> List[Dict[str, object]]:
+        if route_code not in self._known_routes:
+            return []
+        selected = [str(week) for week in weeks] if weeks else self.weeks
+        records = [{"week": week, **self._raw(route_code, week)} for week in selected if week in self._known_weeks]
+        return aggregate_trend(records, resolution)[1]
+
+    def telemetry(self, route_code: str) -> List[Dict[str, object]]:
+        rng = np.random.default_rng([self.seed, int(route_code[1:])])
+        progress = np.linspace(0, 1, self.map_points)
+        latitude = 34.05 - 0.6 * progress + np.cumsum(rng.normal(0, 0.002, self.map_points))
+        longitude = -118.24 + 6.17 * progress + np.cumsum(rng.normal(0, 0.002, self.map_points))
+        start = np.datetime64("2024-01-01T00:00:00")
+        return [
+            {
+                "id": index,
+                "latitude": float(lat),
+                "longitude": float(lon),
+                "event_timestamp": f"{start + np.timedelta64(index, 'm')}Z",
+            }
+            for index, (lat, lon) in enumerate(zip(latitude, longitude))
+        ]
+
+    # ------------------------------------------------------------------
+    # Request handling
+    # ------------------------------------------------------------------
+    def _delay(self) -> None:
+        if self.latency <= 0 and self.jitter <= 0:
+            return
+        with self._lock:
+            extra = self._random.uniform(0, self.jitter) if self.jitter > 0 else 0.0
+        time.sleep(self.latency + extra)
+
+    def expire_token(self) -> str:
+        """Issue a new login token; with ``require_auth`` the previous one is rejected from now on."""
+        with self._lock:
+            self.token_generation += 1
+            self.token = f"stub-token-{self.token_generation}"
+            return self.token
+
+    def _authorized(self, path: str, authorization: Optional[str]) -> bool:
+        if not self.require_auth or not urlsplit(path).path.startswith("/api/"):
+            return True
+        with self._lock:
+            return authorization == f"Bearer {self.token}"
+
+    def _injected_failure(self, path: str) -> bool:
+        """Whether to fail this API request with a 503; login is never failed."""
+        if self.error_rate <= 0 or not urlsplit(path).path.startswith("/api/"):
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def dispatch(self, method: str, target: str, body: object) -> Tuple[int, object]:
+        """Return ``(status, payload)`` for one request, mirroring the Express routes."""
+        parts = urlsplit(target)
+        path = parts.path
+        if method == "POST" and path == "/auth/login":
+            with self._lock:
+                self.logins += 1
+            return 200, {"token": self.token, "user": {"email": (body or {}).get("email"), "role": "analyst"}}
+        if method == "GET" and path == "/api/kpi":
+            return 200, self.routes()
+        if method == "GET" and path == "/api/kpi/routes":
+            query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+            limit = min(max(int(query.get("limit") or 50), 1), 500)
+            return 200, self.search(query.get("prefix", ""), query.get("cursor"), limit)
+        if method == "GET" and path == "/api/kpi/leaderboard":
+            query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+            metric, order = query.get("metric", "sdei"), query.get("order", "desc")
+            if not query.get("week"):
+                return 400, {"message": 'Query must contain a "week"'}
+            if metric not in LEADERBOARD_METRICS:
+                return 400, {"message": f'"metric" must be one of: {", ".join(LEADERBOARD_METRICS)}'}
+            if order not in ("asc", "desc"):
+                return 400, {"message": '"order" must be asc or desc'}
+            limit = min(max(int(query.get("limit") or 100), 1), 1000)
+            return 200, self.leaderboard(query["week"], metric, order == "desc", limit)
+        match = _WEEKS_PATH.match(path)
+        if method == "GET" and match:
+            if match["route"] not in self._known_routes:
+                return 404, {"message": "Route not found"}
+            return 200, {"code": match["route"], "weeks": list(self.weeks)}
+        if method == "POST" and path == "/api/kpi/batch":
+            pairs = (body or {}).get("pairs")
+            if not isinstance(pairs, list):
+                return 400, {"message": 'Body must contain a "pairs" array of { routeCode, week } objects'}
+            return 200, {"results": [self.kpis(str(pair.get("routeCode")), str(pair.get("week"))) for pair in pairs]}
+
+        match = _TREND_PATH.match(path)
+        if method == "POST" and match:
+            query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+            resolution = str((body or {}).get("resolution") or query.get("resolution") or "week").lower()
+            if resolution not in TREND_RESOLUTIONS:
+                return 400, {"message": f'"resolution" must be one of: {", ".join(TREND_RESOLUTIONS)}'}
+            return 200, self.trend(match["route"], (body or {}).get("weeks"), resolution)
+        match = _KPI_PATH.match(path)
+        if method == "GET" and match:
+            payload = self.kpis(match["route"], match["week"])
+            return (200, payload) if payload is not None else (404, {"message": "No KPI data found"})
+        match = _MAP_PATH.match(path)
+        if method == "GET" and match:
+            route_code = match["route"]
+            if route_code not in self._known_routes:
+                return 404, {"message": "Route not found"}
+            return 200, {"route": self._summary(route_code), "telemetry": self.telemetry(route_code)}
+        return 404, {"message": f"Unknown endpoint {method} {path}"}
+
+    @staticmethod
+    def encode(path: str, status: int, payload: object, accept: Optional[str]) -> Tuple[str, bytes]:
+        """Return ``(content_type, body)``, using Arrow for successful trend and map responses if preferred."""
+        route_path = urlsplit(path).path
+        if status == 200 and prefers_arrow(accept):
+            if _TREND_PATH.match(route_path):
+                return ARROW_STREAM_TYPE, encode_arrow(payload, _TREND_SCHEMA, {})
+            if _MAP_PATH.match(route_path):
+                metadata = {key: value for key, value in payload.items() if key != "telemetry"}
+                return ARROW_STREAM_TYPE, encode_arrow(payload["telemetry"], _TELEMETRY_SCHEMA, metadata)
+        return "application/json; charset=utf-8", json.dumps(payload).encode("utf-8")
+
+    def _handler_class(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this, delayed ACKs add ~40 ms.
+            disable_nagle_algorithm = True
+
+            def _respond(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                with backend._lock:
+                    backend.requests += 1
+                    backend.in_flight += 1
+                    backend.max_in_flight = max(backend.max_in_flight, backend.in_flight)
+                started = time.perf_counter()
+                try:
+                    backend._delay()
+                    if backend._injected_failure(self.path):
+                        status, payload = 503, {"message": "Injected failure"}
+                    elif not backend._authorized(self.path, self.headers.get("Authorization")):
+                        status, payload = 401, {"message": "Invalid or expired token"}
+                    else:
+                        status, payload = backend.dispatch(method, self.path, body)
+                finally:
+                    with backend._lock:
+                        backend.in_flight -= 1
+                content_type, encoded = backend.encode(self.path, status, payload, self.headers.get("Accept"))
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Server-Timing", f"app;dur={(time.perf_counter() - started) * 1000:.1f}")
+                self.send_header("Content-Length", str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+            def do_GET(self) -> None:  # noqa: N802 - http.server naming
+                self._respond("GET")
+
+            def do_POST(self) -> None:  # noqa: N802 - http.server naming
+                self._respond("POST")
+
+            def log_message(self, format: str, *args) -> None:  # noqa: A002 - silence per-request logging
+                return
+
+        return Handler
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve synthetic backend responses for local benchmarking.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--routes", type=int, default=50, help="Number of synthetic routes")
+    parser.add_argument("--weeks", type=int, default=52, help="Weeks per route")
+    parser.add_argument("--map-points", type=int, default=2_000, help="Telemetry points per route")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed delay per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API requests answered with 503")
+    parser.add_argument("--require-auth", action="store_true", help="Answer 401 to API requests without the login token")
+    args = parser.parse_args(argv)
+
+    backend = StubBackend(
+        routes=args.routes,
+        weeks=args.weeks,
+        map_points=args.map_points,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        require_auth=args.require_auth,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Stub backend listening on {backend.base_url}")
+    backend.serve_forever()
+
+
+__all__ = ["StubBackend", "encode_arrow", "prefers_arrow"]
+
+
+if __name__ == "__main__":
+    main()
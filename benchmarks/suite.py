@@ -0,0 +1,351 @@
+"""Benchmark suite for the KPI, payload, Parquet loading and client request paths.
+
+Each run generates (or reuses) a deterministic synthetic dataset with
+:mod:`benchmarks.datagen`, times every case a few times and writes the results as JSON
+so runs can be compared over time::
+
+    python -m benchmarks.suite --rows 1m --routes 500 --weeks 52
+    python -m benchmarks.suite --rows 1m --baseline benchmarks/results/<previous>.json --fail-threshold 0.25
+
+Per-row cases (``summarize_kpis`` and ``iter_dict_rows`` + ``prepare_orbcomm_payload``)
+only see the first ``--per-row-limit`` rows so that large scales finish in reasonable time;
+the row count each case actually processed is recorded with its timings.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import pandas as pd
+
+from code.cache_utils import DatasetCache
+from code.ingestion_utils import (
+    build_orbcomm_payloads,
+    iter_dict_rows,
+    iter_parquet_batches,
+    load_parquet,
+    prepare_orbcomm_payload,
+)
+from code.kpi_utils import summarize_kpis, summarize_kpis_columnar
+
+from .datagen import DEFAULT_OUTPUT_DIR, SCALES, GeneratorSpec, generate
+from .stub_backend import StubBackend
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "streamlit_app"))
+
+from async_client import AsyncBackendClient  # noqa: E402
+from backend_client import BackendClient  # noqa: E402
+
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parent / "results"
+GROUPS = ("kpis", "payloads", "load", "client")
+RESULT_SCHEMA_VERSION = 1
+
+
+@dataclass
+class CaseResult:
+    """Timings for one benchmark case; ``items`` is what one run processed (rows or calls)."""
+
+    name: str
+    group: str
+    items: int
+    seconds: List[float] = field(default_factory=list)
+
+    @property
+    def best(self) -> float:
+        return min(self.seconds)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.seconds)
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.best if self.best > 0 else float("inf")
+
+    def to_json(self) -> Dict[str, object]:
+        return {
+            **asdict(self),
+            "best": self.best,
+            "median": self.median,
+            "items_per_second": self.items_per_second,
+        }
+
+
+def measure(name: str, group: str, items: int, func: Callable[[], object], *, repeat: int, warmup: int = 1) -> CaseResult:
+    """Run ``func`` ``warmup`` times untimed, then ``repeat`` times timed."""
+    for _ in range(warmup):
+        func()
+    result = CaseResult(name=name, group=group, items=items)
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        result.seconds.append(time.perf_counter() - started)
+    return result
+
+
+# ----------------------------------------------------------------------
+# Cases
+# ----------------------------------------------------------------------
+def kpi_cases(frame: pd.DataFrame, *, repeat: int, per_row_limit: int) -> List[CaseResult]:
+    sample = frame.head(per_row_limit)
+    records = sample.to_dict("records")
+    return [
+        measure("summarize_kpis/scalar", "kpis", len(records), lambda: [summarize_kpis(row) for row in records], repeat=repeat),
+        measure("summarize_kpis/columnar", "kpis", len(frame), lambda: summarize_kpis_columnar(frame), repeat=repeat),
+    ]
+
+
+def payload_cases(frame: pd.DataFrame, *, repeat: int, per_row_limit: int) -> List[CaseResult]:
+    sample = frame.head(per_row_limit)
+    results = [
+        measure(
+            "payloads/iter_dict_rows+prepare_orbcomm_payload",
+            "payloads",
+            len(sample),
+            lambda: [prepare_orbcomm_payload(row) for row in iter_dict_rows(sample)],
+            repeat=repeat,
+        )
+    ]
+    for output in ("records", "arrow"):
+        results.append(
+            measure(
+                f"payloads/build_orbcomm_payloads[{output}]",
+                "payloads",
+                len(frame),
+                lambda output=output: build_orbcomm_payloads(frame, output=output),
+                repeat=repeat,
+            )
+        )
+    return results
+
+
+def load_cases(path: Path, rows: int, route_code: str, *, repeat: int) -> List[CaseResult]:
+    results = [
+        measure("load_parquet/full", "load", rows, lambda: load_parquet(path), repeat=repeat),
+        measure(
+            "load_parquet/columns",
+            "load",
+            rows,
+            lambda: load_parquet(path, columns=["route_code", "week", "available", "loaded"]),
+            repeat=repeat,
+        ),
+    ]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = DatasetCache(Path(cache_dir))
+        results.append(measure("load_parquet/cached", "load", rows, lambda: load_parquet(path, cache=cache), repeat=repeat))
+    results.append(
+        measure(
+            "iter_parquet_batches/one_route",
+            "load",
+            rows,
+            lambda: sum(len(batch) for batch in iter_parquet_batches(path, route_codes=[route_code])),
+            repeat=repeat,
+        )
+    )
+    return results
+
+
+def _async_fetch_kpis(base_url: str, token: Optional[str], pairs: Sequence[tuple]) -> list:
+    # A fresh client per run: its semaphore and session belong to one event loop.
+    async def run() -> list:
+        async with AsyncBackendClient(base_url, token=token) as client:
+            return [item async for item in client.iter_kpis(pairs)]
+
+    return asyncio.run(run())
+
+
+def client_cases(*, repeat: int, routes: int, weeks: int, latency: float, calls: int) -> List[CaseResult]:
+    with StubBackend(routes=routes, weeks=weeks, latency=latency) as backend:
+        # The shared response cache would turn every timed run after the first into a hit.
+        client = BackendClient(backend.base_url, cache=None)
+        token = client.login("bench@example.com", "bench")["token"]
+        route_codes = backend.route_codes
+        week_list = backend.weeks
+        single = [(route_codes[index % len(route_codes)], week_list[index % len(week_list)]) for index in range(calls)]
+        pairs = [(route, week) for route in route_codes for week in week_list]
+        route, week = single[0]
+
+        return [
+            measure("client/list_routes", "client", 1, client.list_routes, repeat=repeat),
+            measure("client/search_routes", "client", 1, lambda: client.search_routes("R0", limit=50), repeat=repeat),
+            measure(
+                "client/fetch_kpis",
+                "client",
+                calls,
+                lambda: [client.fetch_kpis(route_code, week_label) for route_code, week_label in single],
+                repeat=repeat,
+            ),
+            measure(
+                "client/async_iter_kpis",
+                "client",
+                calls,
+                lambda: _async_fetch_kpis(backend.base_url, token, single),
+                repeat=repeat,
+            ),
+            measure("client/fetch_kpis_many", "client", len(pairs), lambda: client.fetch_kpis_many(pairs), repeat=repeat),
+            measure("client/fetch_trend", "client", 1, lambda: client.fetch_trend(route, week_list), repeat=repeat),
+            measure("client/fetch_map", "client", 1, lambda: client.fetch_map(route), repeat=repeat),
+            measure("client/fetch_map[zoom=5]", "client", 1, lambda: client.fetch_map(route, zoom=5, max_points=500), repeat=repeat),
+            measure(
+                "client/fetch_dashboard",
+                "client",
+                1,
+                lambda: client.fetch_dashboard(route, week, week_list),
+                repeat=repeat,
+            ),
+        ]
+
+
+# ----------------------------------------------------------------------
+# Result storage and comparison
+# ----------------------------------------------------------------------
+def _git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def write_results(results: Sequence[CaseResult], params: Mapping[str, object], output_dir: Path) -> Path:
+    """Write ``results`` with run metadata to a timestamped JSON file in ``output_dir``."""
+    created_at = datetime.now(timezone.utc)
+    document = {
+        "schema": RESULT_SCHEMA_VERSION,
+        "created_at": created_at.isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": dict(params),
+        "results": [result.to_json() for result in results],
+    }
+    output_dir.mkdir(parents=True, exist_ok=True)
+    destination = output_dir / f"{created_at:%Y%m%dT%H%M%SZ}-{params.get('rows')}.json"
+    destination.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    return destination
+
+
+def compare_results(baseline: Mapping[str, object], current: Iterable[CaseResult]) -> List[Dict[str, object]]:
+    """Pair cases by name and return the relative change in best throughput.
+
+    ``change`` is positive when the current run is slower. Cases are compared on items per
+    second, so runs at different scales remain comparable.
+    """
+    previous = {entry["name"]: entry for entry in baseline.get("results", [])}
+    rows = []
+    for result in current:
+        entry = previous.get(result.name)
+        if entry is None or not entry.get("items_per_second"):
+            continue
+        change = entry["items_per_second"] / result.items_per_second - 1 if result.items_per_second else float("inf")
+        rows.append({"name": result.name, "baseline": entry["items_per_second"], "current": result.items_per_second, "change": change})
+    return rows
+
+
+def format_results(results: Sequence[CaseResult]) -> str:
+    lines = [f"{'case':<52}{'items':>12}{'best s':>10}{'median s':>10}{'items/s':>14}"]
+    for result in results:
+        lines.append(
+            f"{result.name[:51]:<52}{result.items:>12,}{result.best:>10.4f}{result.median:>10.4f}"
+            f"{result.items_per_second:>14,.0f}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: Sequence[Mapping[str, object]]) -> str:
+    lines = [f"{'case':<52}{'baseline/s':>14}{'current/s':>14}{'slower by':>11}"]
+    for row in rows:
+        lines.append(f"{row['name'][:51]:<52}{row['baseline']:>14,.0f}{row['current']:>14,.0f}{row['change']:>10.1%}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and store the results as JSON.")
+    parser.add_argument("--rows", default="100k", help=f"Synthetic row count or one of {', '.join(SCALES)}")
+    parser.add_argument("--routes", type=int, default=500, help="Number of synthetic routes")
+    parser.add_argument("--weeks", type=int, default=52, help="Weeks per route")
+    parser.add_argument("--seed", type=int, default=7, help="Generator seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case")
+    parser.add_argument("--per-row-limit", type=int, default=100_000, help="Rows fed to the per-row cases")
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS), help="Case groups to run")
+    parser.add_argument("--client-routes", type=int, default=20, help="Routes served by the stub backend")
+    parser.add_argument("--client-calls", type=int, default=50, help="Sequential fetch_kpis calls per run")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub backend latency per request in seconds")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_OUTPUT_DIR, help="Where generated datasets are kept")
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_RESULTS_DIR, help="Where result JSON is written")
+    parser.add_argument("--baseline", type=Path, default=None, help="Previous result JSON to compare against")
+    parser.add_argument("--fail-threshold", type=float, default=None, help="Exit 1 if any case is slower by more than this fraction")
+    args = parser.parse_args(argv)
+
+    rows = SCALES.get(str(args.rows).lower()) or int(args.rows)
+    spec = GeneratorSpec(rows=rows, routes=args.routes, weeks=args.weeks, seed=args.seed)
+    results: List[CaseResult] = []
+
+    if {"kpis", "payloads", "load"} & set(args.groups):
+        dataset = generate(spec, args.data_dir)
+        if {"kpis", "payloads"} & set(args.groups):
+            frame = load_parquet(dataset.county_pair_moves)
+            if "kpis" in args.groups:
+                results.extend(kpi_cases(frame, repeat=args.repeat, per_row_limit=args.per_row_limit))
+            if "payloads" in args.groups:
+                results.extend(payload_cases(frame, repeat=args.repeat, per_row_limit=args.per_row_limit))
+            del frame
+        if "load" in args.groups:
+            first_route = load_parquet(dataset.county_pair_moves, columns=["route_code"]).iloc[0, 0]
+            results.extend(load_cases(dataset.county_pair_moves, rows, first_route, repeat=args.repeat))
+    if "client" in args.groups:
+        results.extend(
+            client_cases(
+                repeat=args.repeat,
+                routes=args.client_routes,
+                weeks=args.weeks,
+                latency=args.latency,
+                calls=args.client_calls,
+            )
+        )
+
+    print(format_results(results))
+    params = {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()}
+    params["rows"] = rows
+    destination = write_results(results, params, args.output_dir)
+    print(f"\nWrote {destination}")
+
+    if args.baseline is not None:
+        comparison = compare_results(json.loads(args.baseline.read_text(encoding="utf-8")), results)
+        print()
+        print(format_comparison(comparison))
+        if args.fail_threshold is not None:
+            regressions = [row for row in comparison if row["change"] > args.fail_threshold]
+            if regressions:
+                print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.fail_threshold:.0%}")
+                return 1
+    return 0
+
+
+__all__ = [
+    "CaseResult",
+    "compare_results",
+    "measure",
+    "write_results",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
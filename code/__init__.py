@@ -11,18 +11,50 @@ from .kpi_utils import (
     calculate_sii,
     calculate_rpi,
     summarize_kpis,
+    calculate_sdei_array,
+    calculate_sdcui_array,
+    calculate_sii_array,
+    calculate_rpi_array,
+    summarize_kpis_columnar,
+    TREND_RESOLUTIONS,
+    aggregate_trend,
+    pool_kpi_inputs,
+    trend_period,
 )
+from .cache_utils import DatasetCache
 from .ingestion_utils import (
     DatasetPaths,
     ResolvedDatasetPaths,
     DEFAULT_DATA_DIR,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CACHE_DIR,
+    default_dataset_cache,
+    normalize_week,
+    week_label,
+    week_sort_key,
     load_parquet,
+    compact_frame,
+    compaction_report,
+    iter_parquet_batches,
     iter_dict_rows,
     load_county_pair_moves,
     load_transearch_sample,
     prepare_orbcomm_payload,
     prepare_transearch_payload,
+    build_orbcomm_payloads,
+    build_transearch_payloads,
+    iter_payload_batches,
+    PartitionedWrite,
+    partition_files,
+    write_partitioned_dataset,
 )
+from .kpi_cube import KpiCube, build_kpi_cube
+from .parallel_ingestion import ingest_datasets, ingest_files
+from .incremental_ingestion import IncrementalIngestor
+from .pg_bulk_loader import BulkLoadStats, PostgresBulkLoader
+from .rolling_kpis import QuantileSketch, RollingKpiEngine
+from .duckdb_engine import DuckDbKpiEngine
+from .spatial_index import SpatialIndex, build_spatial_index, route_summary
 
 __all__ = [
     "calculate_sdei",
@@ -30,13 +62,51 @@ __all__ = [
     "calculate_sii",
     "calculate_rpi",
     "summarize_kpis",
+    "calculate_sdei_array",
+    "calculate_sdcui_array",
+    "calculate_sii_array",
+    "calculate_rpi_array",
+    "summarize_kpis_columnar",
+    "TREND_RESOLUTIONS",
+    "aggregate_trend",
+    "pool_kpi_inputs",
+    "trend_period",
     "DatasetPaths",
     "ResolvedDatasetPaths",
     "DEFAULT_DATA_DIR",
+    "DEFAULT_BATCH_SIZE",
+    "DEFAULT_CACHE_DIR",
+    "default_dataset_cache",
+    "normalize_week",
+    "week_label",
+    "week_sort_key",
+    "DatasetCache",
     "load_parquet",
+    "compact_frame",
+    "compaction_report",
+    "iter_parquet_batches",
     "iter_dict_rows",
     "load_county_pair_moves",
     "load_transearch_sample",
     "prepare_orbcomm_payload",
     "prepare_transearch_payload",
+    "build_orbcomm_payloads",
+    "build_transearch_payloads",
+    "iter_payload_batches",
+    "PartitionedWrite",
+    "partition_files",
+    "write_partitioned_dataset",
+    "KpiCube",
+    "build_kpi_cube",
+    "ingest_datasets",
+    "ingest_files",
+    "IncrementalIngestor",
+    "BulkLoadStats",
+    "PostgresBulkLoader",
+    "QuantileSketch",
+    "RollingKpiEngine",
+    "DuckDbKpiEngine",
+    "SpatialIndex",
+    "build_spatial_index",
+    "route_summary",
 ]
@@ -0,0 +1,224 @@
+"""Local columnar cache for decoded datasets.
+
+Decoding Parquet (decompression, dictionary expansion, type conversion) dominates the
+cost of repeated loads in notebooks and the Streamlit process. :class:`DatasetCache`
+keeps an uncompressed Arrow IPC copy of each decoded source file and memory-maps it on
+subsequent loads, so a warm read is close to zero-copy.
+
+Entries are plain files named ``<source id>-<fingerprint>.arrow``; the directory itself
+is the index, which keeps the cache safe to share between processes. A source's entry
+is invalidated as soon as its size, modification time or sampled content hash changes,
+and the least recently used entries are evicted once the cache exceeds ``max_bytes``.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import pyarrow as pa
+
+DEFAULT_CACHE_MAX_BYTES = 4 * 1024 ** 3
+_HASH_HEAD_BYTES = 64 * 1024
+_HASH_TAIL_BYTES = 1024 * 1024
+_SUFFIX = ".arrow"
+
+
+@dataclass(frozen=True)
+class SourceFingerprint:
+    """Identity of a source file used to key cache entries."""
+
+    path: Path
+    size: int
+    mtime_ns: int
+    content_hash: str
+
+    @property
+    def source_id(self) -> str:
+        return hashlib.blake2b(str(self.path).encode("utf-8"), digest_size=8).hexdigest()
+
+    @property
+    def key(self) -> str:
+        digest = hashlib.blake2b(
+            f"{self.size}:{self.mtime_ns}:{self.content_hash}".encode("utf-8"),
+            digest_size=8,
+        ).hexdigest()
+        return f"{self.source_id}-{digest}"
+
+
+def fingerprint_file(path: Path, *, full_hash: bool = False) -> SourceFingerprint:
+    """Fingerprint ``path`` from its size, mtime and a content hash.
+
+    By default only the head and the tail of the file are hashed. For Parquet the tail
+    holds the footer with per-row-group statistics, so rewrites are detected without
+    reading the whole extract. Pass ``full_hash=True`` to hash every byte.
+    """
+    resolved = Path(path).resolve()
+    stat = resolved.stat()
+    hasher = hashlib.blake2b(digest_size=16)
+    with resolved.open("rb") as handle:
+        if full_hash or stat.st_size <= _HASH_HEAD_BYTES + _HASH_TAIL_BYTES:
+            for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        else:
+            hasher.update(handle.read(_HASH_HEAD_BYTES))
+            handle.seek(-_HASH_TAIL_BYTES, os.SEEK_END)
+            hasher.update(handle.read(_HASH_TAIL_BYTES))
+
+    return SourceFingerprint(
+        path=resolved,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        content_hash=hasher.hexdigest(),
+    )
+
+
+class DatasetCache:
+    """Size-capped, LRU-evicted store of memory-mapped Arrow IPC files."""
+
+    def __init__(self, cache_dir: Path, *, max_bytes: int = DEFAULT_CACHE_MAX_BYTES, full_hash: bool = False) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.full_hash = full_hash
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Lookup helpers
+    # ------------------------------------------------------------------
+    def _entry_path(self, fingerprint: SourceFingerprint) -> Path:
+        return self.cache_dir / f"{fingerprint.key}{_SUFFIX}"
+
+    def _entries(self) -> List[Path]:
+        if not self.cache_dir.exists():
+            return []
+        return [path for path in self.cache_dir.iterdir() if path.suffix == _SUFFIX]
+
+    def _remove(self, path: Path) -> bool:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return False
+        except OSError:
+            # The file may still be memory-mapped by another reader (Windows); skip it.
+            return False
+        return True
+
+    def _invalidate_stale(self, fingerprint: SourceFingerprint) -> None:
+        current = self._entry_path(fingerprint)
+        prefix = f"{fingerprint.source_id}-"
+        for path in self._entries():
+            if path.name.startswith(prefix) and path != current:
+                self._remove(path)
+
+    def _read_entry(self, entry: Path) -> Optional[pa.Table]:
+        try:
+            table = pa.ipc.open_file(pa.memory_map(str(entry), "r")).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        try:
+            # Entry mtimes double as the LRU clock.
+            os.utime(entry)
+        except OSError:
+            pass
+        return table
+
+    def get(self, source: Path) -> Optional[pa.Table]:
+        """Return the cached table for ``source`` or ``None`` when missing or stale."""
+        fingerprint = fingerprint_file(source, full_hash=self.full_hash)
+        table = self._read_entry(self._entry_path(fingerprint))
+        with self._lock:
+            if table is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if table is None:
+            self._invalidate_stale(fingerprint)
+        return table
+
+    # ------------------------------------------------------------------
+    # Population and eviction
+    # ------------------------------------------------------------------
+    def put(self, source: Path, table: pa.Table) -> Path:
+        """Write ``table`` as the cache entry for ``source`` and enforce the size cap."""
+        fingerprint = fingerprint_file(source, full_hash=self.full_hash)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = self._entry_path(fingerprint)
+
+        handle, temp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(handle)
+        try:
+            with pa.OSFile(temp_name, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(temp_name, entry)
+        finally:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+
+        self._invalidate_stale(fingerprint)
+        self.evict(keep=entry)
+        return entry
+
+    def evict(self, *, keep: Optional[Path] = None) -> int:
+        """Delete least recently used entries until the cache fits ``max_bytes``."""
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            if self._remove(path):
+                total -= size
+                removed += 1
+
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def load(self, source: Path, reader: Callable[[Path], pa.Table]) -> pa.Table:
+        """Return the cached table for ``source``, decoding it with ``reader`` on a miss."""
+        table = self.get(source)
+        if table is not None:
+            return table
+
+        entry = self.put(source, reader(Path(source)))
+        cached = self._read_entry(entry)
+        if cached is None:
+            raise RuntimeError(f"Failed to populate cache entry for {source}")
+        return cached
+
+    def clear(self) -> None:
+        for path in self._entries():
+            self._remove(path)
+
+    def size_bytes(self) -> int:
+        total = 0
+        for path in self._entries():
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                continue
+        return total
+
+
+__all__ = [
+    "DEFAULT_CACHE_MAX_BYTES",
+    "DatasetCache",
+    "SourceFingerprint",
+    "fingerprint_file",
+]
@@ -0,0 +1,352 @@
+"""KPI and trend queries straight from the Parquet extracts with DuckDB.
+
+Answering a KPI question through the backend means loading every file into PostgreSQL
+first. :class:`DuckDbKpiEngine` runs the same lookups in an embedded DuckDB connection
+directly against the files resolved by :class:`~code.ingestion_utils.DatasetPaths`::
+
+    engine = DuckDbKpiEngine(data_dir=Path("data"))
+    engine.lookup("06037-04019", "202401")     # same shape as calculateKPIs
+    engine.trend("06037-04019")                # same shape as fetchKpiTrend
+    engine.sql("SELECT mode, count(*) FROM orbcomm GROUP BY mode")
+
+Each file is scanned separately. Only the raw KPI columns are projected, and the
+``route_code``/``week`` filters are pushed into the Parquet reader, so row groups whose
+statistics exclude them are never decoded. Column aliases (``routeCode``,
+``avgStopDuration``, ...) resolve the same way as in the payload builders. Duplicate
+(route, week) rows keep the last one in file order, as the backend upsert does.
+Transearch RPI is joined on ``(route_code, week)``. KPI values come from
+:func:`~code.kpi_utils.summarize_kpis_columnar`, so rounding matches the service.
+
+DuckDB is optional; importing this module works without it, but creating an engine
+raises :class:`ImportError`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .ingestion_utils import (
+    ORBCOMM_OPTIONAL_PAYLOAD_FIELDS,
+    ORBCOMM_PAYLOAD_FIELDS,
+    TRANSEARCH_PAYLOAD_FIELDS,
+    DatasetPaths,
+    FieldSpec,
+    _filter_candidates,
+    _value_type,
+    normalize_week,
+)
+from .kpi_utils import Precision, summarize_kpis_columnar
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - optional dependency
+    duckdb = None
+
+KPI_COLUMNS = ("sdei", "sdcui", "sii", "rpi")
+RAW_COLUMNS = ("available", "loaded", "used", "total", "avg_stop_duration", "trips_over_five", "total_trips")
+
+_ORBCOMM_FIELDS = tuple(spec for spec in ORBCOMM_PAYLOAD_FIELDS if spec[0] in ("route_code", "week") + RAW_COLUMNS)
+_TRANSEARCH_FIELDS = TRANSEARCH_PAYLOAD_FIELDS
+
+
+# ----------------------------------------------------------------------
+# SQL helpers
+# ----------------------------------------------------------------------
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _is_text(arrow_type: pa.DataType) -> bool:
+    arrow_type = _value_type(arrow_type)
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+def _truthy_sql(column: str, arrow_type: pa.DataType) -> str:
+    # Python truthiness: non-null, and neither ``0`` nor ``""``.
+    if _is_text(arrow_type):
+        return f"({column} IS NOT NULL AND {column} <> '')"
+    arrow_type = _value_type(arrow_type)
+    if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+        return f"({column} IS NOT NULL AND {column} <> 0)"
+    if pa.types.is_boolean(arrow_type):
+        return f"coalesce({column}, false)"
+    return f"({column} IS NOT NULL)"
+
+
+def _field_sql(schema: pa.Schema, aliases: Sequence[str]) -> Tuple[str, Optional[str]]:
+    """SQL for ``row.get(a) or row.get(b) ...`` plus the one column it reads, if only one exists.
+
+    A filter on that column is equivalent to a filter on the expression for any truthy
+    value and, unlike the ``CASE`` expression, can be pushed into the Parquet scan.
+    """
+    present = [alias for alias in aliases if alias in schema.names]
+    expression = _quote(aliases[-1]) if aliases[-1] in present else "NULL"
+    for alias in reversed(aliases[:-1]):
+        if alias in present:
+            column = _quote(alias)
+            expression = f"CASE WHEN {_truthy_sql(column, schema.field(alias).type)} THEN {column} ELSE {expression} END"
+    return expression, present[0] if len(present) == 1 else None
+
+
+def _week_sql(column: str, arrow_type: Optional[pa.DataType]) -> Tuple[str, str]:
+    """``(label, key)`` expressions mirroring :func:`week_label` and :func:`normalize_week`."""
+    if arrow_type is None:
+        return column, column
+    arrow_type = _value_type(arrow_type)
+    if pa.types.is_integer(arrow_type):
+        label = f"CAST({column} AS VARCHAR)"
+        return label, label
+    if pa.types.is_floating(arrow_type):
+        label = (
+            f"CASE WHEN isfinite({column}) AND {column} = trunc({column}) "
+            f"THEN CAST(CAST({column} AS BIGINT) AS VARCHAR) ELSE CAST({column} AS VARCHAR) END"
+        )
+        return label, label
+    label = f"CAST({column} AS VARCHAR)"
+    number = f"TRY_CAST(trim({label}) AS DOUBLE)"
+    key = (
+        f"CASE WHEN isfinite({number}) AND {number} = trunc({number}) "
+        f"THEN CAST(CAST({number} AS BIGINT) AS VARCHAR) ELSE trim({label}) END"
+    )
+    return label, key
+
+
+def _in_sql(column: str, values: Sequence[object], params: List[object]) -> str:
+    if not values:
+        return "false"
+    params.extend(values)
+    return f"{column} IN ({', '.join('?' for _ in values)})"
+
+
+# ----------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------
+class DuckDbKpiEngine:
+    """Ad-hoc KPI queries over the local Parquet files without loading them anywhere."""
+
+    def __init__(
+        self,
+        paths: Optional[DatasetPaths] = None,
+        *,
+        data_dir: Optional[Path] = None,
+        precision: Precision = 4,
+        threads: Optional[int] = None,
+    ) -> None:
+        if duckdb is None:
+            raise ImportError("DuckDbKpiEngine requires the 'duckdb' package (pip install duckdb)")
+        resolved = (paths or DatasetPaths()).resolve(base_dir=data_dir)
+        self.orbcomm_files = tuple(path for path in resolved.county_pair_files if path.exists())
+        if not self.orbcomm_files:
+            raise FileNotFoundError(f"Data file not found: {resolved.county_pair_moves}")
+        self.transearch_files = tuple(path for path in resolved.transearch_files if path.exists())
+        self.precision = precision
+        self._schemas: Dict[Path, pa.Schema] = {}
+        self._connection = duckdb.connect(config={"threads": threads} if threads else {})
+        self._lock = threading.Lock()
+        self._views_ready = False
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "DuckDbKpiEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _schema(self, path: Path) -> pa.Schema:
+        schema = self._schemas.get(path)
+        if schema is None:
+            schema = self._schemas[path] = pq.read_schema(path)
+        return schema
+
+    def _execute(self, query: str, params: Sequence[object] = ()) -> pd.DataFrame:
+        # A cursor per call lets Streamlit threads share one engine.
+        with self._lock:
+            cursor = self._connection.cursor()
+        try:
+            return cursor.execute(query, list(params)).df()
+        finally:
+            cursor.close()
+
+    # ------------------------------------------------------------------
+    # Query construction
+    # ------------------------------------------------------------------
+    def _file_sql(
+        self,
+        file_index: int,
+        path: Path,
+        fields: Sequence[FieldSpec],
+        params: List[object],
+        *,
+        route_codes: Optional[Sequence[object]] = None,
+        weeks: Optional[Sequence[object]] = None,
+    ) -> str:
+        """Normalised rows of one file with the filters applied inside its scan."""
+        schema = self._schema(path)
+        columns = []
+        conditions = []
+        for name, aliases in fields:
+            expression, source = _field_sql(schema, aliases)
+            source_type = schema.field(source).type if source is not None else None
+            if name == "week":
+                label, key = _week_sql(expression, source_type)
+                columns.extend([f"{label} AS week", f"{key} AS week_key"])
+                if weeks is not None and source is not None:
+                    candidates = _filter_candidates(weeks, source_type, week=True)
+                    conditions.append(_in_sql(_quote(source), candidates, params))
+                elif weeks is not None:
+                    conditions.append("false")
+                continue
+            columns.append(f"{expression} AS {name}")
+            if name == "route_code" and route_codes is not None:
+                if source is None:
+                    conditions.append(_in_sql(expression, [str(code) for code in route_codes], params))
+                else:
+                    conditions.append(_in_sql(_quote(source), _filter_candidates(route_codes, source_type), params))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        literal = "'" + str(path).replace("'", "''") + "'"
+        return (
+            f"SELECT {', '.join(columns)}, {file_index} AS file_index, file_row_number "
+            f"FROM read_parquet({literal}, file_row_number = true){where}"
+        )
+
+    def _dataset_sql(self, files: Sequence[Path], fields: Sequence[FieldSpec], params: List[object], **filters) -> str:
+        """Union of ``files`` keeping the last row per (route, week), as the backend upsert does."""
+        union = "\nUNION ALL BY NAME\n".join(
+            self._file_sql(file_index, path, fields, params, **filters) for file_index, path in enumerate(files)
+        )
+        return (
+            f"SELECT * EXCLUDE (file_index, file_row_number) FROM ({union}) "
+            "WHERE route_code IS NOT NULL AND week IS NOT NULL "
+            "QUALIFY row_number() OVER (PARTITION BY route_code, week_key ORDER BY file_index DESC, file_row_number DESC) = 1"
+        )
+
+    def _kpi_sql(self, route_codes: Optional[Sequence[object]], weeks: Optional[Sequence[object]]) -> Tuple[str, List[object]]:
+        params: List[object] = []
+        orbcomm = self._dataset_sql(self.orbcomm_files, _ORBCOMM_FIELDS, params, route_codes=route_codes, weeks=weeks)
+        raw = ", ".join(f"o.{name}" for name in RAW_COLUMNS)
+        if self.transearch_files:
+            transearch = self._dataset_sql(self.transearch_files, _TRANSEARCH_FIELDS, params, route_codes=route_codes, weeks=weeks)
+            query = (
+                f"SELECT o.route_code, o.week, o.week_key, {raw}, t.performance_variation "
+                f"FROM ({orbcomm}) o LEFT JOIN ({transearch}) t "
+                "ON o.route_code = t.route_code AND o.week_key = t.week_key"
+            )
+        else:
+            query = f"SELECT o.route_code, o.week, o.week_key, {raw}, NULL::DOUBLE AS performance_variation FROM ({orbcomm}) o"
+        return query + " ORDER BY o.route_code, o.week", params
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def kpi_frame(
+        self,
+        route_codes: Optional[Iterable[object]] = None,
+        weeks: Optional[Iterable[object]] = None,
+    ) -> pd.DataFrame:
+        """Every matching route-week with its raw inputs and KPIs, sorted by route and week."""
+        route_codes = list(route_codes) if route_codes is not None else None
+        weeks = list(weeks) if weeks is not None else None
+        frame = self._execute(*self._kpi_sql(route_codes, weeks))
+        kpis = summarize_kpis_columnar(frame, precision=self.precision)
+        return frame.assign(**kpis)
+
+    def lookup(self, route_code: str, week: object) -> Optional[Mapping[str, object]]:
+        """Return KPIs for one route-week in the shape of the backend's ``calculateKPIs``."""
+        frame = self.kpi_frame([route_code], [week])
+        if frame.empty:
+            return None
+        row = _records(frame.tail(1))[0]
+        return {
+            "routeCode": route_code,
+            "week": week,
+            **{name: row[name] for name in KPI_COLUMNS},
+            "raw": {name: row[name] for name in RAW_COLUMNS},
+        }
+
+    def lookup_many(self, pairs: Iterable[Tuple[str, object]]) -> List[Optional[Mapping[str, object]]]:
+        """Batch form of :meth:`lookup` answered by one query, like ``calculateKPIsBatch``."""
+        pairs = list(pairs)
+        if not pairs:
+            return []
+        frame = self.kpi_frame({code for code, _ in pairs}, {week for _, week in pairs})
+        rows = {(row["route_code"], row["week_key"]): row for row in _records(frame)}
+        results: List[Optional[Mapping[str, object]]] = []
+        for route_code, week in pairs:
+            row = rows.get((route_code, normalize_week(week)))
+            results.append(None if row is None else {
+                "routeCode": route_code,
+                "week": week,
+                **{name: row[name] for name in KPI_COLUMNS},
+                "raw": {name: row[name] for name in RAW_COLUMNS},
+            })
+        return results
+
+    def trend(self, route_code: str, weeks: Optional[Iterable[object]] = None) -> List[Mapping[str, object]]:
+        """Return the KPI series for a route in the shape of ``fetchKpiTrend``."""
+        weeks = list(weeks) if weeks else None
+        frame = self.kpi_frame([route_code], weeks)
+        return [
+            {"week": row["week"], "sdei": row["sdei"], "sdcui": row["sdcui"], "sii": row["sii"]}
+            for row in _records(frame)
+        ]
+
+    def sql(self, query: str, params: Sequence[object] = ()) -> pd.DataFrame:
+        """Run ad-hoc SQL with ``orbcomm`` and ``transearch`` views over the deduplicated files."""
+        with self._lock:
+            if not self._views_ready:
+                views = [("orbcomm", self.orbcomm_files, ORBCOMM_PAYLOAD_FIELDS + ORBCOMM_OPTIONAL_PAYLOAD_FIELDS)]
+                if self.transearch_files:
+                    views.append(("transearch", self.transearch_files, _TRANSEARCH_FIELDS))
+                for name, files, fields in views:
+                    self._connection.execute(f"CREATE OR REPLACE VIEW {name} AS {self._dataset_sql(files, fields, [])}")
+                self._views_ready = True
+        return self._execute(query, params)
+
+
+def _records(frame: pd.DataFrame) -> List[Dict[str, object]]:
+    # ``NaN`` becomes ``None`` so payloads serialise like the backend's ``null``.
+    cleaned = frame.astype(object).where(frame.notna(), None)
+    return cleaned.to_dict("records")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query KPIs directly from the local Parquet files.")
+    parser.add_argument("route", nargs="?", help="Route code for a KPI lookup or trend")
+    parser.add_argument("--week", action="append", default=None, help="Week to look up (repeat for a trend subset)")
+    parser.add_argument("--sql", default=None, help="Ad-hoc SQL over the orbcomm and transearch views")
+    parser.add_argument("--data-dir", type=Path, default=None, help="Base directory for patterns and files")
+    parser.add_argument("--county-pair-glob", default=None, help="Glob for county pair files")
+    parser.add_argument("--transearch-glob", default=None, help="Glob for Transearch files")
+    parser.add_argument("--manifest", type=Path, default=None, help="JSON manifest listing files per dataset")
+    args = parser.parse_args(argv)
+    if args.route is None and args.sql is None:
+        parser.error("give a route code or --sql")
+
+    paths = DatasetPaths(
+        county_pair_glob=args.county_pair_glob,
+        transearch_glob=args.transearch_glob,
+        manifest=args.manifest,
+    )
+    with DuckDbKpiEngine(paths, data_dir=args.data_dir) as engine:
+        if args.sql is not None:
+            print(engine.sql(args.sql).to_string(index=False))
+        elif args.week and len(args.week) == 1:
+            print(json.dumps(engine.lookup(args.route, args.week[0]), indent=2))
+        else:
+            print(json.dumps(engine.trend(args.route, args.week), indent=2))
+
+
+__all__ = ["DuckDbKpiEngine"]
+
+
+if __name__ == "__main__":
+    main()
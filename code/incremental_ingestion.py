@@ -0,0 +1,460 @@
+"""Incremental, watermark-based ingestion of county-pair and Transearch extracts.
+
+A full reload re-reads every row of every file and re-upserts it, even when only one new
+week arrived. :class:`IncrementalIngestor` instead keeps a small state directory with
+
+* a manifest of processed files (size, mtime) and a fingerprint per Parquet row group,
+* the maximum ``week`` and ``event_timestamp`` seen for each route (the watermarks), and
+* a hash of every normalised ``(route_code, week)`` payload row, with the file and row
+  group that last supplied it.
+
+Files whose size and mtime are unchanged are skipped without being opened. Otherwise only
+row groups whose fingerprint (row count, per-column statistics and compressed bytes) is new
+are decoded, and of their rows only the route-weeks that are new or whose payload changed
+are emitted. A changed row is not emitted while a later file still holds the same
+route-week, so an edit to an older file cannot override a newer one. Rows deleted from the
+source are not detected; run a full load for that.
+
+Scanning does not touch the state; call :meth:`IncrementalIngestor.commit` once the delta
+has been loaded so a failed load is simply retried::
+
+    python -m code.incremental_ingestion --county-pair-glob "county_pair_*.parquet" --output data/delta/county.parquet
+
+The delta file can be upserted by the backend with
+``POST /api/ingestion/load {"files": {"countyPairMoves": "delta/county.parquet"}}``.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .ingestion_utils import (
+    DEFAULT_DATA_DIR,
+    DatasetPaths,
+    build_orbcomm_payloads,
+    build_transearch_payloads,
+    normalize_week,
+    week_label,
+    week_sort_key,
+)
+
+DEFAULT_STATE_DIR = DEFAULT_DATA_DIR / ".ingestion_state"
+MANIFEST_VERSION = 1
+
+_BUILDERS = {
+    "orbcomm": build_orbcomm_payloads,
+    "transearch": build_transearch_payloads,
+}
+_ROUTE_COLUMNS = ("route_code", "routeCode")
+# The file and row-group fingerprint that last supplied each route-week.
+_SOURCE_COLUMNS = ("source_file", "source_row_group")
+_HASH_COLUMNS = ("route_code", "week_key", "row_hash", *_SOURCE_COLUMNS)
+_WEEK_COLUMNS = ("week",)
+
+Watermark = Dict[str, Optional[str]]
+
+
+def row_group_fingerprint(metadata: pq.FileMetaData, index: int, handle=None) -> str:
+    """Fingerprint one row group from its footer metadata.
+
+    Row count, per-column statistics and compressed sizes come from the footer and are
+    free to read. When an open binary ``handle`` is given the compressed column chunks are
+    hashed as well, which catches edits that leave the statistics untouched while still
+    avoiding decompression and decoding.
+    """
+    row_group = metadata.row_group(index)
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(f"{row_group.num_rows}:{row_group.total_byte_size}".encode("utf-8"))
+    for position in range(row_group.num_columns):
+        column = row_group.column(position)
+        parts: List[object] = [column.path_in_schema, column.total_compressed_size]
+        statistics = column.statistics
+        if statistics is not None:
+            parts.append(statistics.null_count)
+            if statistics.has_min_max:
+                parts.extend([statistics.min, statistics.max])
+        hasher.update(repr(parts).encode("utf-8"))
+
+        if handle is not None:
+            start = column.data_page_offset
+            if column.has_dictionary_page and column.dictionary_page_offset:
+                start = min(start, column.dictionary_page_offset)
+            handle.seek(start)
+            hasher.update(handle.read(column.total_compressed_size))
+    return hasher.hexdigest()
+
+
+def _column_statistics(row_group: pq.RowGroupMetaData, names: Sequence[str]):
+    for position in range(row_group.num_columns):
+        column = row_group.column(position)
+        if column.path_in_schema in names:
+            statistics = column.statistics
+            if statistics is not None and statistics.has_min_max:
+                return statistics
+            return None
+    return None
+
+
+def _below_watermark(row_group: pq.RowGroupMetaData, watermarks: Mapping[str, Watermark]) -> bool:
+    """True when the row group holds a single route and no week past its watermark."""
+    routes = _column_statistics(row_group, _ROUTE_COLUMNS)
+    weeks = _column_statistics(row_group, _WEEK_COLUMNS)
+    if routes is None or weeks is None or routes.min != routes.max:
+        return False
+    route_code = routes.min.decode("utf-8") if isinstance(routes.min, bytes) else str(routes.min)
+    watermark = watermarks.get(route_code, {}).get("week")
+    if watermark is None:
+        return False
+    latest = weeks.max.decode("utf-8") if isinstance(weeks.max, bytes) else weeks.max
+    return week_sort_key(normalize_week(latest)) <= week_sort_key(watermark)
+
+
+@dataclass
+class IngestionManifest:
+    """Processed files, row-group fingerprints and per-route watermarks."""
+
+    kind: str
+    files: Dict[str, Dict[str, object]] = field(default_factory=dict)
+    watermarks: Dict[str, Watermark] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path, kind: str) -> "IngestionManifest":
+        if not path.exists():
+            return cls(kind=kind)
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        if payload.get("version") != MANIFEST_VERSION or payload.get("kind") != kind:
+            raise ValueError(f"Incompatible ingestion manifest at {path}; delete it to start over")
+        return cls(kind=kind, files=payload.get("files", {}), watermarks=payload.get("watermarks", {}))
+
+    def save(self, path: Path) -> None:
+        payload = {"version": MANIFEST_VERSION, "kind": self.kind, "files": self.files, "watermarks": self.watermarks}
+        temporary = path.with_suffix(path.suffix + ".tmp")
+        temporary.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(temporary, path)
+
+
+@dataclass
+class IncrementalBatch:
+    """New or changed payload rows from one scan, plus what was skipped to get them."""
+
+    frame: pd.DataFrame
+    files_scanned: int = 0
+    files_skipped: int = 0
+    row_groups_read: int = 0
+    row_groups_skipped: int = 0
+    rows_read: int = 0
+    rows_unchanged: int = 0
+    seconds: float = 0.0
+    watermarks: Dict[str, Watermark] = field(default_factory=dict)
+    _manifest: Optional[IngestionManifest] = field(default=None, repr=False)
+    _hashes: Optional[pd.DataFrame] = field(default=None, repr=False)
+
+    @property
+    def rows_emitted(self) -> int:
+        return len(self.frame)
+
+
+class IncrementalIngestor:
+    """Emit only the route-weeks that are new or changed since the last commit."""
+
+    def __init__(self, kind: str = "orbcomm", *, state_dir: Optional[Path] = None, verify_bytes: bool = True) -> None:
+        if kind not in _BUILDERS:
+            raise ValueError(f"Unsupported dataset kind '{kind}'. Expected one of {tuple(_BUILDERS)}")
+        self.kind = kind
+        self.state_dir = Path(state_dir or DEFAULT_STATE_DIR) / kind
+        self.verify_bytes = verify_bytes
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.state_dir / "manifest.json"
+
+    @property
+    def hashes_path(self) -> Path:
+        return self.state_dir / "row_hashes.parquet"
+
+    def load_manifest(self) -> IngestionManifest:
+        return IngestionManifest.load(self.manifest_path, self.kind)
+
+    def _load_hashes(self) -> pd.DataFrame:
+        if not self.hashes_path.exists():
+            return pd.DataFrame({
+                "route_code": pd.Series(dtype=object),
+                "week_key": pd.Series(dtype=object),
+                "row_hash": pd.Series(dtype="uint64"),
+                "source_file": pd.Series(dtype=object),
+                "source_row_group": pd.Series(dtype=object),
+            })
+        hashes = pq.read_table(self.hashes_path).to_pandas()
+        # State written before ownership was tracked: treat every key as unowned.
+        for name in _SOURCE_COLUMNS:
+            if name not in hashes.columns:
+                hashes[name] = None
+        return hashes
+
+    # ------------------------------------------------------------------
+    # Scanning
+    # ------------------------------------------------------------------
+    def _scan_file(
+        self,
+        path: Path,
+        previous: Optional[Mapping[str, object]],
+        watermarks: Mapping[str, Watermark],
+        append_only: bool,
+        batch: IncrementalBatch,
+    ) -> Tuple[Optional[pd.DataFrame], Dict[str, object]]:
+        stat = path.stat()
+        if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+            batch.files_skipped += 1
+            batch.row_groups_skipped += len(previous.get("row_groups", []))
+            return None, dict(previous)
+
+        parquet_file = pq.ParquetFile(path)
+        metadata = parquet_file.metadata
+        with path.open("rb") as handle:
+            digests = [
+                row_group_fingerprint(metadata, index, handle if self.verify_bytes else None)
+                for index in range(metadata.num_row_groups)
+            ]
+
+        # Compare as a set so appended or reordered row groups do not force a re-read.
+        known = set(previous.get("row_groups", [])) if previous else set()
+        changed = []
+        for index, digest in enumerate(digests):
+            if digest in known or (append_only and _below_watermark(metadata.row_group(index), watermarks)):
+                batch.row_groups_skipped += 1
+            else:
+                changed.append(index)
+
+        batch.files_scanned += 1
+        batch.row_groups_read += len(changed)
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "row_groups": digests}
+        if not changed:
+            return None, entry
+
+        frame = parquet_file.read_row_groups(changed).to_pandas()
+        batch.rows_read += len(frame)
+        payloads = _BUILDERS[self.kind](frame, output="frame")
+        # Remember which file and row group supplied each row, for last-file-wins on later scans.
+        row_counts = [metadata.row_group(index).num_rows for index in changed]
+        return payloads.assign(
+            source_file=str(path),
+            source_row_group=np.repeat([digests[index] for index in changed], row_counts),
+        ), entry
+
+    def scan(self, paths: Iterable[Path], *, append_only: bool = False) -> IncrementalBatch:
+        """Return the new or changed payload rows in ``paths`` without updating the state.
+
+        Files are processed in order and the last file to mention a route-week wins, as in
+        :func:`code.parallel_ingestion.ingest_files`. With ``append_only=True`` rows at or
+        below their route's ``week`` watermark are ignored, and row groups whose statistics
+        show a single route entirely below its watermark are not decoded at all; both are
+        recorded as processed on commit.
+        """
+        started = time.perf_counter()
+        manifest = self.load_manifest()
+        batch = IncrementalBatch(frame=pd.DataFrame())
+        updated = IngestionManifest(kind=self.kind, files=dict(manifest.files), watermarks=dict(manifest.watermarks))
+
+        frames: List[pd.DataFrame] = []
+        scanned: List[str] = []
+        for path in paths:
+            resolved = Path(path).resolve()
+            if not resolved.exists():
+                raise FileNotFoundError(f"Dataset not found at {resolved}")
+            frame, entry = self._scan_file(
+                resolved, manifest.files.get(str(resolved)), manifest.watermarks, append_only, batch
+            )
+            updated.files[str(resolved)] = entry
+            scanned.append(str(resolved))
+            if frame is not None and len(frame):
+                frames.append(frame)
+
+        order = {name: position for position, name in enumerate(scanned)}
+        current = {name: set(updated.files[name].get("row_groups", [])) for name in scanned}
+        delta, hashes = self._changed_rows(frames, manifest.watermarks, append_only, batch, order, current)
+        batch.frame = delta.drop(columns=["week_key", "row_hash", *_SOURCE_COLUMNS])
+        batch._hashes = hashes
+        updated.watermarks = _merge_watermarks(manifest.watermarks, delta)
+        batch.watermarks = updated.watermarks
+        batch._manifest = updated
+        batch.seconds = time.perf_counter() - started
+        return batch
+
+    def _changed_rows(
+        self,
+        frames: Sequence[pd.DataFrame],
+        watermarks: Mapping[str, Watermark],
+        append_only: bool,
+        batch: IncrementalBatch,
+        order: Mapping[str, int],
+        current: Mapping[str, set],
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Return the rows to emit and the hash/ownership records to commit.
+
+        A route-week is owned by the file and row group that last supplied it. A changed row
+        from an earlier file is dropped while its key's owner comes later in ``order`` and
+        the owner's row group is still in that file (``current``): the later file still
+        overrides it, so emitting it would break last-file-wins.
+        """
+        if not frames:
+            empty = pd.DataFrame(columns=["route_code", "week", "week_key", "row_hash", *_SOURCE_COLUMNS])
+            return empty, empty[list(_HASH_COLUMNS)]
+
+        merged = pd.concat(frames, ignore_index=True)
+        merged = merged[merged["route_code"].notna() & merged["week"].notna()]
+        merged = merged.assign(route_code=merged["route_code"].astype(str), week=merged["week"].map(week_label))
+        merged = merged.assign(week_key=merged["week"].map(normalize_week))
+        merged = merged.drop_duplicates(subset=["route_code", "week_key"], keep="last")
+
+        if append_only and watermarks:
+            limits = merged["route_code"].map(lambda route: watermarks.get(route, {}).get("week"))
+            newer = [
+                limit is None or week_sort_key(key) > week_sort_key(limit)
+                for key, limit in zip(merged["week_key"], limits)
+            ]
+            merged = merged[newer]
+
+        payload_columns = [name for name in merged.columns if name not in ("week_key", *_SOURCE_COLUMNS)]
+        merged = merged.assign(row_hash=pd.util.hash_pandas_object(merged[payload_columns], index=False).to_numpy())
+
+        # Nullable UInt64 keeps the hashes exact through the left join (no float64 detour).
+        previous = self._load_hashes().astype({"row_hash": "UInt64"})
+        joined = merged.merge(previous, on=["route_code", "week_key"], how="left", suffixes=("", "_previous"))
+
+        position = joined["source_file"].map(order)
+        owner_position = joined["source_file_previous"].map(order)
+        owner_present = np.fromiter(
+            (
+                isinstance(owner, str) and digest in current.get(owner, ())
+                for owner, digest in zip(joined["source_file_previous"], joined["source_row_group_previous"])
+            ),
+            dtype=bool,
+            count=len(joined),
+        )
+        overridden = (owner_position > position).to_numpy(dtype=bool) & owner_present
+        changed = (joined["row_hash"].astype("UInt64") != joined["row_hash_previous"]).fillna(True).to_numpy(dtype=bool)
+        changed &= ~overridden
+        batch.rows_unchanged = int((~changed).sum())
+
+        owned = merged[~overridden]
+        delta = merged[changed]
+        return delta.sort_values(["route_code", "week"], kind="stable").reset_index(drop=True), owned[list(_HASH_COLUMNS)]
+
+    # ------------------------------------------------------------------
+    # Committing
+    # ------------------------------------------------------------------
+    def commit(self, batch: IncrementalBatch) -> None:
+        """Persist the manifest, watermarks and row hashes recorded by ``batch``."""
+        if batch._manifest is None or batch._hashes is None:
+            raise ValueError("Only batches returned by scan() can be committed")
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+
+        hashes = self._load_hashes()
+        if len(batch._hashes):
+            keys = pd.MultiIndex.from_frame(batch._hashes[["route_code", "week_key"]])
+            stale = pd.MultiIndex.from_frame(hashes[["route_code", "week_key"]]).isin(keys)
+            hashes = pd.concat([hashes[~stale], batch._hashes], ignore_index=True)
+        temporary = self.hashes_path.with_suffix(".parquet.tmp")
+        table = pa.Table.from_pandas(hashes.astype({"row_hash": "uint64"}), preserve_index=False)
+        pq.write_table(table, temporary)
+        os.replace(temporary, self.hashes_path)
+
+        # The manifest goes last: if the hash write fails the files are simply rescanned.
+        batch._manifest.save(self.manifest_path)
+
+    def reset(self) -> None:
+        """Forget all state so the next scan emits every row."""
+        for path in (self.manifest_path, self.hashes_path):
+            if path.exists():
+                path.unlink()
+
+
+def _merge_watermarks(current: Mapping[str, Watermark], delta: pd.DataFrame) -> Dict[str, Watermark]:
+    watermarks: Dict[str, Watermark] = {route: dict(values) for route, values in current.items()}
+    if not len(delta):
+        return watermarks
+
+    timestamps = None
+    if "event_timestamp" in delta.columns:
+        timestamps = pd.to_datetime(delta["event_timestamp"], errors="coerce", utc=True)
+
+    for route_code, positions in delta.groupby("route_code", sort=False).indices.items():
+        entry = watermarks.setdefault(route_code, {"week": None, "event_timestamp": None})
+        latest_week = max(delta["week_key"].iloc[positions], key=week_sort_key)
+        if entry.get("week") is None or week_sort_key(latest_week) > week_sort_key(entry["week"]):
+            entry["week"] = latest_week
+
+        if timestamps is not None:
+            latest = timestamps.iloc[positions].max()
+            if pd.notna(latest):
+                known = pd.Timestamp(entry["event_timestamp"]) if entry.get("event_timestamp") else None
+                if known is None or latest > known:
+                    entry["event_timestamp"] = latest.isoformat()
+    return watermarks
+
+
+def format_report(batch: IncrementalBatch) -> str:
+    """Summarise a scan in one line."""
+    return (
+        f"{batch.files_scanned} files scanned, {batch.files_skipped} unchanged; "
+        f"{batch.row_groups_read} row groups read, {batch.row_groups_skipped} skipped; "
+        f"{batch.rows_read:,} rows read, {batch.rows_emitted:,} new or changed, "
+        f"{batch.rows_unchanged:,} unchanged in {batch.seconds:.2f}s"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Emit only new or changed route-weeks since the last run.")
+    parser.add_argument("--kind", choices=tuple(_BUILDERS), default="orbcomm", help="Dataset to scan")
+    parser.add_argument("--data-dir", type=Path, default=None, help="Base directory for patterns and files")
+    parser.add_argument("--county-pair-glob", default=None, help="Glob for county pair files")
+    parser.add_argument("--transearch-glob", default=None, help="Glob for Transearch files")
+    parser.add_argument("--manifest", type=Path, default=None, help="JSON manifest listing files per dataset")
+    parser.add_argument("--state-dir", type=Path, default=None, help="Where the ingestion state is kept")
+    parser.add_argument("--append-only", action="store_true", help="Ignore rows at or below each route's watermark")
+    parser.add_argument("--output", type=Path, default=None, help="Write the delta rows to this Parquet file")
+    parser.add_argument("--dry-run", action="store_true", help="Report the delta without committing the state")
+    args = parser.parse_args(argv)
+
+    resolved = DatasetPaths(
+        county_pair_glob=args.county_pair_glob,
+        transearch_glob=args.transearch_glob,
+        manifest=args.manifest,
+    ).resolve(base_dir=args.data_dir)
+    files = resolved.county_pair_files if args.kind == "orbcomm" else resolved.transearch_files
+
+    ingestor = IncrementalIngestor(args.kind, state_dir=args.state_dir)
+    batch = ingestor.scan(files, append_only=args.append_only)
+    print(format_report(batch))
+
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(batch.frame, preserve_index=False), args.output)
+        print(f"Wrote {batch.rows_emitted:,} rows to {args.output}")
+    if not args.dry_run:
+        ingestor.commit(batch)
+
+
+__all__ = [
+    "DEFAULT_STATE_DIR",
+    "IncrementalBatch",
+    "IncrementalIngestor",
+    "IngestionManifest",
+    "format_report",
+    "row_group_fingerprint",
+]
+
+
+if __name__ == "__main__":
+    main()
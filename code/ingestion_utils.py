@@ -7,34 +7,127 @@ Python without touching the running services.
 """
 from __future__ import annotations
 
+import argparse
+import glob
+import itertools
+import json
+import math
+import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Iterator, Mapping, MutableMapping, Optional
+from typing import Callable, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Sequence, Tuple, Union
+from urllib.parse import quote
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .cache_utils import DatasetCache
 
 DEFAULT_DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DEFAULT_CACHE_DIR = DEFAULT_DATA_DIR / ".cache"
+DEFAULT_BATCH_SIZE = 65_536
+
+CacheOption = Union[bool, DatasetCache, None]
+
+_default_cache: Optional[DatasetCache] = None
 
 
 @dataclass(frozen=True)
 class DatasetPaths:
-    """Container holding the canonical dataset filenames used by the project."""
+    """Container holding the canonical dataset filenames used by the project.
+
+    Besides the single canonical files, either dataset can be given as a glob pattern
+    (``county_pair_glob="county_pair_move_data_*.parquet"``) or listed in a JSON
+    ``manifest`` of the form ``{"county_pair_moves": [...], "transearch": [...]}`` whose
+    entries may themselves be globs. Relative entries resolve against the manifest's
+    directory; patterns resolve against ``base_dir``. Matches are sorted so the file order,
+    and therefore last-write-wins merging, is deterministic.
+
+    ``partition_root`` points at a layout written by :func:`write_partitioned_dataset`
+    instead. ``resolve(route_codes=..., weeks=...)`` then lists only the partitions that
+    can hold those routes and weeks, and the result may be empty.
+    """
 
     county_pair_moves: Path = Path("county_pair_move_data_06037-04019.parquet")
     transearch_sample: Path = Path("transearch_data_sample.parquet")
+    county_pair_glob: Optional[str] = None
+    transearch_glob: Optional[str] = None
+    manifest: Optional[Path] = None
+    partition_root: Optional[Path] = None
 
-    def resolve(self, base_dir: Optional[Path] = None) -> "ResolvedDatasetPaths":
+    def resolve(
+        self,
+        base_dir: Optional[Path] = None,
+        *,
+        route_codes: Optional[Iterable[object]] = None,
+        weeks: Optional[Iterable[object]] = None,
+    ) -> "ResolvedDatasetPaths":
         base = Path(base_dir) if base_dir is not None else DEFAULT_DATA_DIR
+        if self.partition_root is not None:
+            root = base / self.partition_root
+            county_root = root / PARTITION_DATASETS["orbcomm"]
+            transearch_root = root / PARTITION_DATASETS["transearch"]
+            return ResolvedDatasetPaths(
+                county_pair_moves=county_root,
+                transearch_sample=transearch_root,
+                county_pair_files=partition_files(county_root, route_codes=route_codes, weeks=weeks),
+                transearch_files=partition_files(transearch_root, route_codes=route_codes, weeks=weeks),
+                partitioned=True,
+            )
+        manifest = self._read_manifest(base)
+        county_pair_files = self._expand(base, manifest.get("county_pair_moves"), self.county_pair_glob)
+        transearch_files = self._expand(base, manifest.get("transearch"), self.transearch_glob)
         return ResolvedDatasetPaths(
-            county_pair_moves=base / self.county_pair_moves,
-            transearch_sample=base / self.transearch_sample,
+            county_pair_moves=county_pair_files[0] if county_pair_files else base / self.county_pair_moves,
+            transearch_sample=transearch_files[0] if transearch_files else base / self.transearch_sample,
+            county_pair_files=county_pair_files or (base / self.county_pair_moves,),
+            transearch_files=transearch_files or (base / self.transearch_sample,),
         )
 
+    def _read_manifest(self, base: Path) -> Mapping[str, Sequence[str]]:
+        if self.manifest is None:
+            return {}
+        manifest_path = _ensure_exists(base / self.manifest)
+        entries = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if not isinstance(entries, dict):
+            raise ValueError(f"Dataset manifest must be a JSON object: {manifest_path}")
+        root = manifest_path.parent
+        return {key: [str(root / entry) for entry in values] for key, values in entries.items()}
+
+    @staticmethod
+    def _expand(base: Path, entries: Optional[Sequence[str]], pattern: Optional[str]) -> Tuple[Path, ...]:
+        if entries is not None:
+            resolved: List[Path] = []
+            for entry in entries:
+                if glob.has_magic(entry):
+                    resolved.extend(sorted(Path(match) for match in glob.glob(entry, recursive=True)))
+                else:
+                    resolved.append(Path(entry))
+            return tuple(resolved)
+        if pattern is not None:
+            return tuple(sorted(base.glob(pattern)))
+        return ()
+
 
 @dataclass(frozen=True)
 class ResolvedDatasetPaths:
     county_pair_moves: Path
     transearch_sample: Path
+    county_pair_files: Tuple[Path, ...] = ()
+    transearch_files: Tuple[Path, ...] = ()
+    # Partitioned layouts point the single paths at the dataset directories and may list no files.
+    partitioned: bool = False
+
+    def __post_init__(self) -> None:
+        if self.partitioned:
+            return
+        if not self.county_pair_files:
+            object.__setattr__(self, "county_pair_files", (self.county_pair_moves,))
+        if not self.transearch_files:
+            object.__setattr__(self, "transearch_files", (self.transearch_sample,))
 
 
 def _ensure_exists(path: Path) -> Path:
@@ -43,11 +136,458 @@ def _ensure_exists(path: Path) -> Path:
     return path
 
 
-def load_parquet(path: Path, *, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
-    """Load a Parquet file into a :class:`pandas.DataFrame` with existence checks."""
+def default_dataset_cache() -> DatasetCache:
+    """Return the process-wide cache stored under :data:`DEFAULT_CACHE_DIR`."""
+
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DatasetCache(DEFAULT_CACHE_DIR)
+    return _default_cache
+
+
+def _resolve_cache(cache: CacheOption) -> Optional[DatasetCache]:
+    if cache is None or cache is False:
+        return None
+    if cache is True:
+        return default_dataset_cache()
+    return cache
+
+
+def _load_cached_table(path: Path, cache: DatasetCache) -> pa.Table:
+    return cache.load(_ensure_exists(path), pq.read_table)
+
+
+def load_parquet(
+    path: Path,
+    *,
+    columns: Optional[Iterable[str]] = None,
+    cache: CacheOption = False,
+    compact: bool = False,
+) -> pd.DataFrame:
+    """Load a Parquet file into a :class:`pandas.DataFrame` with existence checks.
+
+    ``cache=True`` (or a :class:`DatasetCache`) serves repeat loads from a memory-mapped
+    Arrow copy of the decoded file instead of decoding the Parquet again. ``compact=True``
+    returns the narrow dtypes described in :func:`compact_frame`.
+    """
+
+    resolved = _ensure_exists(path)
+    dataset_cache = _resolve_cache(cache)
+    if dataset_cache is None:
+        if compact:
+            return _compact_table_to_frame(pq.read_table(resolved, columns=list(columns) if columns else None))
+        return pd.read_parquet(resolved, columns=list(columns) if columns else None)
+
+    table = _load_cached_table(resolved, dataset_cache)
+    if columns:
+        table = table.select(list(columns))
+    if compact:
+        return _compact_table_to_frame(table)
+    return table.to_pandas(split_blocks=True)
+
+
+def normalize_week(value: object) -> str:
+    """Return the canonical key for a week given in either string or numeric form.
+
+    Mirrors ``normalizeWeekFilter``: ``"202401"``, ``202401`` and ``202401.0`` all map to
+    ``"202401"`` while non-numeric labels are kept verbatim.
+    """
+    text = week_label(value).strip()
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    if math.isfinite(number) and number.is_integer():
+        return str(int(number))
+    return text
+
+
+def week_sort_key(week_key: str) -> Tuple[int, object]:
+    """Ordering for normalised week keys: numeric weeks by value, then other labels as text."""
+    try:
+        return 0, int(week_key)
+    except (TypeError, ValueError):
+        return 1, str(week_key)
+
+
+def week_label(value: object) -> str:
+    """Render a week the way the backend stores it (``String(value)`` in JavaScript)."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+# ----------------------------------------------------------------------
+# Partitioned layout
+# ----------------------------------------------------------------------
+# ``<root>/<dataset>/origin_county=<o>/destination_county=<d>/week_bucket=<b>/part-00000.parquet``.
+# The counties are the two halves of the ``<origin>-<destination>`` route code, so a route
+# filter maps to one directory. Weeks fall into buckets of ``week_bucket_weeks`` ISO weeks
+# labelled by their first week (``202401``, ``202414``, ...). A route-week always lands in
+# the same partition, and parts are numbered in write order, so sorted file order keeps
+# last-write-wins merging intact.
+
+PARTITION_DATASETS = {"orbcomm": "county_pair_moves", "transearch": "transearch"}
+PARTITION_KEYS = ("origin_county", "destination_county", "week_bucket")
+DEFAULT_PARTITION_DIR = Path("partitioned")
+DEFAULT_WEEK_BUCKET_WEEKS = 13
+DEFAULT_TARGET_FILE_BYTES = 128 * 2**20
+DEFAULT_PARTITION_ROW_GROUP = 131_072
+# Hive's marker for a missing value, also used for route codes and weeks that do not
+# follow the ``<origin>-<destination>`` and ``YYYYWW`` formats.
+DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+PARTITIONING_FILE = "_partitioning.json"
+
+
+def route_partition(route_code: object) -> Tuple[str, str]:
+    """``(origin_county, destination_county)`` partition values for a route code."""
+    if route_code is None or route_code is pd.NA:
+        return DEFAULT_PARTITION, DEFAULT_PARTITION
+    origin, separator, destination = str(route_code).partition("-")
+    if not separator or not origin or not destination:
+        return DEFAULT_PARTITION, DEFAULT_PARTITION
+    return origin, destination
+
+
+def week_bucket(week: object, bucket_weeks: int = DEFAULT_WEEK_BUCKET_WEEKS) -> str:
+    """Label of the ``bucket_weeks``-wide bucket holding a ``YYYYWW`` week, in either form."""
+    if week is None or week is pd.NA:
+        return DEFAULT_PARTITION
+    key = normalize_week(week)
+    if len(key) != 6 or not key.isdigit():
+        return DEFAULT_PARTITION
+    year, number = divmod(int(key), 100)
+    if not 1 <= number <= 53:
+        return DEFAULT_PARTITION
+    return f"{year}{(number - 1) // bucket_weeks * bucket_weeks + 1:02d}"
+
+
+def _partition_dir(dataset_root: Path, key: str, value: str) -> Path:
+    return dataset_root / f"{key}={quote(value, safe='')}"
+
+
+def _read_partitioning(dataset_root: Path) -> Mapping[str, object]:
+    path = dataset_root / PARTITIONING_FILE
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def partition_files(
+    dataset_root: Path,
+    *,
+    route_codes: Optional[Iterable[object]] = None,
+    weeks: Optional[Iterable[object]] = None,
+) -> Tuple[Path, ...]:
+    """Part files under ``dataset_root`` whose partitions can hold ``route_codes`` and ``weeks``.
 
+    Filtered lookups probe the matching directories directly instead of listing the tree.
+    """
+    if not dataset_root.is_dir():
+        return ()
+    bucket_weeks = int(_read_partitioning(dataset_root).get("week_bucket_weeks", DEFAULT_WEEK_BUCKET_WEEKS))
+    if route_codes is None:
+        pair_dirs = sorted(dataset_root.glob("origin_county=*/destination_county=*"))
+    else:
+        pair_dirs = [
+            _partition_dir(_partition_dir(dataset_root, "origin_county", origin), "destination_county", destination)
+            for origin, destination in sorted({route_partition(code) for code in route_codes})
+        ]
+    buckets = None if weeks is None else sorted({week_bucket(week, bucket_weeks) for week in weeks})
+
+    files: List[Path] = []
+    for pair_dir in pair_dirs:
+        if buckets is None:
+            bucket_dirs = sorted(pair_dir.glob("week_bucket=*"))
+        else:
+            bucket_dirs = [_partition_dir(pair_dir, "week_bucket", bucket) for bucket in buckets]
+        for bucket_dir in bucket_dirs:
+            files.extend(sorted(bucket_dir.glob("part-*.parquet")))
+    return tuple(files)
+
+
+# ----------------------------------------------------------------------
+# Compact frames
+# ----------------------------------------------------------------------
+# Repeated identifiers become categoricals, measurements become float32, trip counts the
+# smallest nullable integer that holds them and ``week`` an ordered categorical whose
+# codes are the week ordinal. Columns not listed here keep their dtype.
+
+COMPACT_CATEGORY_COLUMNS = (
+    "route_code",
+    "routeCode",
+    "origin_county",
+    "originCounty",
+    "destination_county",
+    "destinationCounty",
+    "mode",
+    "transport_mode",
+)
+COMPACT_FLOAT_COLUMNS = (
+    "latitude",
+    "longitude",
+    "available",
+    "loaded",
+    "used",
+    "total",
+    "avg_stop_duration",
+    "avgStopDuration",
+    "performance_variation",
+    "performanceVariation",
+)
+COMPACT_COUNT_COLUMNS = ("trips_over_five", "tripsOverFive", "total_trips", "totalTrips")
+_NULLABLE_INTS = ("Int8", "Int16", "Int32", "Int64")
+
+
+def _sorted_weeks(values: Iterable[object]) -> List[object]:
+    return sorted(values, key=lambda value: week_sort_key(normalize_week(value)))
+
+
+def _week_ordinal(column: pd.Series) -> pd.Series:
+    if isinstance(column.dtype, pd.CategoricalDtype) and column.cat.ordered:
+        return column
+    categories = column.cat.categories if isinstance(column.dtype, pd.CategoricalDtype) else column.dropna().unique()
+    dtype = pd.CategoricalDtype(_sorted_weeks(categories), ordered=True)
+    return column.astype(dtype)
+
+
+def _small_count(column: pd.Series) -> pd.Series:
+    values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+    present = values[~np.isnan(values)]
+    if present.size and not np.array_equal(present, np.floor(present)):
+        return column
+    low, high = (present.min(), present.max()) if present.size else (0, 0)
+    for dtype in _NULLABLE_INTS:
+        limits = np.iinfo(dtype.lower())
+        if limits.min <= low and high <= limits.max:
+            return column.astype(dtype)
+    return column
+
+
+def compact_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Return ``frame`` with memory-lean dtypes for the known extract columns.
+
+    Identifier columns (:data:`COMPACT_CATEGORY_COLUMNS`) become categoricals, coordinates
+    and ratio inputs (:data:`COMPACT_FLOAT_COLUMNS`) ``float32``, trip counts the smallest
+    nullable ``Int8``..``Int64`` that fits (left alone if fractional) and ``week`` an
+    ordered categorical sorted by :func:`week_sort_key`. Its labels are unchanged and
+    ``frame["week"].cat.codes`` is the week ordinal. ``float32`` keeps about seven
+    significant digits, so KPIs may differ from a full-precision load in the last place;
+    build ingestion payloads from a full-precision load.
+    """
+    compacted = frame.copy(deep=False)
+    for name in frame.columns:
+        column = frame[name]
+        if name == "week":
+            compacted[name] = _week_ordinal(column)
+        elif name in COMPACT_CATEGORY_COLUMNS:
+            if not isinstance(column.dtype, pd.CategoricalDtype):
+                compacted[name] = column.astype("category")
+        elif name in COMPACT_FLOAT_COLUMNS:
+            if pd.api.types.is_float_dtype(column.dtype):
+                compacted[name] = column.astype(np.float32)
+        elif name in COMPACT_COUNT_COLUMNS:
+            if pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype):
+                compacted[name] = _small_count(column)
+    return compacted
+
+
+def _compact_table_to_frame(table: Union[pa.Table, pa.RecordBatch]) -> pd.DataFrame:
+    """Dictionary-encode identifier strings in Arrow so no per-row Python strings are created."""
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+    for index, field in enumerate(table.schema):
+        if (field.name in COMPACT_CATEGORY_COLUMNS or field.name == "week") and (
+            pa.types.is_string(field.type) or pa.types.is_large_string(field.type)
+        ):
+            table = table.set_column(index, field.name, pc.dictionary_encode(table.column(index)))
+    return compact_frame(table.to_pandas(split_blocks=True))
+
+
+def _concat_compact(frames: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate compact batches, unifying categories so the columns stay categorical."""
+    frames = list(frames)
+    for name in frames[0].columns:
+        dtypes = [frame[name].dtype for frame in frames]
+        if not all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+            continue
+        categories = pd.unique(np.concatenate([np.asarray(dtype.categories, dtype=object) for dtype in dtypes]))
+        ordered = dtypes[0].ordered
+        unified = pd.CategoricalDtype(_sorted_weeks(categories) if ordered else categories, ordered=ordered)
+        frames = [frame.assign(**{name: frame[name].astype(unified)}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def compaction_report(original: pd.DataFrame, compacted: pd.DataFrame) -> pd.DataFrame:
+    """Per-column dtype and deep memory use before and after compaction, with a total row."""
+    rows = []
+    for name in original.columns:
+        before = int(original[name].memory_usage(deep=True, index=False))
+        after = int(compacted[name].memory_usage(deep=True, index=False)) if name in compacted else 0
+        rows.append(
+            {
+                "column": name,
+                "dtype_before": str(original[name].dtype),
+                "dtype_after": str(compacted[name].dtype) if name in compacted else "",
+                "bytes_before": before,
+                "bytes_after": after,
+            }
+        )
+    report = pd.DataFrame(rows)
+    total = {
+        "column": "total",
+        "dtype_before": "",
+        "dtype_after": "",
+        "bytes_before": int(report["bytes_before"].sum()),
+        "bytes_after": int(report["bytes_after"].sum()),
+    }
+    report = pd.concat([report, pd.DataFrame([total])], ignore_index=True)
+    report["ratio"] = report["bytes_after"] / report["bytes_before"].where(report["bytes_before"] > 0)
+    return report
+
+
+def _value_type(arrow_type: pa.DataType) -> pa.DataType:
+    return arrow_type.value_type if pa.types.is_dictionary(arrow_type) else arrow_type
+
+
+def _filter_candidates(values: Iterable[object], arrow_type: pa.DataType, *, week: bool = False) -> List[object]:
+    """Coerce filter values to ``arrow_type`` accepting both string and numeric forms.
+
+    Mirrors ``normalizeWeekFilter`` in the backend: with ``week=True``, ``"202401"``,
+    ``202401`` and ``202401.0`` select the same rows regardless of how the column is
+    stored in the file.
+    """
+    arrow_type = _value_type(arrow_type)
+    candidates = set()
+    for value in values:
+        if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+            candidates.add(str(value))
+            if week:
+                candidates.update((week_label(value), normalize_week(value)))
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            continue
+        if pa.types.is_integer(arrow_type):
+            if number.is_integer():
+                candidates.add(int(number))
+        elif pa.types.is_floating(arrow_type):
+            candidates.add(number)
+    return sorted(candidates)
+
+
+def _row_group_may_match(
+    metadata: pq.RowGroupMetaData,
+    column_index: int,
+    candidates: Sequence[object],
+) -> bool:
+    """Use row-group min/max statistics to decide whether any candidate can be present."""
+    statistics = metadata.column(column_index).statistics
+    if statistics is None or not statistics.has_min_max:
+        return True
+    try:
+        return any(statistics.min <= candidate <= statistics.max for candidate in candidates)
+    except TypeError:
+        return True
+
+
+def _resolve_filters(
+    schema: pa.Schema,
+    source: Path,
+    *,
+    route_codes: Optional[Iterable[object]],
+    weeks: Optional[Iterable[object]],
+) -> Mapping[str, List[object]]:
+    filters = {}
+    for name, values in (("route_code", route_codes), ("week", weeks)):
+        if values is None:
+            continue
+        if name not in schema.names:
+            raise KeyError(f"Cannot filter on missing column '{name}' in {source}")
+        filters[name] = _filter_candidates(values, schema.field(name).type, week=name == "week")
+    return filters
+
+
+def _apply_filters(
+    data: Union[pa.RecordBatch, pa.Table],
+    schema: pa.Schema,
+    filters: Mapping[str, Sequence[object]],
+) -> Union[pa.RecordBatch, pa.Table]:
+    mask = None
+    for name, candidates in filters.items():
+        value_set = pa.array(candidates, type=_value_type(schema.field(name).type))
+        matches = pc.is_in(data.column(name), value_set=value_set)
+        mask = matches if mask is None else pc.and_(mask, matches)
+    return data if mask is None else data.filter(mask)
+
+
+def iter_parquet_batches(
+    path: Path,
+    *,
+    columns: Optional[Iterable[str]] = None,
+    route_codes: Optional[Iterable[object]] = None,
+    weeks: Optional[Iterable[object]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    compact: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """Stream a Parquet file as DataFrames of at most ``batch_size`` rows.
+
+    Row groups whose ``route_code``/``week`` statistics exclude every requested value are
+    skipped without being decoded, and only the projected ``columns`` (plus any filter
+    columns) are read. Peak memory is bounded by a single batch rather than the file.
+    With ``compact=True`` each batch is compacted as in :func:`compact_frame`; categories
+    are per batch.
+    """
+
+    for batch in _iter_arrow_batches(path, columns=columns, route_codes=route_codes, weeks=weeks, batch_size=batch_size):
+        if compact:
+            yield _compact_table_to_frame(batch)
+        else:
+            yield batch.to_pandas()
+
+
+def _iter_arrow_batches(
+    path: Path,
+    *,
+    columns: Optional[Iterable[str]],
+    route_codes: Optional[Iterable[object]],
+    weeks: Optional[Iterable[object]],
+    batch_size: int,
+) -> Iterator[pa.RecordBatch]:
+    """Projected, filtered record batches behind :func:`iter_parquet_batches`."""
     resolved = _ensure_exists(path)
-    return pd.read_parquet(resolved, columns=list(columns) if columns else None)
+    parquet_file = pq.ParquetFile(resolved)
+    schema = parquet_file.schema_arrow
+    projected = list(columns) if columns else list(schema.names)
+
+    filters = _resolve_filters(schema, resolved, route_codes=route_codes, weeks=weeks)
+    if any(not candidates for candidates in filters.values()):
+        return
+
+    leaf_index = {
+        parquet_file.metadata.schema.column(index).path: index
+        for index in range(parquet_file.metadata.num_columns)
+    }
+    row_groups = [
+        index
+        for index in range(parquet_file.num_row_groups)
+        if all(
+            name not in leaf_index
+            or _row_group_may_match(parquet_file.metadata.row_group(index), leaf_index[name], candidates)
+            for name, candidates in filters.items()
+        )
+    ]
+    if not row_groups:
+        return
+
+    read_columns = projected + [name for name in filters if name not in projected]
+    for batch in parquet_file.iter_batches(batch_size=batch_size, row_groups=row_groups, columns=read_columns):
+        batch = _apply_filters(batch, schema, filters)
+        if batch.num_rows:
+            yield batch.select(projected)
 
 
 def iter_dict_rows(frame: pd.DataFrame) -> Iterator[Mapping[str, object]]:
@@ -57,18 +597,174 @@ def iter_dict_rows(frame: pd.DataFrame) -> Iterator[Mapping[str, object]]:
         yield row.to_dict()
 
 
-def load_county_pair_moves(*, data_dir: Optional[Path] = None) -> pd.DataFrame:
-    """Load the ORBCOMM county pair movement sample."""
+def _load_dataset(
+    path: Path,
+    *,
+    stream: bool,
+    columns: Optional[Iterable[str]],
+    route_codes: Optional[Iterable[object]],
+    weeks: Optional[Iterable[object]],
+    batch_size: int,
+    cache: CacheOption,
+    compact: bool = False,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    if not stream and route_codes is None and weeks is None:
+        return load_parquet(path, columns=columns, cache=cache, compact=compact)
+
+    dataset_cache = _resolve_cache(cache)
+    if not stream and dataset_cache is not None:
+        table = _load_cached_table(path, dataset_cache)
+        filters = _resolve_filters(table.schema, path, route_codes=route_codes, weeks=weeks)
+        table = _apply_filters(table, table.schema, filters)
+        table = table.select(list(columns) if columns else table.schema.names)
+        return _compact_table_to_frame(table) if compact else table.to_pandas(split_blocks=True)
+
+    batches = iter_parquet_batches(
+        path,
+        columns=columns,
+        route_codes=route_codes,
+        weeks=weeks,
+        batch_size=batch_size,
+        compact=compact,
+    )
+    if stream:
+        return batches
+
+    frames = list(batches)
+    if frames:
+        return _concat_compact(frames) if compact else pd.concat(frames, ignore_index=True)
+    return _empty_frame(path, columns, compact)
+
+
+def _empty_frame(path: Path, columns: Optional[Iterable[str]], compact: bool) -> pd.DataFrame:
+    """A frame with no rows and the projected columns of the Parquet file at ``path``."""
+    schema = pq.read_schema(_ensure_exists(path))
+    empty = schema.empty_table().select(list(columns) if columns else schema.names)
+    return _compact_table_to_frame(empty) if compact else empty.to_pandas()
+
+
+def _materialize_filters(
+    route_codes: Optional[Iterable[object]],
+    weeks: Optional[Iterable[object]],
+) -> Tuple[Optional[List[object]], Optional[List[object]]]:
+    # Filters are used for partition pruning and again for row filtering.
+    return (
+        None if route_codes is None else list(route_codes),
+        None if weeks is None else list(weeks),
+    )
 
-    paths = DatasetPaths().resolve(base_dir=data_dir)
-    return load_parquet(paths.county_pair_moves)
 
+def _load_files(
+    files: Sequence[Path],
+    dataset: Path,
+    *,
+    stream: bool,
+    columns: Optional[Iterable[str]],
+    route_codes: Optional[Iterable[object]],
+    weeks: Optional[Iterable[object]],
+    batch_size: int,
+    cache: CacheOption,
+    compact: bool,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """:func:`_load_dataset` over several files in order; ``dataset`` supplies the schema when none are left."""
+    options = dict(columns=columns, route_codes=route_codes, weeks=weeks, batch_size=batch_size, cache=cache, compact=compact)
+    if len(files) == 1:
+        return _load_dataset(files[0], stream=stream, **options)
+    if stream:
+        return itertools.chain.from_iterable(_load_dataset(path, stream=True, **options) for path in files)
+    if not files:
+        # Every partition was pruned: an empty frame with the dataset's columns.
+        sample = next(dataset.rglob("part-*.parquet"), None) if dataset.is_dir() else None
+        return _empty_frame(sample if sample is not None else dataset, columns, compact)
 
-def load_transearch_sample(*, data_dir: Optional[Path] = None) -> pd.DataFrame:
-    """Load the Transearch performance variation sample."""
+    if _resolve_cache(cache) is not None:
+        frames = [_load_dataset(path, stream=False, **options) for path in files]
+        # Keep the first (empty) frame when no file has matching rows, for its columns.
+        loaded = [frame for frame in frames if len(frame)] or frames[:1]
+        return _concat_compact(loaded) if compact else pd.concat(loaded, ignore_index=True)
 
-    paths = DatasetPaths().resolve(base_dir=data_dir)
-    return load_parquet(paths.transearch_sample)
+    # Many small partitions: gather Arrow batches and convert to pandas once.
+    tables = []
+    for path in files:
+        batches = list(_iter_arrow_batches(path, columns=columns, route_codes=route_codes, weeks=weeks, batch_size=batch_size))
+        if batches:
+            tables.append(pa.Table.from_batches(batches))
+    if not tables:
+        return _empty_frame(files[0], columns, compact)
+    table = pa.concat_tables(tables, promote_options="permissive")
+    return _compact_table_to_frame(table) if compact else table.to_pandas(split_blocks=True)
+
+
+def load_county_pair_moves(
+    *,
+    data_dir: Optional[Path] = None,
+    paths: Optional[DatasetPaths] = None,
+    stream: bool = False,
+    columns: Optional[Iterable[str]] = None,
+    route_codes: Optional[Iterable[object]] = None,
+    weeks: Optional[Iterable[object]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    cache: CacheOption = False,
+    compact: bool = False,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Load the ORBCOMM county pair movement sample.
+
+    With ``stream=True`` an iterator of bounded batches is returned instead of a single
+    frame; see :func:`iter_parquet_batches` for the projection and filter semantics.
+    ``cache`` applies to non-streaming loads as described in :func:`load_parquet`, and
+    ``compact=True`` narrows the dtypes as described in :func:`compact_frame`.
+
+    ``paths`` selects other files; every resolved file is read in order. With a
+    partitioned layout only the partitions that can match ``route_codes`` and ``weeks``
+    are opened.
+    """
+
+    route_codes, weeks = _materialize_filters(route_codes, weeks)
+    resolved = (paths or DatasetPaths()).resolve(base_dir=data_dir, route_codes=route_codes, weeks=weeks)
+    return _load_files(
+        resolved.county_pair_files,
+        resolved.county_pair_moves,
+        stream=stream,
+        columns=columns,
+        route_codes=route_codes,
+        weeks=weeks,
+        batch_size=batch_size,
+        cache=cache,
+        compact=compact,
+    )
+
+
+def load_transearch_sample(
+    *,
+    data_dir: Optional[Path] = None,
+    paths: Optional[DatasetPaths] = None,
+    stream: bool = False,
+    columns: Optional[Iterable[str]] = None,
+    route_codes: Optional[Iterable[object]] = None,
+    weeks: Optional[Iterable[object]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    cache: CacheOption = False,
+    compact: bool = False,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Load the Transearch performance variation sample.
+
+    Accepts the same ``paths``, streaming, filtering and ``compact`` options as
+    :func:`load_county_pair_moves`.
+    """
+
+    route_codes, weeks = _materialize_filters(route_codes, weeks)
+    resolved = (paths or DatasetPaths()).resolve(base_dir=data_dir, route_codes=route_codes, weeks=weeks)
+    return _load_files(
+        resolved.transearch_files,
+        resolved.transearch_sample,
+        stream=stream,
+        columns=columns,
+        route_codes=route_codes,
+        weeks=weeks,
+        batch_size=batch_size,
+        cache=cache,
+        compact=compact,
+    )
 
 
 def prepare_orbcomm_payload(row: Mapping[str, object]) -> MutableMapping[str, object]:
@@ -109,14 +805,385 @@ def prepare_transearch_payload(row: Mapping[str, object]) -> MutableMapping[str,
     }
 
 
+
+# ----------------------------------------------------------------------
+# Batch payload builders
+# ----------------------------------------------------------------------
+# Each field lists the columns that may supply it, in the order the per-row helpers try
+# them with ``or``. Optional fields are emitted only when one of their columns exists.
+
+FieldSpec = Tuple[str, Tuple[str, ...]]
+
+ORBCOMM_PAYLOAD_FIELDS: Tuple[FieldSpec, ...] = (
+    ("route_code", ("route_code", "routeCode")),
+    ("week", ("week",)),
+    ("available", ("available",)),
+    ("loaded", ("loaded",)),
+    ("used", ("used",)),
+    ("total", ("total",)),
+    ("avg_stop_duration", ("avg_stop_duration", "avgStopDuration")),
+    ("trips_over_five", ("trips_over_five", "tripsOverFive")),
+    ("total_trips", ("total_trips", "totalTrips")),
+    ("latitude", ("latitude",)),
+    ("longitude", ("longitude",)),
+    ("event_timestamp", ("event_timestamp", "eventTimestamp")),
+)
+ORBCOMM_OPTIONAL_PAYLOAD_FIELDS: Tuple[FieldSpec, ...] = (
+    ("origin_county", ("origin_county", "originCounty")),
+    ("destination_county", ("destination_county", "destinationCounty")),
+    ("mode", ("mode", "transport_mode")),
+)
+TRANSEARCH_PAYLOAD_FIELDS: Tuple[FieldSpec, ...] = (
+    ("route_code", ("route_code", "routeCode")),
+    ("week", ("week",)),
+    ("performance_variation", ("performance_variation", "performanceVariation")),
+)
+
+PAYLOAD_OUTPUTS = ("records", "recarray", "arrow", "frame")
+
+PayloadBatch = Union[List[MutableMapping[str, object]], np.recarray, pa.Table, pd.DataFrame]
+
+
+def _truthy(column: pd.Series) -> np.ndarray:
+    """Vectorised ``bool(value)`` for a column.
+
+    ``NaN`` and ``NaT`` are truthy exactly as in Python; nullable ``pd.NA`` markers are
+    treated as falsy.
+    """
+    if isinstance(column.dtype, np.dtype) and column.dtype.kind in "biuf":
+        return column.to_numpy() != 0
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        # ``bool(pd.NaT)`` is True, so ``NaT or fallback`` keeps the ``NaT``.
+        return np.ones(len(column), dtype=bool)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Evaluate each category once; missing values (code -1) pick the appended ``True``
+        # because rows hand them to the per-row helpers as ``NaN``.
+        truthy = np.append(_truthy(pd.Series(column.cat.categories)), True)
+        return truthy[column.cat.codes.to_numpy()]
+    if pd.api.types.is_bool_dtype(column.dtype) or pd.api.types.is_numeric_dtype(column.dtype):
+        return column.to_numpy(dtype=np.float64, na_value=0.0) != 0
+    if isinstance(column.dtype, pd.StringDtype):
+        truthy = (column != "").to_numpy(dtype=bool, na_value=False)
+        if column.dtype.na_value is pd.NA:
+            return truthy
+        return truthy | column.isna().to_numpy()
+    return np.fromiter(
+        (value is not pd.NA and bool(value) for value in column),
+        dtype=bool,
+        count=len(column),
+    )
+
+
+def _resolve_field(frame: pd.DataFrame, aliases: Sequence[str]) -> pd.Series:
+    """Evaluate ``row.get(a) or row.get(b) or ...`` for every row at once."""
+    present = [alias for alias in aliases if alias in frame.columns]
+    if len(aliases) == 1:
+        if present:
+            return frame[present[0]]
+        return pd.Series([None] * len(frame), index=frame.index, dtype=object)
+
+    # ``x or y`` yields ``y`` whenever ``x`` is falsy, so the last alias is the fallback
+    # (``None`` when absent) and earlier aliases win only where they are truthy.
+    if aliases[-1] in frame.columns:
+        result = frame[aliases[-1]]
+    else:
+        result = pd.Series([None] * len(frame), index=frame.index, dtype=object)
+
+    for alias in reversed(aliases[:-1]):
+        if alias not in frame.columns:
+            continue
+        column = frame[alias]
+        mask = _truthy(column)
+        if mask.all():
+            result = column
+        else:
+            result = column.astype(object).where(mask, result.astype(object))
+    return result
+
+
+def _build_payload_frame(frame: pd.DataFrame, fields: Sequence[FieldSpec], optional: Sequence[FieldSpec] = ()) -> pd.DataFrame:
+    columns = {name: _resolve_field(frame, aliases) for name, aliases in fields}
+    for name, aliases in optional:
+        if any(alias in frame.columns for alias in aliases):
+            columns[name] = _resolve_field(frame, aliases)
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def _emit_payloads(payload_frame: pd.DataFrame, output: str) -> PayloadBatch:
+    if output == "records":
+        return payload_frame.to_dict("records")
+    if output == "recarray":
+        return payload_frame.to_records(index=False)
+    if output == "arrow":
+        return pa.Table.from_pandas(payload_frame, preserve_index=False)
+    if output == "frame":
+        return payload_frame.reset_index(drop=True)
+    raise ValueError(f"Unsupported payload output '{output}'. Expected one of {PAYLOAD_OUTPUTS}")
+
+
+def build_orbcomm_payloads(frame: pd.DataFrame, *, output: str = "records") -> PayloadBatch:
+    """Column-wise equivalent of applying :func:`prepare_orbcomm_payload` to every row.
+
+    Column aliases are resolved once from the frame's schema. ``output`` selects a list of
+    dictionaries (``"records"``), a NumPy record array (``"recarray"``), a
+    :class:`pyarrow.Table` (``"arrow"``) or a :class:`pandas.DataFrame` (``"frame"``).
+    """
+
+    payload_frame = _build_payload_frame(frame, ORBCOMM_PAYLOAD_FIELDS, ORBCOMM_OPTIONAL_PAYLOAD_FIELDS)
+    return _emit_payloads(payload_frame, output)
+
+
+def build_transearch_payloads(frame: pd.DataFrame, *, output: str = "records") -> PayloadBatch:
+    """Column-wise equivalent of applying :func:`prepare_transearch_payload` to every row."""
+
+    payload_frame = _build_payload_frame(frame, TRANSEARCH_PAYLOAD_FIELDS)
+    return _emit_payloads(payload_frame, output)
+
+
+def iter_payload_batches(
+    frames: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    builder: Callable[..., PayloadBatch] = build_orbcomm_payloads,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    output: str = "records",
+) -> Iterator[PayloadBatch]:
+    """Yield payload batches of at most ``batch_size`` rows.
+
+    ``frames`` may be a single DataFrame or the iterator returned by the streaming loaders,
+    so payloads can be produced without materialising the whole extract.
+    """
+
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+
+    for frame in frames:
+        for start in range(0, len(frame), batch_size):
+            yield builder(frame.iloc[start:start + batch_size], output=output)
+
+
+# ----------------------------------------------------------------------
+# Partitioned writer
+# ----------------------------------------------------------------------
+@dataclass(frozen=True)
+class PartitionedWrite:
+    """Files written by one :func:`write_partitioned_dataset` call."""
+
+    files: Tuple[Path, ...]
+    rows: int
+    partitions: int
+
+    @property
+    def bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.files)
+
+
+def _partition_labels(column: Union[pa.Array, pa.ChunkedArray], label: Callable[[object], str]) -> pa.Array:
+    """Apply ``label`` once per distinct value of ``column`` and broadcast the result."""
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    encoded = column if pa.types.is_dictionary(column.type) else pc.dictionary_encode(column)
+    labels = pa.array([label(value) for value in encoded.dictionary.to_pylist()], type=pa.string())
+    return pc.fill_null(labels.take(encoded.indices), label(None))
+
+
+def _split_partitions(table: pa.Table, bucket_weeks: int) -> Iterator[Tuple[Tuple[str, str, str], pa.Table]]:
+    """Yield ``((origin, destination, bucket), rows)`` with rows sorted by route and week.
+
+    The sort is stable, so duplicate route-weeks keep their input order.
+    """
+    route_column = next((name for name in ("route_code", "routeCode") if name in table.column_names), None)
+    rows = table.num_rows
+    if route_column is None:
+        origins = destinations = pa.array([DEFAULT_PARTITION] * rows, type=pa.string())
+    else:
+        origins = _partition_labels(table.column(route_column), lambda code: route_partition(code)[0])
+        destinations = _partition_labels(table.column(route_column), lambda code: route_partition(code)[1])
+    if "week" in table.column_names:
+        buckets = _partition_labels(table.column("week"), lambda week: week_bucket(week, bucket_weeks))
+    else:
+        buckets = pa.array([DEFAULT_PARTITION] * rows, type=pa.string())
+
+    keys = pa.table({"origin": origins, "destination": destinations, "bucket": buckets})
+    sort_keys = [("origin", "ascending"), ("destination", "ascending"), ("bucket", "ascending")]
+    for name in (route_column, "week"):
+        if name in table.column_names:
+            keys = keys.append_column(name, table.column(name))
+            sort_keys.append((name, "ascending"))
+    order = pc.sort_indices(keys, sort_keys=sort_keys)
+    table = table.take(order)
+    keys = keys.take(order)
+
+    joined = pc.binary_join_element_wise(keys.column("origin"), keys.column("destination"), keys.column("bucket"), "\x1f")
+    labels = joined.to_numpy(zero_copy_only=False)
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]]) if rows else np.array([], dtype=np.int64)
+    for start, end in zip(starts, np.r_[starts[1:], rows]):
+        values = tuple(keys.column(name)[int(start)].as_py() for name in ("origin", "destination", "bucket"))
+        yield values, table.slice(int(start), int(end - start))
+
+
+def _plain_type(arrow_type: pa.DataType) -> pa.DataType:
+    arrow_type = _value_type(arrow_type)
+    return pa.string() if pa.types.is_large_string(arrow_type) else arrow_type
+
+
+def _next_part_index(directory: Path) -> int:
+    numbers = [int(path.stem[5:]) for path in directory.glob("part-*.parquet") if path.stem[5:].isdigit()]
+    return max(numbers) + 1 if numbers else 0
+
+
+def _source_tables(sources: Union[Path, pa.Table, pd.DataFrame, Iterable[Union[Path, pa.Table, pd.DataFrame]]]) -> Iterator[pa.Table]:
+    if isinstance(sources, (str, Path, pa.Table, pd.DataFrame)):
+        sources = [sources]
+    for source in sources:
+        if isinstance(source, pa.Table):
+            table = source
+        elif isinstance(source, pd.DataFrame):
+            table = pa.Table.from_pandas(source, preserve_index=False)
+        else:
+            table = pq.read_table(_ensure_exists(Path(source)))
+        # Plain value types keep part schemas identical whatever the source's encoding was.
+        yield table.cast(pa.schema([field.with_type(_plain_type(field.type)) for field in table.schema]))
+
+
+def write_partitioned_dataset(
+    sources: Union[Path, pa.Table, pd.DataFrame, Iterable[Union[Path, pa.Table, pd.DataFrame]]],
+    output_dir: Path,
+    *,
+    kind: str = "orbcomm",
+    week_bucket_weeks: int = DEFAULT_WEEK_BUCKET_WEEKS,
+    target_file_bytes: int = DEFAULT_TARGET_FILE_BYTES,
+    row_group_size: int = DEFAULT_PARTITION_ROW_GROUP,
+    overwrite: bool = False,
+) -> PartitionedWrite:
+    """Rewrite extracts into the partitioned layout under ``output_dir / PARTITION_DATASETS[kind]``.
+
+    Sources are processed in order. Each adds new parts to the partitions it touches,
+    so a later extract wins over an earlier one exactly as with the flat files. Rows in
+    a part are sorted by ``route_code`` and ``week``, which keeps row-group statistics
+    tight for the loaders' filters. A partition is split into several parts when its
+    decoded size exceeds ``target_file_bytes``. ``overwrite=True`` replaces the touched
+    partitions instead of appending to them.
+    """
+    if kind not in PARTITION_DATASETS:
+        raise ValueError(f"Unsupported dataset kind '{kind}'. Expected one of {tuple(PARTITION_DATASETS)}")
+    dataset_root = Path(output_dir) / PARTITION_DATASETS[kind]
+    dataset_root.mkdir(parents=True, exist_ok=True)
+    existing = _read_partitioning(dataset_root).get("week_bucket_weeks")
+    if existing is not None and int(existing) != week_bucket_weeks:
+        raise ValueError(f"{dataset_root} uses {existing}-week buckets; cannot append {week_bucket_weeks}-week buckets")
+    (dataset_root / PARTITIONING_FILE).write_text(
+        json.dumps({"keys": list(PARTITION_KEYS), "week_bucket_weeks": week_bucket_weeks}), encoding="utf-8"
+    )
+
+    written: List[Path] = []
+    partitions = set()
+    cleared = set()
+    rows = 0
+    for table in _source_tables(sources):
+        if not table.num_rows:
+            continue
+        rows += table.num_rows
+        rows_per_file = max(1, int(target_file_bytes * table.num_rows / max(table.nbytes, 1)))
+        for values, part in _split_partitions(table, week_bucket_weeks):
+            directory = dataset_root
+            for key, value in zip(PARTITION_KEYS, values):
+                directory = _partition_dir(directory, key, value)
+            directory.mkdir(parents=True, exist_ok=True)
+            if overwrite and directory not in cleared:
+                for stale in directory.glob("part-*.parquet"):
+                    stale.unlink()
+                cleared.add(directory)
+            partitions.add(directory)
+
+            index = _next_part_index(directory)
+            for start in range(0, part.num_rows, rows_per_file):
+                path = directory / f"part-{index:05d}.parquet"
+                staging = directory / f".{path.name}.tmp"
+                pq.write_table(part.slice(start, rows_per_file), staging, row_group_size=row_group_size)
+                # Readers glob ``part-*.parquet``, so a part only appears once it is complete.
+                os.replace(staging, path)
+                written.append(path)
+                index += 1
+    return PartitionedWrite(files=tuple(written), rows=rows, partitions=len(partitions))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rewrite Parquet extracts into the partitioned layout.")
+    parser.add_argument("--data-dir", type=Path, default=None, help="Base directory for patterns and files")
+    parser.add_argument("--county-pair-glob", default=None, help="Glob for county pair files, e.g. 'county_pair_*.parquet'")
+    parser.add_argument("--transearch-glob", default=None, help="Glob for Transearch files")
+    parser.add_argument("--manifest", type=Path, default=None, help="JSON manifest listing files per dataset")
+    parser.add_argument("--output", type=Path, default=None, help=f"Partition root (defaults to <data-dir>/{DEFAULT_PARTITION_DIR})")
+    parser.add_argument("--week-bucket-weeks", type=int, default=DEFAULT_WEEK_BUCKET_WEEKS, help="ISO weeks per week bucket")
+    parser.add_argument("--target-file-mb", type=float, default=DEFAULT_TARGET_FILE_BYTES / 2**20, help="Decoded size per part")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_PARTITION_ROW_GROUP, help="Rows per Parquet row group")
+    parser.add_argument("--overwrite", action="store_true", help="Replace the partitions being written instead of appending")
+    args = parser.parse_args(argv)
+
+    base = Path(args.data_dir) if args.data_dir is not None else DEFAULT_DATA_DIR
+    resolved = DatasetPaths(
+        county_pair_glob=args.county_pair_glob,
+        transearch_glob=args.transearch_glob,
+        manifest=args.manifest,
+    ).resolve(base_dir=base)
+    output = args.output if args.output is not None else base / DEFAULT_PARTITION_DIR
+    for kind, files in (("orbcomm", resolved.county_pair_files), ("transearch", resolved.transearch_files)):
+        sources = [path for path in files if path.exists()]
+        if not sources:
+            continue
+        result = write_partitioned_dataset(
+            sources,
+            output,
+            kind=kind,
+            week_bucket_weeks=args.week_bucket_weeks,
+            target_file_bytes=int(args.target_file_mb * 2**20),
+            row_group_size=args.row_group_size,
+            overwrite=args.overwrite,
+        )
+        print(
+            f"{PARTITION_DATASETS[kind]}: {len(sources)} source files, {result.rows:,} rows -> "
+            f"{len(result.files):,} parts in {result.partitions:,} partitions ({result.bytes / 2**20:,.1f} MB)"
+        )
+
+
 __all__ = [
     "DatasetPaths",
     "ResolvedDatasetPaths",
     "DEFAULT_DATA_DIR",
+    "DEFAULT_BATCH_SIZE",
+    "DEFAULT_CACHE_DIR",
+    "default_dataset_cache",
+    "normalize_week",
+    "week_label",
+    "week_sort_key",
     "load_parquet",
+    "COMPACT_CATEGORY_COLUMNS",
+    "COMPACT_FLOAT_COLUMNS",
+    "COMPACT_COUNT_COLUMNS",
+    "compact_frame",
+    "compaction_report",
+    "iter_parquet_batches",
     "iter_dict_rows",
     "load_county_pair_moves",
     "load_transearch_sample",
     "prepare_orbcomm_payload",
     "prepare_transearch_payload",
+    "PAYLOAD_OUTPUTS",
+    "build_orbcomm_payloads",
+    "build_transearch_payloads",
+    "iter_payload_batches",
+    "PARTITION_DATASETS",
+    "PARTITION_KEYS",
+    "DEFAULT_PARTITION",
+    "DEFAULT_PARTITION_DIR",
+    "DEFAULT_WEEK_BUCKET_WEEKS",
+    "PartitionedWrite",
+    "partition_files",
+    "route_partition",
+    "week_bucket",
+    "write_partitioned_dataset",
 ]
+
+
+if __name__ == "__main__":
+    main()
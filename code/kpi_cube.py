@@ -0,0 +1,292 @@
+"""Precomputed route × week KPI cube.
+
+The backend recomputes KPIs from two database lookups on every request. This module
+materialises every (route, week) KPI once, using the columnar engine in
+:mod:`code.kpi_utils`, into a single Arrow IPC file that can be memory-mapped and queried
+in microseconds. Build it as a batch job::
+
+    python -m code.kpi_cube --data-dir data --output data/kpi_cube.arrow
+
+and serve lookups with :class:`KpiCube`::
+
+    cube = KpiCube.open()
+    cube.lookup("06037-04019", "202401")   # same shape as calculateKPIs
+    cube.trend("06037-04019")              # same shape as fetchKpiTrend
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import functools
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .ingestion_utils import (
+    DEFAULT_DATA_DIR,
+    CacheOption,
+    build_orbcomm_payloads,
+    build_transearch_payloads,
+    load_county_pair_moves,
+    load_transearch_sample,
+    normalize_week,
+    week_label,
+)
+from .kpi_utils import Precision, summarize_kpis_columnar
+
+DEFAULT_CUBE_PATH = DEFAULT_DATA_DIR / "kpi_cube.arrow"
+# Routes whose decoded week keys are kept between lookups.
+DEFAULT_ROUTE_CACHE_SIZE = 1024
+
+KPI_COLUMNS = ("sdei", "sdcui", "sii", "rpi")
+RAW_COLUMNS = ("available", "loaded", "used", "total", "avg_stop_duration", "trips_over_five", "total_trips")
+
+
+def build_kpi_cube_table(
+    orbcomm_frame: pd.DataFrame,
+    transearch_frame: Optional[pd.DataFrame] = None,
+    *,
+    precision: Precision = 4,
+) -> pa.Table:
+    """Compute every route-week KPI and return it sorted by ``(route_code, week)``.
+
+    Column aliases are resolved like the ingestion payload builders, rows without a
+    route or week are dropped, and duplicate (route, week) pairs keep the last row, as the
+    backend upsert does. RPI is joined from ``transearch_frame`` on the same key.
+    """
+    orbcomm = build_orbcomm_payloads(orbcomm_frame, output="arrow").to_pandas()
+    orbcomm = orbcomm[orbcomm["route_code"].notna() & orbcomm["week"].notna()]
+    orbcomm = orbcomm.assign(
+        route_code=orbcomm["route_code"].astype(str),
+        week=orbcomm["week"].map(week_label),
+    )
+    orbcomm = orbcomm.assign(week_key=orbcomm["week"].map(normalize_week))
+    orbcomm = orbcomm.drop_duplicates(subset=["route_code", "week_key"], keep="last")
+
+    if transearch_frame is not None and len(transearch_frame):
+        transearch = build_transearch_payloads(transearch_frame, output="arrow").to_pandas()
+        transearch = transearch[transearch["route_code"].notna() & transearch["week"].notna()]
+        transearch = transearch.assign(
+            route_code=transearch["route_code"].astype(str),
+            week_key=transearch["week"].map(week_label).map(normalize_week),
+        )
+        transearch = transearch.drop_duplicates(subset=["route_code", "week_key"], keep="last")
+        orbcomm = orbcomm.merge(
+            transearch[["route_code", "week_key", "performance_variation"]],
+            on=["route_code", "week_key"],
+            how="left",
+        )
+    else:
+        orbcomm = orbcomm.assign(performance_variation=np.nan)
+
+    orbcomm = orbcomm.sort_values(["route_code", "week"], kind="stable").reset_index(drop=True)
+    kpis = summarize_kpis_columnar(orbcomm, precision=precision)
+
+    columns: Dict[str, object] = {
+        "route_code": pa.array(orbcomm["route_code"].to_numpy(dtype=object), type=pa.string()).dictionary_encode(),
+        "week": pa.array(orbcomm["week"].to_numpy(dtype=object), type=pa.string()),
+        "week_key": pa.array(orbcomm["week_key"].to_numpy(dtype=object), type=pa.string()),
+    }
+    for name in KPI_COLUMNS:
+        columns[name] = pa.array(kpis[name], type=pa.float64())
+    for name in RAW_COLUMNS:
+        values = pd.to_numeric(orbcomm[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        columns[name] = pa.array(values, type=pa.float64())
+
+    table = pa.table(columns)
+    return table.replace_schema_metadata({"precision": str(precision), "built_at": str(time.time())})
+
+
+def write_kpi_cube(table: pa.Table, path: Path = DEFAULT_CUBE_PATH) -> Path:
+    """Write ``table`` as an uncompressed Arrow IPC file suitable for memory mapping."""
+    destination = Path(path)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temporary = destination.with_suffix(destination.suffix + ".tmp")
+    with pa.OSFile(str(temporary), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    temporary.replace(destination)
+    return destination
+
+
+def build_kpi_cube(
+    *,
+    data_dir: Optional[Path] = None,
+    output: Optional[Path] = None,
+    precision: Precision = 4,
+    cache: CacheOption = False,
+) -> Path:
+    """Batch job: load both datasets, materialise the cube and write it to ``output``."""
+    orbcomm = load_county_pair_moves(data_dir=data_dir, cache=cache)
+    try:
+        transearch = load_transearch_sample(data_dir=data_dir, cache=cache)
+    except FileNotFoundError:
+        transearch = None
+    table = build_kpi_cube_table(orbcomm, transearch, precision=precision)
+    return write_kpi_cube(table, output or DEFAULT_CUBE_PATH)
+
+
+def _flat(column: pa.ChunkedArray) -> pa.Array:
+    """The column as one array; a single-chunk column (the mapped case) is not copied."""
+    if column.num_chunks == 1:
+        return column.chunk(0)
+    return column.combine_chunks() if column.num_chunks else pa.array([], type=column.type)
+
+
+def _float_values(column: pa.ChunkedArray) -> np.ndarray:
+    array = _flat(column)
+    try:
+        return array.to_numpy(zero_copy_only=True)
+    except pa.ArrowInvalid:
+        return array.to_numpy(zero_copy_only=False)
+
+
+def _clean(values: List[float]) -> List[Optional[float]]:
+    return [None if value != value else value for value in values]
+
+
+class KpiCube:
+    """Read-only view over a KPI cube with binary-search (route, week) lookups.
+
+    Opening a cube decodes only the distinct route codes. A lookup binary-searches the
+    sorted ``week_key`` values of the route's span, decoded on first use and kept for the
+    ``route_cache_size`` most recent routes, and reads the values straight from the
+    (memory-mapped) Arrow buffers.
+    """
+
+    _FIELDS = KPI_COLUMNS + RAW_COLUMNS
+
+    def __init__(self, table: pa.Table, *, route_cache_size: int = DEFAULT_ROUTE_CACHE_SIZE) -> None:
+        self.table = table
+        self._week = _flat(table.column("week"))
+        self._week_keys = _flat(table.column("week_key"))
+        self._values = {name: _float_values(table.column(name)) for name in self._FIELDS}
+        # Indexing a memoryview yields Python floats without creating NumPy scalars.
+        self._rows = [memoryview(np.ascontiguousarray(self._values[name])) for name in self._FIELDS]
+
+        # Route spans from the boundaries of the sorted route column, compared in Arrow.
+        codes = _flat(table.column("route_code"))
+        if pa.types.is_dictionary(codes.type):
+            codes = codes.cast(codes.type.value_type)
+        rows = len(codes)
+        changed = pc.not_equal(codes[1:], codes[:-1]).to_numpy(zero_copy_only=False) if rows else np.empty(0, bool)
+        starts = np.flatnonzero(np.concatenate([[rows > 0], changed]))
+        stops = np.append(starts[1:], rows)[: len(starts)]
+        names = codes.take(pa.array(starts, type=pa.int64())).to_pylist()
+        self._spans: Dict[str, Tuple[int, int]] = dict(zip(names, zip(starts.tolist(), stops.tolist())))
+        self._route_keys = functools.lru_cache(maxsize=route_cache_size)(self._decode_route_keys)
+
+        # Cubes are sorted by week label, which orders the keys the same way unless labels
+        # carry whitespace or a ``.0`` suffix; only then is a key-sorted permutation kept.
+        self._order: Optional[np.ndarray] = None
+        if rows:
+            descending = pc.less(self._week_keys[1:], self._week_keys[:-1]).to_numpy(zero_copy_only=False)
+            if (descending & ~changed).any():
+                self._order = pc.sort_indices(
+                    pa.table({"route_code": codes, "week_key": self._week_keys}),
+                    sort_keys=[("route_code", "ascending"), ("week_key", "ascending")],
+                ).to_numpy()
+
+    @classmethod
+    def open(cls, path: Path = DEFAULT_CUBE_PATH, *, route_cache_size: int = DEFAULT_ROUTE_CACHE_SIZE) -> "KpiCube":
+        """Memory-map a cube written by :func:`write_kpi_cube`."""
+        source = Path(path)
+        if not source.exists():
+            raise FileNotFoundError(f"KPI cube not found: {source}")
+        table = pa.ipc.open_file(pa.memory_map(str(source), "r")).read_all()
+        return cls(table, route_cache_size=route_cache_size)
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __contains__(self, key: Tuple[str, object]) -> bool:
+        route_code, week = key
+        return self._position(route_code, week) is not None
+
+    def _position(self, route_code: str, week: object) -> Optional[int]:
+        span = self._spans.get(route_code)
+        if span is None:
+            return None
+        keys, positions = self._route_keys(route_code, *span)
+        week_key = normalize_week(week)
+        index = bisect.bisect_left(keys, week_key)
+        if index < len(keys) and keys[index] == week_key:
+            return positions[index]
+        return None
+
+    def _decode_route_keys(self, route_code: str, start: int, stop: int) -> Tuple[List[str], Sequence[int]]:
+        """The sorted week keys of one route span and the row each one lives in."""
+        if self._order is None:
+            return self._week_keys.slice(start, stop - start).to_pylist(), range(start, stop)
+        rows = self._order[start:stop]
+        return self._week_keys.take(pa.array(rows)).to_pylist(), rows.tolist()
+
+    @property
+    def routes(self) -> List[str]:
+        return list(self._spans)
+
+    def weeks(self, route_code: str) -> List[str]:
+        start, stop = self._spans.get(route_code, (0, 0))
+        return self._week.slice(start, stop - start).to_pylist()
+
+    def lookup(self, route_code: str, week: object) -> Optional[Mapping[str, object]]:
+        """Return KPIs for one route-week in the shape of the backend's ``calculateKPIs``."""
+        position = self._position(route_code, week)
+        if position is None:
+            return None
+
+        values = _clean([column[position] for column in self._rows])
+        kpi_count = len(KPI_COLUMNS)
+        return {
+            "routeCode": route_code,
+            "week": week,
+            **dict(zip(KPI_COLUMNS, values[:kpi_count])),
+            "raw": dict(zip(RAW_COLUMNS, values[kpi_count:])),
+        }
+
+    def trend(self, route_code: str, weeks: Optional[Iterable[object]] = None) -> List[Mapping[str, object]]:
+        """Return the KPI series for a route in the shape of ``fetchKpiTrend``."""
+        start, stop = self._spans.get(route_code, (0, 0))
+        if weeks:
+            found = (self._position(route_code, week) for week in weeks)
+            positions = np.array(sorted({position for position in found if position is not None}), dtype=np.int64)
+        else:
+            positions = np.arange(start, stop)
+
+        labels = self._week.take(pa.array(positions, type=pa.int64())).to_pylist()
+        series = [self._values[name][positions].tolist() for name in ("sdei", "sdcui", "sii")]
+        return [
+            {"week": label, **dict(zip(("sdei", "sdcui", "sii"), _clean(list(values))))}
+            for label, values in zip(labels, zip(*series))
+        ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Materialise the route x week KPI cube.")
+    parser.add_argument("--data-dir", type=Path, default=None, help="Directory holding the Parquet extracts")
+    parser.add_argument("--output", type=Path, default=DEFAULT_CUBE_PATH, help="Destination Arrow IPC file")
+    parser.add_argument("--precision", type=int, default=4, help="Decimal places to round KPIs to")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    path = build_kpi_cube(data_dir=args.data_dir, output=args.output, precision=args.precision)
+    cube = KpiCube.open(path)
+    print(f"Wrote {len(cube)} route-weeks for {len(cube.routes)} routes to {path} in {time.perf_counter() - started:.2f}s")
+
+
+__all__ = [
+    "DEFAULT_CUBE_PATH",
+    "KpiCube",
+    "build_kpi_cube",
+    "build_kpi_cube_table",
+    "write_kpi_cube",
+]
+
+
+if __name__ == "__main__":
+    main()
+
@@ -7,8 +7,11 @@ running system.
 """
 from __future__ import annotations
 
+import datetime as dt
 from dataclasses import dataclass
-from typing import Mapping, Optional
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
 
 Precision = int
 
@@ -118,3 +121,275 @@ def summarize_kpis(values: Mapping[str, Optional[float]] | KpiInput, *, precisio
         "sii": sii,
         "rpi": rpi,
     }
+
+
+# ----------------------------------------------------------------------
+# Columnar KPI engine
+# ----------------------------------------------------------------------
+# The helpers below evaluate the same formulas over whole columns at once. Results are
+# ``float64`` arrays where ``NaN`` stands in for the ``None`` returned by the scalar API.
+
+
+def _coerce_float(value: object) -> float:
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _as_float_array(values: object) -> np.ndarray:
+    """Convert a column (Series, array, list or scalar) into a ``float64`` array.
+
+    Non-numeric entries become ``NaN``, matching the ``TypeError``/``ValueError`` branch of
+    :func:`_safe_divide`. Object columns fall back to element-wise ``float()`` so that
+    numeric strings and ``Decimal`` values convert exactly as they do in the scalar path.
+    """
+    if values is None:
+        return np.asarray(np.nan)
+
+    to_numpy = getattr(values, "to_numpy", None)
+    if to_numpy is not None:
+        try:
+            return to_numpy(dtype=np.float64, na_value=np.nan)
+        except (TypeError, ValueError):
+            values = to_numpy(dtype=object)
+
+    array = np.asarray(values)
+    if array.dtype.kind in "biuf":
+        return array.astype(np.float64)
+
+    flat = np.fromiter((_coerce_float(value) for value in array.ravel()), dtype=np.float64, count=array.size)
+    return flat.reshape(array.shape)
+
+
+def _round_array(values: np.ndarray, precision: Precision) -> np.ndarray:
+    """Round ``values`` element-wise with the exact semantics of the built-in :func:`round`.
+
+    ``np.round`` scales by ``10**precision`` and can disagree with :func:`round` when the
+    scaled value lands next to a half-way point. Those rare entries (and anything too
+    large to scale exactly) are re-rounded with :func:`round` so the output is bit-for-bit
+    identical to the scalar helpers.
+    """
+    if precision < 0 or precision > 22:
+        rounder = np.frompyfunc(lambda value: round(float(value), precision), 1, 1)
+        return rounder(values).astype(np.float64)
+
+    scale = 10.0 ** precision
+    with np.errstate(over="ignore", invalid="ignore"):
+        scaled = values * scale
+        rounded = np.rint(scaled) / scale
+        fraction = np.abs(scaled - np.trunc(scaled))
+        ambiguous = np.isfinite(values) & (
+            (np.abs(fraction - 0.5) <= 4 * np.spacing(np.abs(scaled))) | ~(np.abs(scaled) < 2.0 ** 52)
+        )
+
+    if ambiguous.any():
+        rounded[ambiguous] = [round(float(value), precision) for value in values[ambiguous]]
+    return rounded
+
+
+def _safe_divide_array(numerator: object, denominator: object, precision: Precision = 4) -> np.ndarray:
+    """Vectorised counterpart of :func:`_safe_divide`; zero or missing denominators yield ``NaN``."""
+    numerators, denominators = np.broadcast_arrays(_as_float_array(numerator), _as_float_array(denominator))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.where(denominators == 0, np.nan, numerators / np.where(denominators == 0, 1.0, denominators))
+    return _round_array(result, precision)
+
+
+def calculate_sdei_array(available: object, loaded: object, *, precision: Precision = 4) -> np.ndarray:
+    """Column-wise :func:`calculate_sdei`."""
+    return _safe_divide_array(available, loaded, precision)
+
+
+def calculate_sdcui_array(used: object, total: object, *, precision: Precision = 4) -> np.ndarray:
+    """Column-wise :func:`calculate_sdcui`."""
+    return _safe_divide_array(used, total, precision)
+
+
+def calculate_sii_array(
+    avg_stop_duration: object,
+    trips_over_five_minutes: object,
+    total_trips: object,
+    *,
+    precision: Precision = 4,
+) -> np.ndarray:
+    """Column-wise :func:`calculate_sii`, including the intermediate ratio rounding."""
+    stop_ratio = _safe_divide_array(trips_over_five_minutes, total_trips, precision)
+    with np.errstate(invalid="ignore", over="ignore"):
+        value = _as_float_array(avg_stop_duration) * stop_ratio
+    return _round_array(value, precision)
+
+
+def calculate_rpi_array(performance_variation: object, *, precision: Precision = 4) -> np.ndarray:
+    """Column-wise :func:`calculate_rpi`."""
+    return _round_array(_as_float_array(performance_variation), precision)
+
+
+def summarize_kpis_columnar(values: Mapping[str, object], *, precision: Precision = 4) -> Dict[str, np.ndarray]:
+    """Compute all primary KPIs for every row of a DataFrame or mapping of column arrays.
+
+    Accepts anything indexable by the :class:`KpiInput` field names, such as a
+    :class:`pandas.DataFrame` or ``{"available": np.ndarray, ...}``. Missing columns are
+    treated like missing keys in :func:`summarize_kpis` and produce ``NaN`` throughout.
+    """
+
+    def column(name: str) -> object:
+        return values[name] if name in values else None
+
+    results = {
+        "sdei": calculate_sdei_array(column("available"), column("loaded"), precision=precision),
+        "sdcui": calculate_sdcui_array(column("used"), column("total"), precision=precision),
+        "sii": calculate_sii_array(
+            column("avg_stop_duration"),
+            column("trips_over_five"),
+            column("total_trips"),
+            precision=precision,
+        ),
+        "rpi": calculate_rpi_array(column("performance_variation"), precision=precision),
+    }
+
+    shape = np.broadcast_shapes(*(array.shape for array in results.values()))
+    if hasattr(values, "columns"):
+        shape = np.broadcast_shapes(shape, (len(values),))
+    return {
+        name: array if array.shape == shape else np.broadcast_to(array, shape).copy()
+        for name, array in results.items()
+    }
+
+
+# ----------------------------------------------------------------------
+# Trend aggregation
+# ----------------------------------------------------------------------
+# Reference implementation of the ``resolution`` option of ``POST /api/kpi/:route/trend``.
+# Weeks are grouped into calendar periods and the raw inputs of each period are pooled
+# before the ratios are taken, so a monthly SDEI is ``sum(available) / sum(loaded)`` and
+# not the mean of the weekly SDEI values. Each ratio pools only the weeks that report both
+# of its inputs, and a period of a single week keeps the backend's per-row formulas.
+
+TREND_RESOLUTIONS = ("week", "month", "quarter", "auto")
+TREND_MAX_POINTS = 60
+
+# (numerator, denominator) pairs pooled together.
+_PAIRED_INPUTS = (("available", "loaded"), ("used", "total"), ("trips_over_five", "total_trips"))
+
+
+def trend_period(week: object, resolution: str) -> str:
+    """Label of the ``resolution`` period that contains the ``YYYYWW`` ISO ``week``.
+
+    A week belongs to the month holding its Thursday (``"2024-01"``) and to that month's
+    quarter (``"2024-Q1"``). Labels that are not ``YYYYWW`` weeks are their own period.
+    """
+    label = str(week)
+    if resolution == "week":
+        return label
+    text = label.strip()
+    if len(text) != 6 or not text.isdigit():
+        return label
+    try:
+        thursday = dt.date.fromisocalendar(int(text[:4]), int(text[4:]), 4)
+    except ValueError:
+        return label
+    if resolution == "month":
+        return f"{thursday.year}-{thursday.month:02d}"
+    return f"{thursday.year}-Q{(thursday.month - 1) // 3 + 1}"
+
+
+def resolve_trend_resolution(weeks: Iterable[object], resolution: str, *, max_points: int = TREND_MAX_POINTS) -> str:
+    """Resolve ``"auto"`` to the finest resolution with at most ``max_points`` periods."""
+    if resolution not in TREND_RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {', '.join(TREND_RESOLUTIONS)}")
+    if resolution != "auto":
+        return resolution
+    weeks = list(weeks)
+    for candidate in ("week", "month"):
+        if len({trend_period(week, candidate) for week in weeks}) <= max_points:
+            return candidate
+    return "quarter"
+
+
+def _as_number(value: object) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(number) else number
+
+
+def pool_kpi_inputs(records: Iterable[Mapping[str, object]]) -> Dict[str, Optional[float]]:
+    """Combine the raw KPI inputs of several weeks into one :class:`KpiInput` mapping.
+
+    Each numerator and its denominator (``available``/``loaded``, ``used``/``total``,
+    ``trips_over_five``/``total_trips``) are summed over the records that carry both, so a
+    week missing one side of a ratio does not skew it. ``avg_stop_duration`` is averaged
+    with ``total_trips`` as the weight. Ratios no record can supply stay ``None``.
+    """
+    pooled: Dict[str, Optional[float]] = {name: None for pair in _PAIRED_INPUTS for name in pair}
+    duration_weight = 0.0
+    duration_trips = 0.0
+    for record in records:
+        for numerator, denominator in _PAIRED_INPUTS:
+            top, bottom = _as_number(record.get(numerator)), _as_number(record.get(denominator))
+            if top is not None and bottom is not None:
+                pooled[numerator] = (pooled[numerator] or 0.0) + top
+                pooled[denominator] = (pooled[denominator] or 0.0) + bottom
+        duration = _as_number(record.get("avg_stop_duration"))
+        trips = _as_number(record.get("total_trips"))
+        if duration is not None and trips:
+            duration_weight += duration * trips
+            duration_trips += trips
+    pooled["avg_stop_duration"] = duration_weight / duration_trips if duration_trips else None
+    return pooled
+
+
+def _single_week_kpis(record: Mapping[str, object], precision: Precision) -> Dict[str, Optional[float]]:
+    """KPIs of one stored week as the backend trend computes them per row.
+
+    Unlike :func:`calculate_sii`, a missing ``trips_over_five`` gives an SII of ``0``
+    whenever the stop duration and trip count are set.
+    """
+    duration, trips = _as_number(record.get("avg_stop_duration")), _as_number(record.get("total_trips"))
+    sii = None
+    if duration and trips:
+        stop_ratio = _safe_divide(_as_number(record.get("trips_over_five")), trips, precision)
+        sii = round(duration * (stop_ratio or 0.0), precision)
+    return {
+        "sdei": calculate_sdei(_as_number(record.get("available")), _as_number(record.get("loaded")), precision=precision),
+        "sdcui": calculate_sdcui(_as_number(record.get("used")), _as_number(record.get("total")), precision=precision),
+        "sii": sii,
+    }
+
+
+def aggregate_trend(
+    records: Iterable[Mapping[str, object]],
+    resolution: str = "week",
+    *,
+    max_points: int = TREND_MAX_POINTS,
+    precision: Precision = 4,
+) -> Tuple[str, List[Dict[str, object]]]:
+    """Aggregate per-week raw KPI inputs into a trend at ``resolution``.
+
+    ``records`` carry a ``week`` plus the raw input fields. Returns the applied resolution
+    (``"auto"`` resolved) and one ``{"week", "weeks", "sdei", "sdcui", "sii"}`` point per
+    period in label order, matching the backend trend endpoint.
+    """
+    records = list(records)
+    applied = resolve_trend_resolution((record.get("week") for record in records), resolution, max_points=max_points)
+    periods: Dict[str, List[Mapping[str, object]]] = {}
+    for record in records:
+        periods.setdefault(trend_period(record.get("week"), applied), []).append(record)
+
+    points = []
+    for label in sorted(periods):
+        members = periods[label]
+        if len(members) == 1:
+            kpis = _single_week_kpis(members[0], precision)
+        else:
+            kpis = summarize_kpis(pool_kpi_inputs(members), precision=precision)
+        points.append(
+            {"week": label, "weeks": len(members), "sdei": kpis["sdei"], "sdcui": kpis["sdcui"], "sii": kpis["sii"]}
+        )
+    return applied, points
@@ -0,0 +1,217 @@
+"""Process-pool ingestion of many county-pair and Transearch extracts.
+
+Each file is decoded and normalised into backend payload columns in its own worker
+process. Results are merged in file order and deduplicated on ``(route_code, week)`` so
+that the last file to mention a route-week wins, exactly like repeated upserts against the
+backend's unique index would, independent of how many workers were used.
+
+Run it as a script to normalise a refresh drop and print per-file throughput::
+
+    python -m code.parallel_ingestion --county-pair-glob "county_pair_move_data_*.parquet" --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .ingestion_utils import (
+    DatasetPaths,
+    build_orbcomm_payloads,
+    build_transearch_payloads,
+    load_parquet,
+    normalize_week,
+    week_label,
+)
+
+_BUILDERS = {
+    "orbcomm": build_orbcomm_payloads,
+    "transearch": build_transearch_payloads,
+}
+
+
+@dataclass(frozen=True)
+class FileIngestionStats:
+    """Timing for a single normalised file."""
+
+    path: Path
+    rows: int
+    bytes: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / 1024 ** 2 / self.seconds if self.seconds > 0 else float("inf")
+
+
+@dataclass
+class IngestionResult:
+    """Merged, deduplicated payload rows plus per-file statistics."""
+
+    frame: pd.DataFrame
+    files: List[FileIngestionStats] = field(default_factory=list)
+    duplicates_dropped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_read(self) -> int:
+        return sum(stats.rows for stats in self.files)
+
+
+def _normalize_file(task: Tuple[str, str]) -> Tuple[pa.Table, FileIngestionStats]:
+    """Worker entry point: load one file and return its payload table and timing."""
+    kind, path = task
+    started = time.perf_counter()
+    frame = load_parquet(Path(path))
+    table = _BUILDERS[kind](frame, output="arrow")
+    stats = FileIngestionStats(
+        path=Path(path),
+        rows=table.num_rows,
+        bytes=os.path.getsize(path),
+        seconds=time.perf_counter() - started,
+    )
+    return table, stats
+
+
+def merge_payload_tables(tables: Sequence[pa.Table]) -> Tuple[pd.DataFrame, int]:
+    """Concatenate payload tables in order and keep the last row per (route_code, week).
+
+    Rows without a route or week are dropped, as in the backend. Weeks are rendered the
+    way the backend stores them, and the result is sorted by ``(route_code, week)`` so the
+    output does not depend on worker scheduling.
+    """
+    frames = [table.to_pandas() for table in tables if table.num_rows]
+    if not frames:
+        return pd.DataFrame(), 0
+
+    merged = pd.concat(frames, ignore_index=True)
+    merged = merged[merged["route_code"].notna() & merged["week"].notna()]
+    merged = merged.assign(week=merged["week"].map(week_label))
+    week_keys = merged["week"].map(normalize_week)
+    duplicated = pd.DataFrame({"route_code": merged["route_code"], "week": week_keys}).duplicated(keep="last")
+
+    deduplicated = merged[~duplicated.to_numpy()]
+    deduplicated = deduplicated.sort_values(["route_code", "week"], kind="stable").reset_index(drop=True)
+    return deduplicated, int(duplicated.sum())
+
+
+def ingest_files(
+    paths: Sequence[Path],
+    *,
+    kind: str = "orbcomm",
+    max_workers: Optional[int] = None,
+) -> IngestionResult:
+    """Normalise ``paths`` in parallel and merge them with last-write-wins semantics.
+
+    ``kind`` selects the payload shape (``"orbcomm"`` or ``"transearch"``). With
+    ``max_workers=1`` everything runs in-process, which is handy in notebooks and on
+    platforms without ``fork``.
+    """
+    if kind not in _BUILDERS:
+        raise ValueError(f"Unsupported dataset kind '{kind}'. Expected one of {tuple(_BUILDERS)}")
+
+    started = time.perf_counter()
+    tasks = [(kind, str(path)) for path in paths]
+    if max_workers == 1 or len(tasks) <= 1:
+        outputs = [_normalize_file(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # ``map`` yields in submission order, which keeps the merge deterministic.
+            outputs = list(executor.map(_normalize_file, tasks))
+
+    frame, duplicates = merge_payload_tables([table for table, _ in outputs])
+    return IngestionResult(
+        frame=frame,
+        files=[stats for _, stats in outputs],
+        duplicates_dropped=duplicates,
+        seconds=time.perf_counter() - started,
+    )
+
+
+def ingest_datasets(
+    paths: Optional[DatasetPaths] = None,
+    *,
+    data_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+) -> Tuple[IngestionResult, IngestionResult]:
+    """Ingest every county-pair and Transearch file described by ``paths``.
+
+    Files that do not exist (such as the default sample path of a dataset the drop does
+    not include) are skipped, so that dataset's result is simply empty.
+    """
+    resolved = (paths or DatasetPaths()).resolve(base_dir=data_dir)
+    county_files = [path for path in resolved.county_pair_files if path.exists()]
+    transearch_files = [path for path in resolved.transearch_files if path.exists()]
+    county = ingest_files(county_files, kind="orbcomm", max_workers=max_workers)
+    transearch = ingest_files(transearch_files, kind="transearch", max_workers=max_workers)
+    return county, transearch
+
+
+def format_report(result: IngestionResult) -> str:
+    """Render per-file throughput as a plain-text table."""
+    lines = [f"{'file':<48}{'rows':>12}{'seconds':>10}{'rows/s':>14}{'MB/s':>9}"]
+    for stats in result.files:
+        lines.append(
+            f"{stats.path.name[:47]:<48}{stats.rows:>12,}{stats.seconds:>10.2f}"
+            f"{stats.rows_per_second:>14,.0f}{stats.megabytes_per_second:>9.1f}"
+        )
+    lines.append(
+        f"{len(result.files)} files, {result.rows_read:,} rows read, {len(result.frame):,} kept, "
+        f"{result.duplicates_dropped:,} duplicates dropped in {result.seconds:.2f}s"
+    )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Normalise many Parquet extracts in parallel.")
+    parser.add_argument("--data-dir", type=Path, default=None, help="Base directory for patterns and files")
+    parser.add_argument("--county-pair-glob", default=None, help="Glob for county pair files, e.g. 'county_pair_*.parquet'")
+    parser.add_argument("--transearch-glob", default=None, help="Glob for Transearch files")
+    parser.add_argument("--manifest", type=Path, default=None, help="JSON manifest listing files per dataset")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (defaults to the CPU count)")
+    parser.add_argument("--output-dir", type=Path, default=None, help="Write merged Parquet files here")
+    args = parser.parse_args(argv)
+
+    paths = DatasetPaths(
+        county_pair_glob=args.county_pair_glob,
+        transearch_glob=args.transearch_glob,
+        manifest=args.manifest,
+    )
+    county, transearch = ingest_datasets(paths, data_dir=args.data_dir, max_workers=args.workers)
+    for label, result in (("County pair moves", county), ("Transearch", transearch)):
+        print(label)
+        print(format_report(result))
+        print()
+
+    if args.output_dir is not None:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        for name, result in (("county_pair_moves", county), ("transearch", transearch)):
+            if not result.files:
+                continue
+            pq.write_table(pa.Table.from_pandas(result.frame, preserve_index=False), args.output_dir / f"{name}.parquet")
+
+
+__all__ = [
+    "FileIngestionStats",
+    "IngestionResult",
+    "format_report",
+    "ingest_datasets",
+    "ingest_files",
+    "merge_payload_tables",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,514 @@
+"""Incremental rolling KPI analytics.
+
+Moving averages, week-over-week deltas and cross-route percentiles are usually derived by
+reloading every route-week and recomputing. :class:`RollingKpiEngine` instead keeps, per
+route, the KPIs of its last ``window`` weeks together with running sums, and per week a
+:class:`QuantileSketch` of each KPI across routes. Adding a route-week is O(``window``) in
+the worst case (O(1) for the usual append) and never touches other routes::
+
+    engine = RollingKpiEngine.load()          # or RollingKpiEngine(window=4)
+    engine.update_raw("06037-04019", "202402", raw_inputs)
+    engine.summary("06037-04019")             # sdei, sdei_avg, sdei_delta, sdei_pct, ...
+    engine.save()
+
+The state is a small JSON document, so a weekly job can feed the delta written by
+:mod:`code.incremental_ingestion` and persist the result::
+
+    python -m code.rolling_kpis data/delta/county.parquet
+
+Weeks must arrive in order per route. The window follows calendar weeks: ISO weeks a route
+skips become empty slots, so ``*_avg`` covers the last ``window`` calendar weeks and
+``*_delta`` is only set for two consecutive weeks. A week still inside a route's window
+(a skipped one included) may be revised; an older week raises :class:`ValueError` and
+needs a rebuild from the full data.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import math
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .ingestion_utils import DEFAULT_DATA_DIR, load_parquet, normalize_week, week_label, week_sort_key
+from .kpi_utils import Precision, summarize_kpis, summarize_kpis_columnar
+
+DEFAULT_STATE_PATH = DEFAULT_DATA_DIR / "rolling_kpis.json"
+DEFAULT_WINDOW = 4
+DEFAULT_METRICS = ("sdei", "sdcui", "sii")
+DEFAULT_RELATIVE_ACCURACY = 0.01
+STATE_VERSION = 1
+
+# Values closer to zero than this share the sketch's zero bucket.
+_MIN_INDEXABLE = 1e-9
+
+
+# ----------------------------------------------------------------------
+# Streaming quantiles
+# ----------------------------------------------------------------------
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch-style).
+
+    Values are counted in logarithmic buckets, so any quantile is returned within
+    ``relative_accuracy`` of the true value whatever the distribution. Buckets are
+    deterministic, which makes :meth:`remove` exact and lets a revised route-week replace
+    its previous value.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.count = 0
+        self.zero = 0
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _bucket(self, value: float) -> Optional[int]:
+        magnitude = abs(value)
+        if magnitude < _MIN_INDEXABLE:
+            return None
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _representative(self, index: int) -> float:
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        index = self._bucket(value)
+        if index is None:
+            self.zero += count
+        else:
+            store = self.positive if value > 0 else self.negative
+            store[index] = store.get(index, 0) + count
+        self.count += count
+
+    def remove(self, value: float) -> None:
+        """Forget one previously added ``value``."""
+        index = self._bucket(value)
+        if index is None:
+            if not self.zero:
+                raise ValueError(f"{value!r} is not in the sketch")
+            self.zero -= 1
+        else:
+            store = self.positive if value > 0 else self.negative
+            remaining = store.get(index, 0) - 1
+            if remaining < 0:
+                raise ValueError(f"{value!r} is not in the sketch")
+            if remaining:
+                store[index] = remaining
+            else:
+                del store[index]
+        self.count -= 1
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for store, incoming in ((self.positive, other.positive), (self.negative, other.negative)):
+            for index, count in incoming.items():
+                store[index] = store.get(index, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+
+    def _ordered(self) -> Iterable[tuple]:
+        # Ascending value order: large negatives, small negatives, zero, then positives.
+        for index in sorted(self.negative, reverse=True):
+            yield -self._representative(index), self.negative[index]
+        if self.zero:
+            yield 0.0, self.zero
+        for index in sorted(self.positive):
+            yield self._representative(index), self.positive[index]
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = min(max(q, 0.0), 1.0) * (self.count - 1)
+        seen = 0
+        for value, count in self._ordered():
+            seen += count
+            if seen > rank:
+                return value
+        return None
+
+    def rank(self, value: float) -> Optional[float]:
+        """Fraction of values less than or equal to ``value`` (its percentile rank)."""
+        if not self.count:
+            return None
+        index = self._bucket(value)
+        if index is None:
+            below = sum(self.negative.values()) + self.zero
+        elif value > 0:
+            below = sum(self.negative.values()) + self.zero
+            below += sum(count for key, count in self.positive.items() if key <= index)
+        else:
+            below = sum(count for key, count in self.negative.items() if key >= index)
+        return below / self.count
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "zero": self.zero,
+            "positive": {str(index): count for index, count in self.positive.items()},
+            "negative": {str(index): count for index, count in self.negative.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Mapping[str, object], relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> "QuantileSketch":
+        sketch = cls(relative_accuracy)
+        sketch.count = int(payload.get("count", 0))
+        sketch.zero = int(payload.get("zero", 0))
+        sketch.positive = {int(index): int(count) for index, count in dict(payload.get("positive", {})).items()}
+        sketch.negative = {int(index): int(count) for index, count in dict(payload.get("negative", {})).items()}
+        return sketch
+
+
+# ----------------------------------------------------------------------
+# Per-route window state
+# ----------------------------------------------------------------------
+def _iso_monday(week_key: str) -> Optional[dt.date]:
+    if len(week_key) != 6 or not week_key.isdigit():
+        return None
+    try:
+        return dt.date.fromisocalendar(int(week_key[:4]), int(week_key[4:]), 1)
+    except ValueError:
+        return None
+
+
+def _skipped_weeks(previous: str, current: str, limit: int) -> List[str]:
+    """The last ``limit`` ISO weeks strictly between two ``YYYYWW`` keys (none for other labels)."""
+    start, stop = _iso_monday(previous), _iso_monday(current)
+    if start is None or stop is None:
+        return []
+    skipped = (stop - start).days // 7 - 1
+    weeks = []
+    for offset in range(max(skipped - limit, 0) + 1, skipped + 1):
+        year, number, _ = (start + dt.timedelta(weeks=offset)).isocalendar()
+        weeks.append(f"{year}{number:02d}")
+    return weeks
+
+
+@dataclass
+class RouteWindow:
+    """The last ``window`` weeks of one route with running sums per metric.
+
+    Values are rounded to ``precision`` and summed as integers in units of the last
+    decimal place, so adding and evicting weeks never accumulates floating-point drift.
+    """
+
+    window: int
+    metrics: Sequence[str]
+    precision: Precision = 4
+    weeks: Deque[str] = field(default_factory=deque)
+    labels: Deque[str] = field(default_factory=deque)
+    values: Dict[str, Deque[Optional[float]]] = field(default_factory=dict)
+    sums: Dict[str, int] = field(default_factory=dict)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for metric in self.metrics:
+            self.values.setdefault(metric, deque())
+        self._recount()
+
+    def _recount(self) -> None:
+        for metric in self.metrics:
+            present = [value for value in self.values[metric] if value is not None]
+            self.sums[metric] = sum(self._units(value) for value in present)
+            self.counts[metric] = len(present)
+
+    def _units(self, value: float) -> int:
+        return round(value * 10 ** self.precision)
+
+    def _add(self, metric: str, value: Optional[float], sign: int) -> None:
+        if value is not None:
+            self.sums[metric] += sign * self._units(value)
+            self.counts[metric] += sign
+
+    def push(self, week_key: str, label: str, kpis: Mapping[str, Optional[float]]) -> Dict[str, Optional[float]]:
+        """Append or revise ``week_key``; return the metric values it replaced, if any.
+
+        ISO weeks skipped since the newest week are appended as empty slots first.
+        """
+        if week_key in self.weeks:
+            position = self.weeks.index(week_key)
+            replaced = {}
+            for metric in self.metrics:
+                previous = self.values[metric][position]
+                self._add(metric, previous, -1)
+                self.values[metric][position] = kpis.get(metric)
+                self._add(metric, kpis.get(metric), 1)
+                replaced[metric] = previous
+            self.labels[position] = label
+            return replaced
+        if self.weeks and week_sort_key(week_key) < week_sort_key(self.weeks[-1]):
+            if len(self.weeks) == self.window and week_sort_key(week_key) < week_sort_key(self.weeks[0]):
+                raise ValueError(f"Week {label} is older than the rolling window; rebuild the state")
+            raise ValueError(f"Week {label} arrived after {self.labels[-1]}; rebuild the state")
+
+        if self.weeks:
+            for skipped in _skipped_weeks(self.weeks[-1], week_key, self.window):
+                self._append(skipped, skipped, {})
+        self._append(week_key, label, kpis)
+        return {}
+
+    def _append(self, week_key: str, label: str, kpis: Mapping[str, Optional[float]]) -> None:
+        self.weeks.append(week_key)
+        self.labels.append(label)
+        if len(self.weeks) > self.window:
+            self.weeks.popleft()
+            self.labels.popleft()
+            evict = True
+        else:
+            evict = False
+        for metric in self.metrics:
+            self.values[metric].append(kpis.get(metric))
+            self._add(metric, kpis.get(metric), 1)
+            if evict:
+                self._add(metric, self.values[metric].popleft(), -1)
+
+    def mean(self, metric: str) -> Optional[float]:
+        count = self.counts[metric]
+        return self.sums[metric] / count / 10 ** self.precision if count else None
+
+    def delta(self, metric: str) -> Optional[float]:
+        values = self.values[metric]
+        if len(values) < 2 or values[-1] is None or values[-2] is None:
+            return None
+        return values[-1] - values[-2]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "weeks": list(self.labels),
+            "values": {metric: list(self.values[metric]) for metric in self.metrics},
+        }
+
+    @classmethod
+    def from_dict(
+        cls, payload: Mapping[str, object], window: int, metrics: Sequence[str], precision: Precision = 4
+    ) -> "RouteWindow":
+        labels = [str(label) for label in payload.get("weeks", [])]
+        values = dict(payload.get("values", {}))
+        return cls(
+            window=window,
+            metrics=metrics,
+            precision=precision,
+            weeks=deque(normalize_week(label) for label in labels),
+            labels=deque(labels),
+            values={metric: deque(values.get(metric) or [None] * len(labels)) for metric in metrics},
+        )
+
+
+# ----------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------
+def _clean(value: object) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+class RollingKpiEngine:
+    """Running per-route windows and per-week cross-route sketches of the KPIs."""
+
+    def __init__(
+        self,
+        *,
+        window: int = DEFAULT_WINDOW,
+        metrics: Sequence[str] = DEFAULT_METRICS,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        precision: Precision = 4,
+    ) -> None:
+        if window < 2:
+            raise ValueError("window must cover at least two weeks")
+        self.window = window
+        self.metrics = tuple(metrics)
+        self.relative_accuracy = relative_accuracy
+        self.precision = precision
+        self._routes: Dict[str, RouteWindow] = {}
+        self._sketches: Dict[str, Dict[str, QuantileSketch]] = {metric: {} for metric in self.metrics}
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def __contains__(self, route_code: object) -> bool:
+        return route_code in self._routes
+
+    @property
+    def routes(self) -> List[str]:
+        return list(self._routes)
+
+    def _sketch(self, metric: str, week_key: str) -> QuantileSketch:
+        sketches = self._sketches[metric]
+        sketch = sketches.get(week_key)
+        if sketch is None:
+            sketch = sketches[week_key] = QuantileSketch(self.relative_accuracy)
+        return sketch
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def update(self, route_code: str, week: object, kpis: Mapping[str, object]) -> Dict[str, object]:
+        """Fold one route-week of computed KPIs into the state and return its summary."""
+        label = week_label(week)
+        week_key = normalize_week(label)
+        values = {metric: self._round(_clean(kpis.get(metric))) for metric in self.metrics}
+        state = self._routes.get(route_code)
+        if state is None:
+            state = self._routes[route_code] = RouteWindow(window=self.window, metrics=self.metrics, precision=self.precision)
+
+        replaced = state.push(week_key, label, values)
+        for metric, value in values.items():
+            sketch = self._sketch(metric, week_key)
+            if replaced.get(metric) is not None:
+                sketch.remove(replaced[metric])
+            if value is not None:
+                sketch.add(value)
+        return self.summary(route_code)
+
+    def update_raw(self, route_code: str, week: object, raw: Mapping[str, object]) -> Dict[str, object]:
+        """Like :meth:`update` but from raw inputs, computed with :func:`summarize_kpis`."""
+        return self.update(route_code, week, summarize_kpis(raw, precision=self.precision))
+
+    def update_frame(self, frame: pd.DataFrame) -> int:
+        """Apply every row of a ``route_code``/``week`` frame in week order; return the row count.
+
+        KPI columns are used when present (a :class:`~code.kpi_cube.KpiCube` table, for
+        example); otherwise they are computed from the raw inputs with
+        :func:`summarize_kpis_columnar`.
+        """
+        if frame.empty:
+            return 0
+        frame = frame[frame["route_code"].notna() & frame["week"].notna()]
+        if not all(metric in frame.columns for metric in self.metrics):
+            frame = frame.assign(**summarize_kpis_columnar(frame, precision=self.precision))
+        codes = frame["route_code"].astype(str).tolist()
+        weeks = frame["week"].tolist()
+        columns = {metric: frame[metric].to_numpy(dtype=np.float64) for metric in self.metrics}
+        order = sorted(range(len(codes)), key=lambda position: week_sort_key(normalize_week(week_label(weeks[position]))))
+        for position in order:
+            self.update(codes[position], weeks[position], {metric: columns[metric][position] for metric in self.metrics})
+        return len(order)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _round(self, value: Optional[float]) -> Optional[float]:
+        return round(value, self.precision) if value is not None else None
+
+    def summary(self, route_code: str) -> Optional[Dict[str, object]]:
+        """Latest week, window mean, week-over-week delta and percentile rank per metric."""
+        state = self._routes.get(route_code)
+        if state is None or not state.weeks:
+            return None
+        week_key = state.weeks[-1]
+        row: Dict[str, object] = {"routeCode": route_code, "week": state.labels[-1], "weeks": len(state.weeks)}
+        for metric in self.metrics:
+            value = state.values[metric][-1]
+            sketch = self._sketches[metric].get(week_key)
+            row[metric] = value
+            row[f"{metric}_avg"] = self._round(state.mean(metric))
+            row[f"{metric}_delta"] = self._round(state.delta(metric))
+            row[f"{metric}_pct"] = self._round(sketch.rank(value)) if sketch is not None and value is not None else None
+        return row
+
+    def summaries(self) -> pd.DataFrame:
+        """One :meth:`summary` row per route."""
+        return pd.DataFrame([self.summary(route_code) for route_code in self._routes])
+
+    def percentile(self, metric: str, week: object, q: float) -> Optional[float]:
+        """Approximate ``q`` quantile of ``metric`` across all routes for ``week``."""
+        sketch = self._sketches[metric].get(normalize_week(week_label(week)))
+        return self._round(sketch.quantile(q)) if sketch is not None else None
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "version": STATE_VERSION,
+            "window": self.window,
+            "metrics": list(self.metrics),
+            "relative_accuracy": self.relative_accuracy,
+            "precision": self.precision,
+            "routes": {route_code: state.to_dict() for route_code, state in self._routes.items()},
+            "sketches": {
+                metric: {week_key: sketch.to_dict() for week_key, sketch in sketches.items()}
+                for metric, sketches in self._sketches.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Mapping[str, object]) -> "RollingKpiEngine":
+        if payload.get("version") != STATE_VERSION:
+            raise ValueError("Incompatible rolling KPI state; rebuild it")
+        engine = cls(
+            window=int(payload["window"]),
+            metrics=payload["metrics"],
+            relative_accuracy=float(payload["relative_accuracy"]),
+            precision=int(payload["precision"]),
+        )
+        for route_code, state in dict(payload.get("routes", {})).items():
+            engine._routes[route_code] = RouteWindow.from_dict(state, engine.window, engine.metrics, engine.precision)
+        for metric, sketches in dict(payload.get("sketches", {})).items():
+            engine._sketches[metric] = {
+                week_key: QuantileSketch.from_dict(sketch, engine.relative_accuracy) for week_key, sketch in sketches.items()
+            }
+        return engine
+
+    def save(self, path: Path = DEFAULT_STATE_PATH) -> Path:
+        destination = Path(path)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        temporary = destination.with_suffix(destination.suffix + ".tmp")
+        temporary.write_text(json.dumps(self.to_dict(), separators=(",", ":")), encoding="utf-8")
+        os.replace(temporary, destination)
+        return destination
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_STATE_PATH, **options) -> "RollingKpiEngine":
+        """Read the state at ``path``, or start an empty engine with ``options`` if it is missing."""
+        source = Path(path)
+        if not source.exists():
+            return cls(**options)
+        return cls.from_dict(json.loads(source.read_text(encoding="utf-8")))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Fold new route-weeks into the rolling KPI state.")
+    parser.add_argument("inputs", nargs="+", type=Path, help="Parquet files with route_code, week and raw or KPI columns")
+    parser.add_argument("--state", type=Path, default=DEFAULT_STATE_PATH, help="Rolling state JSON file")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Weeks per moving average (new state only)")
+    parser.add_argument("--dry-run", action="store_true", help="Apply the rows without saving the state")
+    args = parser.parse_args(argv)
+
+    engine = RollingKpiEngine.load(args.state, window=args.window)
+    frame = pd.concat([load_parquet(path) for path in args.inputs], ignore_index=True)
+    applied = engine.update_frame(frame)
+    print(f"Applied {applied:,} route-weeks; {len(engine):,} routes tracked")
+    if not args.dry_run:
+        print(f"Saved {engine.save(args.state)}")
+
+
+__all__ = [
+    "DEFAULT_STATE_PATH",
+    "QuantileSketch",
+    "RollingKpiEngine",
+    "RouteWindow",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""Grid spatial index over Orbcomm telemetry points.
+
+Telemetry is otherwise only reachable one route at a time through ``/api/map/:routeCode``.
+This module buckets every point loaded by :func:`~code.ingestion_utils.load_county_pair_moves`
+into a regular latitude/longitude grid, sorts the points by cell and writes them to a
+memory-mappable Arrow IPC file next to the data::
+
+    python -m code.spatial_index --data-dir data --cell-size 0.05
+
+Within one grid row, the cells covering a bounding box are adjacent cell ids. A query
+therefore reads one contiguous slice per grid row and then filters those candidates
+exactly by coordinates and time::
+
+    index = SpatialIndex.open()
+    index.bbox(33.5, -118.7, 34.4, -117.6, start="2024-01-01", end="2024-02-01")
+    index.radius(34.05, -118.24, km=25, weeks=["202401", "202402"])
+    index.polygon([(34.8, -118.9), (34.8, -117.6), (33.7, -117.6), (33.7, -118.9)])
+    route_summary(points)   # which routes, how many points, first/last seen
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .ingestion_utils import (
+    DEFAULT_DATA_DIR,
+    ORBCOMM_PAYLOAD_FIELDS,
+    CacheOption,
+    _build_payload_frame,
+    load_county_pair_moves,
+    normalize_week,
+    week_label,
+)
+
+DEFAULT_INDEX_PATH = DEFAULT_DATA_DIR / "telemetry_index.arrow"
+DEFAULT_CELL_SIZE = 0.05
+EARTH_RADIUS_KM = 6371.0088
+
+POINT_COLUMNS = ("route_code", "week", "latitude", "longitude", "event_timestamp")
+_POINT_FIELDS = tuple(spec for spec in ORBCOMM_PAYLOAD_FIELDS if spec[0] in POINT_COLUMNS)
+TimeBound = Optional[object]
+
+
+def _cell_coordinates(latitude: np.ndarray, longitude: np.ndarray, cell_size: float) -> Tuple[np.ndarray, np.ndarray]:
+    rows = np.floor((np.clip(latitude, -90.0, 90.0) + 90.0) / cell_size).astype(np.int64)
+    columns = np.floor((np.mod(longitude + 180.0, 360.0)) / cell_size).astype(np.int64)
+    return rows, columns
+
+
+def _grid_columns(cell_size: float) -> int:
+    return int(math.ceil(360.0 / cell_size)) + 1
+
+
+def build_spatial_index_table(frame: pd.DataFrame, *, cell_size: float = DEFAULT_CELL_SIZE) -> pa.Table:
+    """Normalise telemetry rows and return them sorted by grid cell, route and timestamp.
+
+    Column aliases resolve as in the payload builders. Rows without finite coordinates
+    are dropped, and timestamps are stored as UTC microseconds.
+    """
+    if cell_size <= 0:
+        raise ValueError("cell_size must be positive")
+    points = _build_payload_frame(frame, _POINT_FIELDS)
+    latitude = pd.to_numeric(points["latitude"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    longitude = pd.to_numeric(points["longitude"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    keep = np.isfinite(latitude) & np.isfinite(longitude) & points["route_code"].notna().to_numpy()
+    points = points[keep]
+    latitude, longitude = latitude[keep], longitude[keep]
+
+    rows, columns = _cell_coordinates(latitude, longitude, cell_size)
+    cells = rows * _grid_columns(cell_size) + columns
+    timestamps = pd.to_datetime(points["event_timestamp"], errors="coerce", utc=True, format="ISO8601")
+    route_ids, route_values = pd.factorize(points["route_code"].astype(str), sort=True)
+    order = np.lexsort((timestamps.to_numpy(dtype="datetime64[us]"), route_ids, cells))
+
+    # Label each distinct week once rather than once per point.
+    week_codes, week_values = pd.factorize(points["week"], use_na_sentinel=True)
+    week_labels = np.asarray([week_label(value) for value in week_values] + [None], dtype=object)
+    weeks = week_labels[week_codes]
+    table = pa.table(
+        {
+            "cell": pa.array(cells[order], type=pa.int64()),
+            "route_code": pa.DictionaryArray.from_arrays(
+                pa.array(route_ids[order], type=pa.int32()), pa.array(np.asarray(route_values, dtype=object), type=pa.string())
+            ),
+            "week": pa.array(weeks[order], type=pa.string()).dictionary_encode(),
+            "latitude": pa.array(latitude[order], type=pa.float64()),
+            "longitude": pa.array(longitude[order], type=pa.float64()),
+            "event_timestamp": pa.array(timestamps.array[order], type=pa.timestamp("us", tz="UTC")),
+        }
+    )
+    return table.replace_schema_metadata({"cell_size": repr(cell_size), "built_at": str(time.time())})
+
+
+def write_spatial_index(table: pa.Table, path: Path = DEFAULT_INDEX_PATH) -> Path:
+    """Write ``table`` as an uncompressed Arrow IPC file suitable for memory mapping."""
+    destination = Path(path)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temporary = destination.with_suffix(destination.suffix + ".tmp")
+    with pa.OSFile(str(temporary), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    temporary.replace(destination)
+    return destination
+
+
+def build_spatial_index(
+    *,
+    data_dir: Optional[Path] = None,
+    output: Optional[Path] = None,
+    cell_size: float = DEFAULT_CELL_SIZE,
+    cache: CacheOption = False,
+) -> Path:
+    """Batch job: load the county-pair telemetry, index it and write it to ``output``."""
+    frame = load_county_pair_moves(data_dir=data_dir, cache=cache)
+    return write_spatial_index(build_spatial_index_table(frame, cell_size=cell_size), output or DEFAULT_INDEX_PATH)
+
+
+def _timestamp(value: TimeBound) -> Optional[np.datetime64]:
+    if value is None:
+        return None
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert("UTC").tz_localize(None)
+    return stamp.to_datetime64().astype("datetime64[us]")
+
+
+def haversine_km(latitude: np.ndarray, longitude: np.ndarray, origin_latitude: float, origin_longitude: float) -> np.ndarray:
+    """Great-circle distance in kilometres from every point to the origin."""
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat0, lon0 = math.radians(origin_latitude), math.radians(origin_longitude)
+    a = np.sin((lat1 - lat0) / 2) ** 2 + math.cos(lat0) * np.cos(lat1) * np.sin((lon1 - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _inside_polygon(latitude: np.ndarray, longitude: np.ndarray, vertices: np.ndarray) -> np.ndarray:
+    """Even-odd ray casting; ``vertices`` is an ``(n, 2)`` array of (latitude, longitude)."""
+    inside = np.zeros(len(latitude), dtype=bool)
+    previous = vertices[-1]
+    for current in vertices:
+        (lat_a, lon_a), (lat_b, lon_b) = previous, current
+        crosses = (lat_a > latitude) != (lat_b > latitude)
+        if crosses.any():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                boundary = lon_a + (latitude - lat_a) * (lon_b - lon_a) / (lat_b - lat_a)
+            inside ^= crosses & (longitude < boundary)
+        previous = current
+    return inside
+
+
+class SpatialIndex:
+    """Read-only, cell-sorted telemetry with bounding-box, radius and polygon queries."""
+
+    def __init__(self, table: pa.Table) -> None:
+        self.table = table
+        metadata = table.schema.metadata or {}
+        self.cell_size = float(metadata.get(b"cell_size", repr(DEFAULT_CELL_SIZE)))
+        self._grid_columns = _grid_columns(self.cell_size)
+        self._cells = table.column("cell").to_numpy()
+        self._latitude = table.column("latitude").to_numpy()
+        self._longitude = table.column("longitude").to_numpy()
+        self._timestamps = table.column("event_timestamp").cast(pa.timestamp("us")).to_numpy(zero_copy_only=False)
+        weeks = table.column("week").combine_chunks()
+        self._week_codes = weeks.indices.fill_null(-1).to_numpy() if table.num_rows else np.empty(0, np.int32)
+        self._week_keys = np.asarray(
+            [normalize_week(value) for value in weeks.dictionary.to_pylist()] if table.num_rows else [], dtype=object
+        )
+
+    @classmethod
+    def open(cls, path: Path = DEFAULT_INDEX_PATH) -> "SpatialIndex":
+        """Memory-map an index written by :func:`write_spatial_index`."""
+        source = Path(path)
+        if not source.exists():
+            raise FileNotFoundError(f"Spatial index not found: {source}")
+        return cls(pa.ipc.open_file(pa.memory_map(str(source), "r")).read_all())
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    # ------------------------------------------------------------------
+    # Candidate selection
+    # ------------------------------------------------------------------
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Row positions in the grid cells covering the box, via one slice per grid row."""
+        if min_lat > max_lat or not len(self._cells):
+            return np.empty(0, dtype=np.int64)
+        (row_start, row_stop), (column_start, column_stop) = _cell_coordinates(
+            np.array([min_lat, max_lat]), np.array([min_lon, max_lon]), self.cell_size
+        )
+        wraps = min_lon > max_lon or column_stop < column_start
+        if max_lon - min_lon >= 360.0 or (wraps and column_stop >= column_start):
+            # Whole grid rows, also for a wrapping box whose two ends share a grid column.
+            spans = [(0, self._grid_columns - 1)]
+        elif wraps:
+            # The box crosses the antimeridian (or ends on it, which wraps to column 0):
+            # one span on each side of it.
+            spans = [(column_start, self._grid_columns - 1), (0, column_stop)]
+        else:
+            spans = [(column_start, column_stop)]
+        grid_rows = np.arange(row_start, row_stop + 1, dtype=np.int64) * self._grid_columns
+        starts, stops = [], []
+        for first, last in spans:
+            starts.append(np.searchsorted(self._cells, grid_rows + first, side="left"))
+            stops.append(np.searchsorted(self._cells, grid_rows + last, side="right"))
+        starts, stops = np.concatenate(starts), np.concatenate(stops)
+        lengths = stops - starts
+        keep = lengths > 0
+        starts, lengths = starts[keep], lengths[keep]
+        if not len(starts):
+            return np.empty(0, dtype=np.int64)
+        # Concatenated ``arange(start, stop)`` for every slice without a Python loop.
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        return np.arange(int(lengths.sum()), dtype=np.int64) + offsets
+
+    def _time_mask(self, positions: np.ndarray, start: TimeBound, end: TimeBound, weeks: Optional[Iterable[object]]) -> np.ndarray:
+        mask = np.ones(len(positions), dtype=bool)
+        lower, upper = _timestamp(start), _timestamp(end)
+        if lower is not None or upper is not None:
+            stamps = self._timestamps[positions]
+            valid = ~np.isnat(stamps)
+            if lower is not None:
+                mask &= valid & (stamps >= lower)
+            if upper is not None:
+                mask &= valid & (stamps < upper)
+        if weeks is not None:
+            wanted = {normalize_week(week) for week in weeks}
+            matching = np.fromiter((key in wanted for key in self._week_keys), dtype=bool, count=len(self._week_keys))
+            codes = self._week_codes[positions]
+            mask &= (codes >= 0) & matching[np.maximum(codes, 0)] if len(matching) else False
+        return mask
+
+    def _frame(self, positions: np.ndarray) -> pd.DataFrame:
+        selected = self.table.take(pa.array(positions, type=pa.int64())).select(list(POINT_COLUMNS))
+        frame = selected.to_pandas()
+        for name in ("route_code", "week"):
+            frame[name] = frame[name].astype(object)
+        return frame
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def bbox(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        *,
+        start: TimeBound = None,
+        end: TimeBound = None,
+        weeks: Optional[Iterable[object]] = None,
+    ) -> pd.DataFrame:
+        """Points inside the box (edges included), optionally within ``[start, end)`` and/or ``weeks``."""
+        positions = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        latitude, longitude = self._latitude[positions], self._longitude[positions]
+        if min_lon <= max_lon:
+            in_longitude = (longitude >= min_lon) & (longitude <= max_lon)
+        else:
+            in_longitude = (longitude >= min_lon) | (longitude <= max_lon)
+        mask = (latitude >= min_lat) & (latitude <= max_lat) & in_longitude
+        positions = positions[mask]
+        return self._frame(positions[self._time_mask(positions, start, end, weeks)])
+
+    def radius(
+        self,
+        latitude: float,
+        longitude: float,
+        km: float,
+        *,
+        start: TimeBound = None,
+        end: TimeBound = None,
+        weeks: Optional[Iterable[object]] = None,
+    ) -> pd.DataFrame:
+        """Points within ``km`` great-circle kilometres of ``(latitude, longitude)``, with a ``distance_km`` column."""
+        lat_span = math.degrees(km / EARTH_RADIUS_KM)
+        min_lat, max_lat = max(latitude - lat_span, -90.0), min(latitude + lat_span, 90.0)
+        widest = max(abs(min_lat), abs(max_lat))
+        if widest >= 90.0:
+            min_lon, max_lon = -180.0, 180.0
+        else:
+            lon_span = lat_span / math.cos(math.radians(widest))
+            if lon_span >= 180.0:
+                min_lon, max_lon = -180.0, 180.0
+            else:
+                # Wrap into [-180, 180); ``min_lon > max_lon`` then means the box crosses the antimeridian.
+                min_lon = (longitude - lon_span + 180.0) % 360.0 - 180.0
+                max_lon = (longitude + lon_span + 180.0) % 360.0 - 180.0
+
+        positions = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        distance = haversine_km(self._latitude[positions], self._longitude[positions], latitude, longitude)
+        mask = distance <= km
+        positions, distance = positions[mask], distance[mask]
+        time_mask = self._time_mask(positions, start, end, weeks)
+        frame = self._frame(positions[time_mask])
+        frame["distance_km"] = distance[time_mask]
+        return frame
+
+    def polygon(
+        self,
+        vertices: Sequence[Tuple[float, float]],
+        *,
+        start: TimeBound = None,
+        end: TimeBound = None,
+        weeks: Optional[Iterable[object]] = None,
+    ) -> pd.DataFrame:
+        """Points inside a simple polygon given as ``(latitude, longitude)`` vertices.
+
+        GeoJSON rings are ``[longitude, latitude]``; swap them before passing a county shape.
+        """
+        ring = np.asarray(vertices, dtype=np.float64)
+        if ring.ndim != 2 or ring.shape[1] != 2 or len(ring) < 3:
+            raise ValueError("A polygon needs at least three (latitude, longitude) vertices")
+        positions = self._candidates(ring[:, 0].min(), ring[:, 1].min(), ring[:, 0].max(), ring[:, 1].max())
+        positions = positions[_inside_polygon(self._latitude[positions], self._longitude[positions], ring)]
+        return self._frame(positions[self._time_mask(positions, start, end, weeks)])
+
+
+def route_summary(points: pd.DataFrame) -> pd.DataFrame:
+    """Collapse query results to one row per route: point count and first/last timestamp."""
+    if points.empty:
+        return pd.DataFrame(columns=["route_code", "points", "first_seen", "last_seen"])
+    grouped = points.groupby("route_code", sort=True)["event_timestamp"]
+    return pd.DataFrame(
+        {"points": grouped.size(), "first_seen": grouped.min(), "last_seen": grouped.max()}
+    ).reset_index()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the telemetry grid index.")
+    parser.add_argument("--data-dir", type=Path, default=None, help="Directory holding the Parquet extracts")
+    parser.add_argument("--output", type=Path, default=DEFAULT_INDEX_PATH, help="Destination Arrow IPC file")
+    parser.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE, help="Grid cell size in degrees")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    path = build_spatial_index(data_dir=args.data_dir, output=args.output, cell_size=args.cell_size)
+    index = SpatialIndex.open(path)
+    print(f"Indexed {len(index):,} telemetry points into {path} in {time.perf_counter() - started:.2f}s")
+
+
+__all__ = [
+    "DEFAULT_INDEX_PATH",
+    "SpatialIndex",
+    "build_spatial_index",
+    "build_spatial_index_table",
+    "haversine_km",
+    "route_summary",
+    "write_spatial_index",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 import pandas as pd
@@ -8,10 +9,19 @@ import plotly.express as px
 import pydeck as pdk
 import streamlit as st
 
-from backend_client import BackendClient, BackendError
+from backend_client import LEADERBOARD_METRICS, TREND_RESOLUTIONS, BackendClient, BackendError
+from instrumentation import SHARED_INSTRUMENTATION, instrumented
+from prefetch import Prefetcher, create_shared_executor, kpi_key, plan_dashboard_prefetch, route_key
+from route_catalog import RouteCatalog, rank_catalog_routes
 
 
 DEFAULT_BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:4000")
+DEFAULT_MAP_ZOOM = 5
+DEFAULT_MAP_MAX_POINTS = 2000
+ROUTE_OPTIONS_LIMIT = 200
+# How long a render waits for a running prefetch of the same selection before fetching itself.
+PREFETCH_WAIT_TIMEOUT = 0.5
+LEADERBOARD_LIMIT = 100
 
 
 def ensure_client() -> BackendClient:
@@ -24,12 +34,42 @@ def ensure_client() -> BackendClient:
     return client
 
 
+def ensure_catalog(client: BackendClient) -> RouteCatalog:
+    catalog = st.session_state.get("route_catalog")
+    if catalog is None or catalog.client is not client:
+        catalog = RouteCatalog(client)
+        st.session_state.route_catalog = catalog
+    return catalog
+
+
+@st.cache_resource
+def shared_prefetch_executor() -> ThreadPoolExecutor:
+    # One bounded pool for every session: a session that simply goes away leaves no threads behind.
+    return create_shared_executor()
+
+
+def ensure_prefetcher() -> Prefetcher:
+    prefetcher = st.session_state.get("prefetcher")
+    if prefetcher is None:
+        prefetcher = Prefetcher(executor=shared_prefetch_executor())
+        st.session_state.prefetcher = prefetcher
+    return prefetcher
+
+
+def reset_prefetcher() -> None:
+    prefetcher = st.session_state.get("prefetcher")
+    if prefetcher is not None:
+        prefetcher.shutdown()
+        st.session_state.prefetcher = None
+
+
 def reset_session_for_backend(new_url: str) -> None:
     st.session_state.backend_url = new_url
     st.session_state.backend_client = BackendClient(new_url)
     st.session_state.auth_payload = None
     st.session_state.user = None
-    st.session_state.routes = None
+    st.session_state.route_catalog = None
+    reset_prefetcher()
 
 
 def require_login(client: BackendClient) -> bool:
@@ -46,7 +86,8 @@ def require_login(client: BackendClient) -> bool:
         if st.sidebar.button("Sign out"):
             st.session_state.auth_payload = None
             st.session_state.user = None
-            st.session_state.routes = None
+            st.session_state.route_catalog = None
+            reset_prefetcher()
         return True
 
     with st.sidebar.form("login-form", clear_on_submit=False):
@@ -58,13 +99,14 @@ def require_login(client: BackendClient) -> bool:
                 payload = client.login(email=email.strip(), password=password)
                 st.session_state.auth_payload = payload
                 st.session_state.user = payload.get("user")
-                st.session_state.routes = None
+                st.session_state.route_catalog = None
                 st.rerun()
             except BackendError as err:
                 st.error(str(err))
     return False
 
 
+@instrumented("render.kpi_cards")
 def render_kpi_cards(kpi_payload: dict) -> None:
     cols = st.columns(4)
     cols[0].metric("SDEI", kpi_payload.get("sdei"))
@@ -76,30 +118,25 @@ def render_kpi_cards(kpi_payload: dict) -> None:
         st.json(kpi_payload.get("raw", {}))
 
 
-def render_trend_chart(trend_points: List[dict]) -> None:
-    if not trend_points:
+@instrumented("render.trend_chart")
+def render_trend_chart(trend_points: pd.DataFrame | List[dict]) -> None:
+    if trend_points is None or len(trend_points) == 0:
         st.info("Trend data unavailable for this route")
         return
 
-    trend_df = pd.DataFrame(trend_points)
-    melted = trend_df.melt(id_vars="week", value_vars=["sdei", "sdcui", "sii"], var_name="Metric", value_name="Value")
-    fig = px.line(melted, x="week", y="Value", color="Metric", markers=True, title="KPI Trend")
-    fig.update_layout(legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+    with SHARED_INSTRUMENTATION.span("frame.trend"):
+        trend_df = trend_points if isinstance(trend_points, pd.DataFrame) else pd.DataFrame(trend_points)
+        melted = trend_df.melt(id_vars="week", value_vars=["sdei", "sdcui", "sii"], var_name="Metric", value_name="Value")
+    with SHARED_INSTRUMENTATION.span("figure.trend"):
+        fig = px.line(melted, x="week", y="Value", color="Metric", markers=True, title="KPI Trend")
+        fig.update_layout(legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+        # Week, month and quarter labels are period names, not numbers or dates to interpolate.
+        fig.update_xaxes(type="category")
     st.plotly_chart(fig, use_container_width=True)
 
 
-def render_map(map_payload: dict) -> None:
-    telemetry = map_payload.get("telemetry", [])
-    if not telemetry:
-        st.warning("No telemetry points available for this route")
-        return
-
-    telemetry_df = pd.DataFrame(telemetry)
-    telemetry_df = telemetry_df.dropna(subset=["latitude", "longitude"])
-    if telemetry_df.empty:
-        st.warning("Telemetry data missing coordinates")
-        return
-
+@instrumented("deck.map")
+def build_deck(telemetry_df: pd.DataFrame, zoom: float = DEFAULT_MAP_ZOOM) -> pdk.Deck:
     sorted_points = telemetry_df.sort_values("event_timestamp")
     path_points = sorted_points[["longitude", "latitude"]].values.tolist()
     if len(path_points) >= 2:
@@ -112,19 +149,19 @@ def render_map(map_payload: dict) -> None:
     else:
         layer = pdk.Layer(
             "ScatterplotLayer",
-            data=sorted_points,
+            data=sorted_points[["longitude", "latitude"]],
             get_position="[longitude, latitude]",
             get_fill_color=[255, 99, 71],
             get_radius=5000,
         )
 
     mapbox_token = os.environ.get("MAPBOX_TOKEN")
-    deck = pdk.Deck(
+    return pdk.Deck(
         layers=[layer],
         initial_view_state=pdk.ViewState(
             latitude=telemetry_df["latitude"].mean(),
             longitude=telemetry_df["longitude"].mean(),
-            zoom=5,
+            zoom=zoom,
             pitch=30,
         ),
         map_style="mapbox://styles/mapbox/light-v10" if mapbox_token else None,
@@ -132,7 +169,75 @@ def render_map(map_payload: dict) -> None:
         api_keys={"mapbox": mapbox_token} if mapbox_token else None,
     )
 
-    st.pydeck_chart(deck)
+
+@instrumented("render.map")
+def render_map(map_payload: dict, zoom: float = DEFAULT_MAP_ZOOM) -> None:
+    telemetry = map_payload.get("telemetry")
+    if telemetry is None or len(telemetry) == 0:
+        st.warning("No telemetry points available for this route")
+        return
+
+    with SHARED_INSTRUMENTATION.span("frame.map"):
+        telemetry_df = telemetry if isinstance(telemetry, pd.DataFrame) else pd.DataFrame(telemetry)
+        telemetry_df = telemetry_df.dropna(subset=["latitude", "longitude"])
+    if telemetry_df.empty:
+        st.warning("Telemetry data missing coordinates")
+        return
+
+    st.pydeck_chart(build_deck(telemetry_df, zoom=zoom))
+
+    simplification = map_payload.get("simplification")
+    if simplification:
+        st.caption(
+            f"Showing {simplification.get('returnedPoints')} of {simplification.get('originalPoints')} telemetry points"
+        )
+
+
+@instrumented("render.leaderboard")
+def render_leaderboard(client: BackendClient, catalog: RouteCatalog, week: str) -> None:
+    metric = st.selectbox("Rank by", options=LEADERBOARD_METRICS, format_func=str.upper, key="leaderboard-metric")
+    descending = st.toggle("Highest first", value=True, key="leaderboard-order")
+    options = {"metric": metric, "descending": descending, "limit": LEADERBOARD_LIMIT}
+    try:
+        try:
+            leaderboard = client.fetch_leaderboard(week, **options)
+        except BackendError as err:
+            if err.status_code != 404:
+                raise
+            leaderboard = rank_catalog_routes(catalog, week, **options)
+    except BackendError as err:
+        st.error(str(err))
+        return
+
+    results = leaderboard.get("results") or []
+    if not results:
+        st.info("No KPI data found for this week")
+        return
+
+    columns = {"rank": "Rank", "routeCode": "Route", "origin": "Origin", "destination": "Destination"}
+    columns.update({name: name.upper() for name in LEADERBOARD_METRICS})
+    frame = pd.DataFrame(results).rename(columns=columns)
+    st.caption(f"Top {len(frame)} of {leaderboard.get('total', len(frame))} routes reporting week {week}")
+    st.dataframe(frame, hide_index=True, use_container_width=True)
+
+
+def render_performance_panel() -> None:
+    """Sidebar table of per-stage latencies with a Prometheus text export."""
+    with st.sidebar.expander("Performance", expanded=True):
+        rows = SHARED_INSTRUMENTATION.snapshot()
+        if not rows:
+            st.caption("No timings recorded yet")
+            return
+        frame = pd.DataFrame(rows).set_index("stage")
+        st.dataframe(frame.round(1), use_container_width=True)
+        st.download_button(
+            "Export Prometheus metrics",
+            data=SHARED_INSTRUMENTATION.to_prometheus(),
+            file_name="scci_dashboard_metrics.txt",
+            mime="text/plain",
+        )
+        if st.button("Reset timings"):
+            SHARED_INSTRUMENTATION.reset()
 
 
 st.set_page_config(page_title="SCCI Dashboard", layout="wide")
@@ -147,28 +252,38 @@ if not require_login(client):
 
 client = st.session_state.backend_client
 
-if "routes" not in st.session_state or st.session_state.routes is None:
-    try:
-        st.session_state.routes = client.list_routes()
-    except BackendError as err:
-        st.error(str(err))
-        st.stop()
+catalog = ensure_catalog(client)
+route_prefix = st.text_input("Search routes by code prefix", key="route-prefix").strip()
+try:
+    route_page = catalog.search(route_prefix, limit=ROUTE_OPTIONS_LIMIT)
+except BackendError as err:
+    st.error(str(err))
+    st.stop()
 
-routes = st.session_state.routes
+routes = route_page.routes
 if not routes:
-    st.warning("No routes available. Load data via the ingestion workflow.")
+    if route_prefix:
+        st.warning(f"No routes start with '{route_prefix}'.")
+    else:
+        st.warning("No routes available. Load data via the ingestion workflow.")
     st.stop()
 
 route_codes = [route.code for route in routes]
 selected_route_code = st.selectbox("Route", options=route_codes, format_func=lambda code: code)
-selected_route = next(route for route in routes if route.code == selected_route_code)
+if route_page.next_cursor:
+    st.caption(f"Showing the first {len(route_codes)} matching routes; type more of the code to narrow the list.")
+selected_route = catalog.get(selected_route_code)
 
 col1, col2, col3 = st.columns(3)
 col1.write(f"**Origin County:** {selected_route.origin or 'Unknown'}")
 col2.write(f"**Destination County:** {selected_route.destination or 'Unknown'}")
 col3.write(f"**Mode:** {selected_route.mode or 'N/A'}")
 
-available_weeks = selected_route.weeks or []
+try:
+    available_weeks = catalog.weeks(selected_route_code)
+except BackendError as err:
+    st.error(str(err))
+    st.stop()
 if not available_weeks:
     st.warning("No KPI weeks found for the selected route.")
     st.stop()
@@ -185,14 +300,27 @@ if not trend_weeks:
     trend_weeks = available_weeks
 
 trend_weeks_sorted = sorted(trend_weeks)
+trend_resolution = st.selectbox(
+    "Trend resolution",
+    options=TREND_RESOLUTIONS,
+    index=TREND_RESOLUTIONS.index("auto"),
+    help="Month and quarter pool the weekly inputs before computing each KPI; auto picks the finest that keeps the chart readable.",
+)
 
 refresh = st.button("Refresh data")
 
 selection_key = f"{selected_route_code}:{selected_week}"
-trend_key = f"{selected_route_code}:" + ",".join(trend_weeks_sorted)
-map_key = selected_route_code
+trend_key = f"{selected_route_code}:{trend_resolution}:" + ",".join(trend_weeks_sorted)
+with st.sidebar.expander("Map detail"):
+    map_zoom = st.slider("Zoom level", min_value=2, max_value=14, value=DEFAULT_MAP_ZOOM)
+    map_max_points = st.number_input("Max path points", min_value=2, value=DEFAULT_MAP_MAX_POINTS, step=500)
+map_options = {"zoom": map_zoom, "max_points": int(map_max_points)}
+map_key = f"{selected_route_code}:{map_zoom}:{int(map_max_points)}"
+prefetch_enabled = st.sidebar.checkbox("Prefetch adjacent weeks and routes", value=True, key="prefetch")
+prefetcher = ensure_prefetcher()
 
 if refresh:
+    selected_route.weeks = None
     st.session_state.pop("kpi_payload", None)
     st.session_state.pop("trend_payload", None)
     st.session_state.pop("map_payload", None)
@@ -200,41 +328,77 @@ if refresh:
     st.session_state.pop("trend_cache_key", None)
     st.session_state.pop("map_cache_key", None)
 
+stale_parts = []
 if (
     st.session_state.get("kpi_cache_key") != selection_key
     or "kpi_payload" not in st.session_state
     or st.session_state.kpi_payload is None
 ):
-    try:
-        st.session_state.kpi_payload = client.fetch_kpis(selected_route_code, selected_week)
-        st.session_state.kpi_cache_key = selection_key
-    except BackendError as err:
-        st.error(str(err))
-        st.stop()
-
+    stale_parts.append("kpis")
 if (
     st.session_state.get("trend_cache_key") != trend_key
     or "trend_payload" not in st.session_state
     or st.session_state.trend_payload is None
 ):
-    try:
-        st.session_state.trend_payload = client.fetch_trend(selected_route_code, trend_weeks_sorted)
-        st.session_state.trend_cache_key = trend_key
-    except BackendError as err:
-        st.error(str(err))
-        st.session_state.trend_payload = []
-
+    stale_parts.append("trend")
 if (
     st.session_state.get("map_cache_key") != map_key
     or "map_payload" not in st.session_state
     or st.session_state.map_payload is None
 ):
-    try:
-        st.session_state.map_payload = client.fetch_map(selected_route_code)
-        st.session_state.map_cache_key = map_key
-    except BackendError as err:
-        st.error(str(err))
-        st.session_state.map_payload = {}
+    stale_parts.append("map")
+
+if stale_parts:
+    # A prefetch of this selection may still be running; give it a moment to land in the cache
+    # rather than repeat it, but never wait out a slow fetch's retries.
+    prefetcher.wait(
+        [
+            kpi_key(selected_route_code, selected_week),
+            route_key(selected_route_code, trend_resolution, map_options),
+        ],
+        timeout=PREFETCH_WAIT_TIMEOUT,
+    )
+    bundle = client.fetch_dashboard(
+        selected_route_code,
+        selected_week,
+        trend_weeks_sorted,
+        parts=stale_parts,
+        map_options=map_options,
+        trend_resolution=trend_resolution,
+        frames=True,
+        revalidate=refresh,
+    )
+
+    if "kpis" in stale_parts:
+        if "kpis" in bundle.errors:
+            st.error(str(bundle.errors["kpis"]))
+            st.stop()
+        st.session_state.kpi_payload = bundle.kpis
+        st.session_state.kpi_cache_key = selection_key
+
+    if "trend" in stale_parts:
+        if "trend" in bundle.errors:
+            st.error(str(bundle.errors["trend"]))
+            st.session_state.trend_payload = []
+        else:
+            st.session_state.trend_payload = bundle.trend
+            st.session_state.trend_cache_key = trend_key
+
+    if "map" in stale_parts:
+        if "map" in bundle.errors:
+            st.error(str(bundle.errors["map"]))
+            st.session_state.map_payload = {}
+        else:
+            st.session_state.map_payload = bundle.map
+            st.session_state.map_cache_key = map_key
+
+if client.cache is not None:
+    cache_stats = client.cache.stats()
+    st.sidebar.caption(
+        f"Response cache: {cache_stats['entries']} entries · "
+        f"{cache_stats['hits']} hits / {cache_stats['misses']} misses · "
+        f"{cache_stats['revalidated']} revalidated"
+    )
 
 render_kpi_cards(st.session_state.kpi_payload)
 
@@ -242,4 +406,28 @@ st.subheader("KPI Trend")
 render_trend_chart(st.session_state.trend_payload)
 
 st.subheader("Route Telemetry")
-render_map(st.session_state.map_payload)
+render_map(st.session_state.map_payload, zoom=map_zoom)
+
+st.subheader("Route Leaderboard")
+if st.checkbox(f"Rank all routes for week {selected_week}", key="show-leaderboard"):
+    render_leaderboard(client, catalog, selected_week)
+
+if st.sidebar.checkbox("Show performance panel", key="show-performance"):
+    render_performance_panel()
+
+if prefetch_enabled:
+    prefetcher.schedule(
+        plan_dashboard_prefetch(
+            client,
+            route_codes,
+            selected_route_code,
+            available_weeks,
+            selected_week,
+            trend_resolution=trend_resolution,
+            map_options=map_options,
+        )
+    )
+    stats = prefetcher.stats()
+    st.sidebar.caption(f"Prefetch: {stats['completed']} warmed · {stats['pending']} queued · {stats['cancelled']} cancelled")
+else:
+    prefetcher.cancel()
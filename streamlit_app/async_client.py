@@ -0,0 +1,443 @@
+"""Asyncio client for bulk extraction jobs against the SCCI backend.
+
+:class:`AsyncBackendClient` mirrors :class:`backend_client.BackendClient` (``login``,
+``list_routes``, ``fetch_kpis``, ``fetch_trend``, ``fetch_map``) on top of ``aiohttp``.
+
+* Requests in flight are capped by a semaphore, and keep-alive connections are pooled
+  per host.
+* 5xx and 429 responses, timeouts and connection errors are retried with full-jitter
+  exponential backoff.
+* One JWT is shared by every request. After a ``401`` the client logs in again once
+  (single-flight) with the credentials it was given.
+
+The ``iter_*`` methods take any iterable, including a generator, and yield ``(item,
+result)`` pairs as responses complete. At most ``concurrency`` requests are scheduled at a
+time, so memory stays flat however many route-weeks are exported. There is no response
+cache: every call goes to the backend.
+
+Export every route-week's KPIs as JSON lines::
+
+    python async_client.py --email analyst@example.com --password secret --output kpis.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+from urllib.parse import urlencode
+
+import aiohttp
+
+from backend_client import DEFAULT_KPI_BATCH_SIZE, TREND_RESOLUTIONS, BackendError, RouteSummary, ensure_simplified
+from instrumentation import Instrumentation, parse_server_timing
+from map_lod import tolerance_for_zoom
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.2
+MAX_BACKOFF = 10.0
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+Pair = Tuple[str, str]
+
+
+def _is_retryable(status: int) -> bool:
+    return status >= 500 or status == 429
+
+
+class AsyncBackendClient:
+    """Concurrent, retrying REST client sharing one session and one JWT."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        *,
+        token: Optional[str] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        limit_per_host: Optional[int] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.base_url = base_url or os.environ.get("BACKEND_URL", "http://localhost:4000")
+        self.concurrency = concurrency
+        self.limit_per_host = limit_per_host or concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        # Disabled unless given; export jobs rarely want per-request spans.
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation(enabled=False)
+        self.requests = 0
+        self.retried = 0
+        self._token = token
+        self._role: Optional[str] = None
+        self._credentials: Optional[Tuple[str, str]] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._login_lock = asyncio.Lock()
+        self._random = random.Random()
+
+    # ------------------------------------------------------------------
+    # Session lifecycle
+    # ------------------------------------------------------------------
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.limit_per_host, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> "AsyncBackendClient":
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @property
+    def token(self) -> Optional[str]:
+        """The current JWT; pass it as ``token=`` to another client to reuse the session."""
+        return self._token
+
+    # ------------------------------------------------------------------
+    # Authentication helpers
+    # ------------------------------------------------------------------
+    async def login(self, email: str, password: str) -> Dict:
+        """Authenticate against the backend and retain the JWT (and credentials for renewal)."""
+        payload = await self._request_json(
+            "login",
+            "POST",
+            "/auth/login",
+            body={"email": email, "password": password},
+            error_message="Login failed",
+            authenticate=False,
+        )
+        token = payload.get("token")
+        if not token:
+            raise BackendError("Login succeeded but token missing in response")
+        self._token = token
+        self._role = (payload.get("user") or {}).get("role")
+        self._credentials = (email, password)
+        return payload
+
+    async def _renew_token(self, rejected: Optional[str]) -> None:
+        async with self._login_lock:
+            # Another request may already have renewed the token while this one waited.
+            if self._token == rejected and self._credentials is not None:
+                await self.login(*self._credentials)
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+    async def _sleep_before_retry(self, attempt: int) -> None:
+        self.retried += 1
+        await asyncio.sleep(self._random.uniform(0, min(MAX_BACKOFF, self.backoff * 2 ** (attempt - 1))))
+
+    async def _request_json(
+        self,
+        endpoint: str,
+        method: str,
+        path: str,
+        *,
+        body: Optional[Dict] = None,
+        error_message: str,
+        not_found_message: Optional[str] = None,
+        authenticate: bool = True,
+    ) -> object:
+        """Send a request, retrying transient failures, and return the decoded JSON body."""
+        session = self._ensure_session()
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        renewed = False
+        while True:
+            token = self._token if authenticate else None
+            headers = {"Accept": "application/json"}
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    with self.instrumentation.span(f"http.{endpoint}") as span:
+                        async with session.request(method, url, json=body, headers=headers) as response:
+                            status = response.status
+                            content = await response.read()
+                            span.size = len(content)
+                            span.server_timings = parse_server_timing(response.headers.get("Server-Timing"))
+            except (asyncio.TimeoutError, aiohttp.ClientError) as exc:
+                if attempt < self.retries:
+                    attempt += 1
+                    await self._sleep_before_retry(attempt)
+                    continue
+                raise BackendError(str(exc) or type(exc).__name__) from exc
+
+            if status == 401 and token and self._credentials is not None and not renewed:
+                renewed = True
+                await self._renew_token(token)
+                continue
+            if _is_retryable(status) and attempt < self.retries:
+                attempt += 1
+                await self._sleep_before_retry(attempt)
+                continue
+            break
+
+        try:
+            payload = json.loads(content) if content else None
+        except ValueError:
+            payload = None
+            if status < 400:
+                raise BackendError(f"{error_message}: invalid JSON response", status_code=status)
+        if not_found_message and status == 404:
+            raise BackendError(not_found_message, status_code=404)
+        if status >= 400:
+            message = payload.get("message", error_message) if isinstance(payload, dict) else error_message
+            raise BackendError(message, status_code=status)
+        return payload
+
+    # ------------------------------------------------------------------
+    # Data accessors
+    # ------------------------------------------------------------------
+    async def list_routes(self) -> List[RouteSummary]:
+        payload = await self._request_json("routes", "GET", "/api/kpi", error_message="Unable to load routes")
+        return [RouteSummary.from_payload({"weeks": [], **item}) for item in payload]
+
+    async def fetch_kpis(self, route_code: str, week: str) -> Dict:
+        return await self._request_json(
+            "kpis",
+            "GET",
+            f"/api/kpi/{route_code}/{week}",
+            error_message="Unable to load KPIs",
+            not_found_message="No KPI data found for selection",
+        )
+
+    async def fetch_kpis_many(self, pairs: Iterable[Pair]) -> Dict[Pair, Optional[Dict]]:
+        """One ``POST /api/kpi/batch`` for up to 1000 pairs; pairs without data map to ``None``."""
+        chunk = list(dict.fromkeys((str(route_code), str(week)) for route_code, week in pairs))
+        if not chunk:
+            return {}
+        payload = await self._request_json(
+            "kpis_batch",
+            "POST",
+            "/api/kpi/batch",
+            body={"pairs": [{"routeCode": route_code, "week": week} for route_code, week in chunk]},
+            error_message="Unable to load KPIs",
+        )
+        return dict(zip(chunk, payload.get("results", [])))
+
+    async def fetch_trend(self, route_code: str, weeks: List[str], *, resolution: str = "week") -> List[Dict]:
+        if resolution not in TREND_RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {', '.join(TREND_RESOLUTIONS)}")
+        body: Dict[str, object] = {"weeks": weeks}
+        if resolution != "week":
+            body["resolution"] = resolution
+        return await self._request_json(
+            "trend",
+            "POST",
+            f"/api/kpi/{route_code}/trend",
+            body=body,
+            error_message="Unable to load KPI trend",
+        )
+
+    async def fetch_map(
+        self,
+        route_code: str,
+        *,
+        max_points: Optional[int] = None,
+        tolerance: Optional[float] = None,
+        zoom: Optional[float] = None,
+    ) -> Dict:
+        """Fetch route telemetry; the options behave as in :meth:`BackendClient.fetch_map`."""
+        if tolerance is None and zoom is not None:
+            tolerance = tolerance_for_zoom(zoom)
+        query = {key: value for key, value in (("maxPoints", max_points), ("tolerance", tolerance)) if value is not None}
+        path = f"/api/map/{route_code}"
+        if query:
+            path = f"{path}?{urlencode(query)}"
+        payload = await self._request_json(
+            "map",
+            "GET",
+            path,
+            error_message="Unable to load map data",
+            not_found_message="Route telemetry not found",
+        )
+        if query:
+            payload = ensure_simplified(payload, tolerance=tolerance, max_points=max_points)
+        return payload
+
+    # ------------------------------------------------------------------
+    # Streaming bulk helpers
+    # ------------------------------------------------------------------
+    async def _stream(
+        self,
+        items: Iterable[T],
+        call: Callable[[T], Awaitable[R]],
+        *,
+        return_exceptions: bool,
+    ) -> AsyncIterator[Tuple[T, R]]:
+        """Run ``call`` over ``items`` with at most ``concurrency`` tasks, yielding in completion order."""
+        iterator = iter(items)
+        pending: Dict[asyncio.Future, T] = {}
+        try:
+            while True:
+                for item in itertools.islice(iterator, self.concurrency - len(pending)):
+                    pending[asyncio.ensure_future(call(item))] = item
+                if not pending:
+                    return
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    item = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except BackendError as err:
+                        if not return_exceptions:
+                            raise
+                        result = err
+                    yield item, result
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def iter_kpis(
+        self,
+        pairs: Iterable[Pair],
+        *,
+        return_exceptions: bool = False,
+    ) -> AsyncIterator[Tuple[Pair, Optional[Dict]]]:
+        """Yield ``((route_code, week), kpis)`` per pair with one GET each; missing data gives ``None``."""
+
+        async def fetch(pair: Pair) -> Optional[Dict]:
+            try:
+                return await self.fetch_kpis(*pair)
+            except BackendError as err:
+                if err.status_code == 404:
+                    return None
+                raise
+
+        async for pair, result in self._stream(pairs, fetch, return_exceptions=return_exceptions):
+            yield pair, result
+
+    async def iter_kpis_batched(
+        self,
+        pairs: Iterable[Pair],
+        *,
+        chunk_size: int = DEFAULT_KPI_BATCH_SIZE,
+        return_exceptions: bool = False,
+    ) -> AsyncIterator[Tuple[Pair, Optional[Dict]]]:
+        """Like :meth:`iter_kpis` but through ``POST /api/kpi/batch``, ``chunk_size`` pairs per request.
+
+        With ``return_exceptions`` a failed chunk yields its :class:`BackendError` for every pair.
+        """
+        iterator = iter(pairs)
+        chunks = iter(lambda: [(str(route), str(week)) for route, week in itertools.islice(iterator, chunk_size)], [])
+        async for chunk, results in self._stream(chunks, self.fetch_kpis_many, return_exceptions=return_exceptions):
+            for pair in chunk:
+                yield pair, results if isinstance(results, BackendError) else results.get(pair)
+
+    async def iter_trends(
+        self,
+        route_codes: Iterable[str],
+        weeks: Optional[List[str]] = None,
+        *,
+        resolution: str = "week",
+        return_exceptions: bool = False,
+    ) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """Yield ``(route_code, trend)`` for every route; ``weeks=None`` asks for all weeks."""
+        async for route_code, series in self._stream(
+            route_codes,
+            lambda code: self.fetch_trend(code, weeks or [], resolution=resolution),
+            return_exceptions=return_exceptions,
+        ):
+            yield route_code, series
+
+    async def iter_maps(
+        self,
+        route_codes: Iterable[str],
+        *,
+        return_exceptions: bool = False,
+        **map_options,
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """Yield ``(route_code, map payload)`` for every route, forwarding ``map_options``."""
+        async for route_code, payload in self._stream(
+            route_codes, lambda code: self.fetch_map(code, **map_options), return_exceptions=return_exceptions
+        ):
+            yield route_code, payload
+
+
+async def export_kpis(
+    client: AsyncBackendClient,
+    output: str,
+    *,
+    chunk_size: Optional[int] = DEFAULT_KPI_BATCH_SIZE,
+) -> int:
+    """Write the KPIs of every route-week to ``output`` as JSON lines; return the line count.
+
+    ``chunk_size=None`` uses one ``GET /api/kpi/:routeCode/:week`` per pair instead of the
+    batch endpoint. Route-weeks without data are written with ``"kpis": null``.
+    """
+    routes = await client.list_routes()
+    pairs = ((route.code, week) for route in routes for week in route.weeks or [])
+    if chunk_size is None:
+        results = client.iter_kpis(pairs, return_exceptions=True)
+    else:
+        results = client.iter_kpis_batched(pairs, chunk_size=chunk_size, return_exceptions=True)
+    written = 0
+    with open(output, "w", encoding="utf-8") as handle:
+        async for (route_code, week), kpis in results:
+            if isinstance(kpis, BackendError):
+                record = {"routeCode": route_code, "week": week, "kpis": None, "error": str(kpis)}
+            else:
+                record = {"routeCode": route_code, "week": week, "kpis": kpis}
+            handle.write(json.dumps(record) + "\n")
+            written += 1
+    return written
+
+
+async def _run_export(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    async with AsyncBackendClient(args.base_url, concurrency=args.concurrency, retries=args.retries) as client:
+        await client.login(args.email, args.password)
+        written = await export_kpis(client, args.output, chunk_size=None if args.per_pair else args.chunk_size)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Wrote {written:,} route-weeks to {args.output} in {elapsed:.1f}s "
+        f"({client.requests:,} requests, {client.retried:,} retries)"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export KPIs for every route-week as JSON lines.")
+    parser.add_argument("--base-url", default=None, help="Backend URL (defaults to $BACKEND_URL)")
+    parser.add_argument("--email", default=os.environ.get("BACKEND_EMAIL"), help="Login email (or $BACKEND_EMAIL)")
+    parser.add_argument("--password", default=os.environ.get("BACKEND_PASSWORD"), help="Login password (or $BACKEND_PASSWORD)")
+    parser.add_argument("--output", default="kpis.jsonl", help="Destination JSON lines file")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Requests in flight")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Retries per request on 5xx/timeouts")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_KPI_BATCH_SIZE, help="Pairs per batch request")
+    parser.add_argument("--per-pair", action="store_true", help="One GET per route-week instead of batch requests")
+    args = parser.parse_args(argv)
+    if not args.email or not args.password:
+        parser.error("--email and --password (or BACKEND_EMAIL/BACKEND_PASSWORD) are required")
+    asyncio.run(_run_export(args))
+
+
+__all__ = ["AsyncBackendClient", "export_kpis"]
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,218 @@
 """Utility client for interacting with the SCCI backend APIs from Streamlit."""
 from __future__ import annotations
 
+import functools
+import json
 import os
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlencode
 
+import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+
+try:  # pragma: no cover - optional dependency
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - handled at runtime
+    pa = None
+
+from instrumentation import SHARED_INSTRUMENTATION, Instrumentation, parse_server_timing
+from map_lod import simplify_telemetry, tolerance_for_zoom
+from response_cache import SHARED_RESPONSE_CACHE, ResponseCache, make_cache_key
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_KPI_BATCH_SIZE = 500
+DEFAULT_ROUTE_PAGE_SIZE = 50
+# Largest page ``GET /api/kpi/routes`` returns.
+MAX_ROUTE_PAGE_SIZE = 500
+DEFAULT_LEADERBOARD_LIMIT = 100
+LEADERBOARD_METRICS = ("sdei", "sdcui", "sii", "rpi")
+DASHBOARD_PARTS = ("kpis", "trend", "map")
+TREND_RESOLUTIONS = ("week", "month", "quarter", "auto")
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+# Arrow preferred, JSON accepted: older backends ignore the Arrow type and answer JSON.
+ARROW_ACCEPT = f"{ARROW_STREAM_TYPE}, application/json;q=0.5"
 
 
 class BackendError(RuntimeError):
     """Raised when the backend responds with a non-success status code."""
 
+    def __init__(self, message: str, *, status_code: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def ensure_simplified(payload: Dict, *, tolerance: Optional[float], max_points: Optional[int]) -> Dict:
+    """Simplify a map payload locally unless the backend already did (``simplification`` present)."""
+    if "simplification" in payload:
+        return payload
+    telemetry = payload.get("telemetry", [])
+    simplified = simplify_telemetry(telemetry, tolerance=tolerance or 0.0, max_points=max_points)
+    return {
+        **payload,
+        "telemetry": simplified,
+        "simplification": {
+            "originalPoints": len(telemetry),
+            "returnedPoints": len(simplified),
+            "maxPoints": max_points,
+            "tolerance": tolerance or 0.0,
+        },
+    }
+
+
+def _is_arrow(payload: object) -> bool:
+    return pa is not None and isinstance(payload, pa.Table)
+
+
+def _arrow_metadata(table: "pa.Table") -> Dict[str, object]:
+    metadata = table.schema.metadata or {}
+    return {key.decode("utf-8"): json.loads(value) for key, value in metadata.items()}
+
+
+def trend_frame(payload: object) -> pd.DataFrame:
+    """Turn a trend response (Arrow table or JSON list of points) into a DataFrame."""
+    if _is_arrow(payload):
+        # ``split_blocks`` keeps one block per column, so null-free numeric columns are
+        # views over the Arrow buffers instead of being copied into a consolidated block.
+        return payload.to_pandas(split_blocks=True)
+    return pd.DataFrame.from_records(payload or [])
+
+
+def map_frame(payload: object) -> Dict[str, object]:
+    """Turn a map response into the JSON payload shape with ``telemetry`` as a DataFrame.
+
+    Arrow responses carry ``route`` and ``simplification`` in the schema metadata. JSON
+    timestamps are parsed so both paths yield a UTC ``event_timestamp`` column.
+    """
+    if _is_arrow(payload):
+        return {**_arrow_metadata(payload), "telemetry": payload.to_pandas(split_blocks=True)}
+    telemetry = pd.DataFrame.from_records(payload.get("telemetry") or [])
+    if "event_timestamp" in telemetry:
+        telemetry["event_timestamp"] = pd.to_datetime(telemetry["event_timestamp"], utc=True, format="ISO8601")
+    return {**payload, "telemetry": telemetry}
+
+
+def _timed(stage: str) -> Callable:
+    """Record every call of a client method as ``stage`` in the client's instrumentation."""
+
+    def decorate(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self: "BackendClient", *args, **kwargs):
+            with self.instrumentation.span(stage):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
 
-@dataclass
 class RouteSummary:
-    code: str
-    origin: Optional[str]
-    destination: Optional[str]
-    mode: Optional[str]
-    weeks: List[str]
+    """Compact route record. ``weeks`` stays ``None`` until the route's weeks are loaded."""
+
+    __slots__ = ("code", "origin", "destination", "mode", "weeks")
+
+    def __init__(
+        self,
+        code: str,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        mode: Optional[str] = None,
+        weeks: Optional[List[str]] = None,
+    ) -> None:
+        self.code = code
+        self.origin = origin
+        self.destination = destination
+        self.mode = mode
+        self.weeks = weeks
+
+    @classmethod
+    def from_payload(cls, item: Dict) -> "RouteSummary":
+        weeks = item.get("weeks")
+        return cls(
+            code=item.get("code"),
+            origin=item.get("origin"),
+            destination=item.get("destination"),
+            mode=item.get("mode"),
+            weeks=[str(week) for week in weeks] if weeks is not None else None,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RouteSummary):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"RouteSummary({fields})"
+
+
+@dataclass
+class RoutePage:
+    """One page of :meth:`BackendClient.search_routes`; pass ``next_cursor`` to get the next."""
+
+    routes: List[RouteSummary]
+    next_cursor: Optional[str] = None
+
+
+@dataclass
+class DashboardBundle:
+    """Results of :meth:`BackendClient.fetch_dashboard`; failed parts are listed in ``errors``."""
+
+    kpis: Optional[Dict] = None
+    trend: Union[List[Dict], pd.DataFrame, None] = None
+    map: Optional[Dict] = None
+    errors: Dict[str, BackendError] = field(default_factory=dict)
 
 
 class BackendClient:
     """Simple wrapper around the REST API with JWT session awareness."""
 
-    def __init__(self, base_url: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        *,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        cache: Optional[ResponseCache] = SHARED_RESPONSE_CACHE,
+        instrumentation: Optional[Instrumentation] = SHARED_INSTRUMENTATION,
+        arrow: bool = True,
+    ) -> None:
         self.base_url = base_url or os.environ.get("BACKEND_URL", "http://localhost:4000")
-        self._session = requests.Session()
+        # Size the connection pool explicitly so concurrent fetches reuse keep-alive
+        # connections instead of opening (and discarding) extra sockets.
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._local = threading.local()
         self._token: Optional[str] = None
+        self._role: Optional[str] = None
+        # Shared by every client in the process by default; pass ``cache=None`` to disable.
+        self.cache = cache
+        # Timing spans for every request, network round trip and JSON decode.
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation(enabled=False)
+        # The ``*_frame`` accessors ask for Arrow IPC when this is set and pyarrow is installed.
+        self.arrow = arrow and pa is not None
+
+    @property
+    def _session(self) -> requests.Session:
+        """This thread's session.
+
+        ``requests.Session`` is not thread-safe (cookies, redirects and adapter state are
+        mutated per request), so :meth:`fetch_dashboard` workers and prefetch threads each get
+        their own. They all mount the one adapter, whose urllib3 pool is thread-safe, so
+        keep-alive connections are still shared. The JWT travels in headers, not session state.
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+        return session
 
     # ------------------------------------------------------------------
     # Authentication helpers
     # ------------------------------------------------------------------
+    @_timed("client.login")
     def login(self, email: str, password: str) -> Dict:
         """Authenticate against the backend and retain the JWT."""
         try:
@@ -51,6 +232,7 @@ class BackendClient:
             raise BackendError("Login succeeded but token missing in response")
 
         self._token = token
+        self._role = (payload.get("user") or {}).get("role")
         return payload
 
     def _headers(self) -> Dict[str, str]:
@@ -62,74 +244,360 @@ class BackendClient:
     # ------------------------------------------------------------------
     # Data accessors
     # ------------------------------------------------------------------
-    def list_routes(self) -> List[RouteSummary]:
-        try:
-            response = self._session.get(
-                f"{self.base_url}/api/kpi",
-                headers=self._headers(),
-                timeout=30,
-            )
-        except requests.RequestException as exc:
-            raise BackendError(str(exc)) from exc
-        if response.status_code >= 400:
-            raise BackendError(response.json().get("message", "Unable to load routes"))
-
-        routes: List[RouteSummary] = []
-        for item in response.json():
-            routes.append(
-                RouteSummary(
-                    code=item.get("code"),
-                    origin=item.get("origin"),
-                    destination=item.get("destination"),
-                    mode=item.get("mode"),
-                    weeks=[str(week) for week in item.get("weeks", [])],
-                )
-            )
-        return routes
+    def _request_json(
+        self,
+        endpoint: str,
+        method: str,
+        path: str,
+        *,
+        body: Optional[Dict] = None,
+        error_message: str,
+        not_found_message: Optional[str] = None,
+        revalidate: bool = False,
+        arrow: bool = False,
+    ) -> object:
+        """Send a request through the response cache and return the decoded JSON body.
 
-    def fetch_kpis(self, route_code: str, week: str) -> Dict:
-        try:
-            response = self._session.get(
-                f"{self.base_url}/api/kpi/{route_code}/{week}",
-                headers=self._headers(),
-                timeout=30,
-            )
-        except requests.RequestException as exc:
-            raise BackendError(str(exc)) from exc
-        if response.status_code == 404:
-            raise BackendError("No KPI data found for selection")
-        if response.status_code >= 400:
-            raise BackendError(response.json().get("message", "Unable to load KPIs"))
-        return response.json()
+        Fresh cache entries are returned without a round trip unless ``revalidate`` is
+        set. Stale entries with an ``ETag`` are revalidated with ``If-None-Match`` and
+        reused when the backend answers ``304 Not Modified``. With ``arrow`` (unless disabled
+        on the client) the request prefers an Arrow IPC stream; such responses are returned
+        as a :class:`pyarrow.Table` backed by the response body, others as decoded JSON.
+        """
+        arrow = arrow and self.arrow
+        url = f"{self.base_url}{path}"
+        key = (
+            make_cache_key(endpoint, method, url, body, self._role, variant="arrow" if arrow else None)
+            if self.cache is not None
+            else None
+        )
 
-    def fetch_trend(self, route_code: str, weeks: List[str]) -> List[Dict]:
-        try:
-            response = self._session.post(
-                f"{self.base_url}/api/kpi/{route_code}/trend",
-                headers=self._headers(),
-                json={"weeks": weeks},
-                timeout=30,
-            )
-        except requests.RequestException as exc:
-            raise BackendError(str(exc)) from exc
+        headers = self._headers()
+        if arrow:
+            headers["Accept"] = ARROW_ACCEPT
+        if key is not None:
+            entry, fresh = self.cache.lookup(key)
+            if entry is not None and fresh and not revalidate:
+                return entry.value
+            if entry is not None and entry.etag:
+                headers["If-None-Match"] = entry.etag
+
+        with self.instrumentation.span(f"http.{endpoint}") as span:
+            try:
+                response = self._session.request(method, url, headers=headers, json=body, timeout=30)
+                if response.status_code == 304 and key is not None:
+                    cached = self.cache.refresh(key)
+                    if cached is not None:
+                        span.size = 0
+                        span.server_timings = parse_server_timing(response.headers.get("Server-Timing"))
+                        return cached
+                    # The entry was evicted while the request was in flight; fetch it in full.
+                    headers.pop("If-None-Match", None)
+                    response = self._session.request(method, url, headers=headers, json=body, timeout=30)
+            except requests.RequestException as exc:
+                raise BackendError(str(exc)) from exc
+            span.size = len(response.content)
+            span.server_timings = parse_server_timing(response.headers.get("Server-Timing"))
+
+        if not_found_message and response.status_code == 404:
+            raise BackendError(not_found_message, status_code=404)
         if response.status_code >= 400:
-            raise BackendError(response.json().get("message", "Unable to load KPI trend"))
-        return response.json()
+            raise BackendError(response.json().get("message", error_message), status_code=response.status_code)
 
-    def fetch_map(self, route_code: str) -> Dict:
-        try:
-            response = self._session.get(
-                f"{self.base_url}/api/map/{route_code}",
-                headers=self._headers(),
-                timeout=30,
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+        with self.instrumentation.span(f"decode.{endpoint}"):
+            if arrow and content_type == ARROW_STREAM_TYPE:
+                payload = pa.ipc.open_stream(pa.py_buffer(response.content)).read_all()
+            else:
+                payload = response.json()
+        if key is not None:
+            self.cache.store(key, payload, etag=response.headers.get("ETag"))
+        return payload
+
+    # ------------------------------------------------------------------
+    # Data accessors
+    # ------------------------------------------------------------------
+    @_timed("client.list_routes")
+    def list_routes(self, *, revalidate: bool = False) -> List[RouteSummary]:
+        payload = self._request_json(
+            "routes",
+            "GET",
+            "/api/kpi",
+            error_message="Unable to load routes",
+            revalidate=revalidate,
+        )
+
+        return [RouteSummary.from_payload({"weeks": [], **item}) for item in payload]
+
+    @_timed("client.search_routes")
+    def search_routes(
+        self,
+        prefix: str = "",
+        *,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_ROUTE_PAGE_SIZE,
+        revalidate: bool = False,
+    ) -> RoutePage:
+        """Return one page of routes whose code starts with ``prefix``, ordered by code.
+
+        Week lists are not included; load them for a single route with
+        :meth:`fetch_route_weeks`. Backends without the catalogue endpoint raise a
+        :class:`BackendError` with ``status_code == 404``.
+        """
+        query = {key: value for key, value in (("prefix", prefix), ("cursor", cursor), ("limit", limit)) if value}
+        payload = self._request_json(
+            "route_search",
+            "GET",
+            f"/api/kpi/routes?{urlencode(query)}" if query else "/api/kpi/routes",
+            error_message="Unable to search routes",
+            not_found_message="Route search is not available on this backend",
+            revalidate=revalidate,
+        )
+        return RoutePage(
+            routes=[RouteSummary.from_payload(item) for item in payload.get("routes", [])],
+            next_cursor=payload.get("nextCursor"),
+        )
+
+    @_timed("client.fetch_route_weeks")
+    def fetch_route_weeks(self, route_code: str, *, revalidate: bool = False) -> List[str]:
+        payload = self._request_json(
+            "route_weeks",
+            "GET",
+            f"/api/kpi/routes/{route_code}/weeks",
+            error_message="Unable to load route weeks",
+            not_found_message="Route not found",
+            revalidate=revalidate,
+        )
+        return [str(week) for week in payload.get("weeks", [])]
+
+    @_timed("client.fetch_kpis")
+    def fetch_kpis(self, route_code: str, week: str, *, revalidate: bool = False) -> Dict:
+        return self._request_json(
+            "kpis",
+            "GET",
+            f"/api/kpi/{route_code}/{week}",
+            error_message="Unable to load KPIs",
+            not_found_message="No KPI data found for selection",
+            revalidate=revalidate,
+        )
+
+    @_timed("client.fetch_kpis_many")
+    def fetch_kpis_many(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        *,
+        chunk_size: int = DEFAULT_KPI_BATCH_SIZE,
+        revalidate: bool = False,
+    ) -> Dict[Tuple[str, str], Optional[Dict]]:
+        """Fetch KPIs for many ``(route_code, week)`` pairs through ``POST /api/kpi/batch``.
+
+        Pairs are sent in chunks of ``chunk_size`` (the backend accepts at most 1000 per
+        request). Pairs without data map to ``None``.
+        """
+        unique_pairs = list(dict.fromkeys((str(route_code), str(week)) for route_code, week in pairs))
+        results: Dict[Tuple[str, str], Optional[Dict]] = {}
+        for start in range(0, len(unique_pairs), chunk_size):
+            chunk = unique_pairs[start:start + chunk_size]
+            payload = self._request_json(
+                "kpis_batch",
+                "POST",
+                "/api/kpi/batch",
+                body={"pairs": [{"routeCode": route_code, "week": week} for route_code, week in chunk]},
+                error_message="Unable to load KPIs",
+                revalidate=revalidate,
             )
-        except requests.RequestException as exc:
-            raise BackendError(str(exc)) from exc
-        if response.status_code == 404:
-            raise BackendError("Route telemetry not found")
-        if response.status_code >= 400:
-            raise BackendError(response.json().get("message", "Unable to load map data"))
-        return response.json()
+            results.update(zip(chunk, payload.get("results", [])))
+        return results
+
+    @_timed("client.fetch_leaderboard")
+    def fetch_leaderboard(
+        self,
+        week: str,
+        *,
+        metric: str = "sdei",
+        descending: bool = True,
+        limit: int = DEFAULT_LEADERBOARD_LIMIT,
+        revalidate: bool = False,
+    ) -> Dict:
+        """Rank every route reporting ``week`` by ``metric`` through ``GET /api/kpi/leaderboard``.
+
+        Returns ``{"week", "metric", "order", "total", "results"}`` where ``results`` holds
+        the top ``limit`` routes with their ``rank``, counties and KPIs. Backends without
+        the endpoint raise a :class:`BackendError` with ``status_code == 404``.
+        """
+        if metric not in LEADERBOARD_METRICS:
+            raise ValueError(f"metric must be one of {', '.join(LEADERBOARD_METRICS)}")
+        query = {"week": week, "metric": metric, "order": "desc" if descending else "asc", "limit": limit}
+        return self._request_json(
+            "leaderboard",
+            "GET",
+            f"/api/kpi/leaderboard?{urlencode(query)}",
+            error_message="Unable to load the leaderboard",
+            not_found_message="The leaderboard is not available on this backend",
+            revalidate=revalidate,
+        )
+
+    def _trend_request(self, route_code: str, weeks: List[str], resolution: str, revalidate: bool, arrow: bool) -> object:
+        if resolution not in TREND_RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {', '.join(TREND_RESOLUTIONS)}")
+        body: Dict[str, object] = {"weeks": weeks}
+        if resolution != "week":
+            body["resolution"] = resolution
+        return self._request_json(
+            "trend",
+            "POST",
+            f"/api/kpi/{route_code}/trend",
+            body=body,
+            error_message="Unable to load KPI trend",
+            revalidate=revalidate,
+            arrow=arrow,
+        )
+
+    @_timed("client.fetch_trend")
+    def fetch_trend(
+        self,
+        route_code: str,
+        weeks: List[str],
+        *,
+        resolution: str = "week",
+        revalidate: bool = False,
+    ) -> List[Dict]:
+        """Fetch the KPI trend for ``weeks`` (all weeks when empty).
+
+        ``resolution`` is one of ``TREND_RESOLUTIONS``. ``"month"`` and ``"quarter"`` have
+        the backend pool each period's raw inputs before taking the ratios, and ``"auto"``
+        lets it pick the finest resolution that keeps the series short. Each point's
+        ``week`` is the period label and ``weeks`` the number of weeks it covers.
+        """
+        return self._trend_request(route_code, weeks, resolution, revalidate, arrow=False)
+
+    @_timed("client.fetch_trend_frame")
+    def fetch_trend_frame(
+        self,
+        route_code: str,
+        weeks: List[str],
+        *,
+        resolution: str = "week",
+        revalidate: bool = False,
+    ) -> pd.DataFrame:
+        """:meth:`fetch_trend` as a DataFrame, transferred as Arrow IPC when the backend supports it."""
+        return trend_frame(self._trend_request(route_code, weeks, resolution, revalidate, arrow=True))
+
+    def _map_request(
+        self,
+        route_code: str,
+        max_points: Optional[int],
+        tolerance: Optional[float],
+        zoom: Optional[float],
+        revalidate: bool,
+        arrow: bool,
+    ) -> object:
+        if tolerance is None and zoom is not None:
+            tolerance = tolerance_for_zoom(zoom)
+
+        query = {key: value for key, value in (("maxPoints", max_points), ("tolerance", tolerance)) if value is not None}
+        path = f"/api/map/{route_code}"
+        if query:
+            path = f"{path}?{urlencode(query)}"
+
+        payload = self._request_json(
+            "map",
+            "GET",
+            path,
+            error_message="Unable to load map data",
+            not_found_message="Route telemetry not found",
+            revalidate=revalidate,
+            arrow=arrow,
+        )
+        if query:
+            if _is_arrow(payload):
+                metadata = _arrow_metadata(payload)
+                if "simplification" in metadata:
+                    return payload
+                payload = {**metadata, "telemetry": payload.to_pylist()}
+            payload = ensure_simplified(payload, tolerance=tolerance, max_points=max_points)
+        return payload
+
+    @_timed("client.fetch_map")
+    def fetch_map(
+        self,
+        route_code: str,
+        *,
+        max_points: Optional[int] = None,
+        tolerance: Optional[float] = None,
+        zoom: Optional[float] = None,
+        revalidate: bool = False,
+    ) -> Dict:
+        """Fetch route telemetry, optionally simplified to a level of detail.
+
+        ``max_points`` caps the number of returned vertices and ``tolerance`` (degrees)
+        drops vertices that deviate less than that from the path; ``zoom`` derives the
+        tolerance from one screen pixel at that map zoom. The first and last points and
+        all timestamps are preserved. When the backend ignores the parameters the
+        telemetry is simplified locally so callers always receive the requested detail.
+        """
+        return self._map_request(route_code, max_points, tolerance, zoom, revalidate, arrow=False)
+
+    @_timed("client.fetch_map_frame")
+    def fetch_map_frame(
+        self,
+        route_code: str,
+        *,
+        max_points: Optional[int] = None,
+        tolerance: Optional[float] = None,
+        zoom: Optional[float] = None,
+        revalidate: bool = False,
+    ) -> Dict[str, object]:
+        """:meth:`fetch_map` with ``telemetry`` as a DataFrame, transferred as Arrow IPC when possible."""
+        return map_frame(self._map_request(route_code, max_points, tolerance, zoom, revalidate, arrow=True))
+
+    @_timed("client.fetch_dashboard")
+    def fetch_dashboard(
+        self,
+        route_code: str,
+        week: str,
+        trend_weeks: List[str],
+        *,
+        parts: Iterable[str] = DASHBOARD_PARTS,
+        map_options: Optional[Dict[str, object]] = None,
+        trend_resolution: str = "week",
+        frames: bool = False,
+        revalidate: bool = False,
+    ) -> DashboardBundle:
+        """Fetch the KPI, trend and map payloads for one selection concurrently.
+
+        The calls run on a small thread pool so the total wait is the slowest call rather
+        than the sum of all three. Each worker uses its own session over the client's shared
+        connection pool. A failing call does not cancel the others: its
+        :class:`BackendError` is recorded under ``errors`` and the matching field is left
+        as ``None``. ``parts`` limits the fetch to a subset of ``DASHBOARD_PARTS``,
+        ``map_options`` is forwarded to :meth:`fetch_map`, ``trend_resolution`` to
+        :meth:`fetch_trend` and ``revalidate`` bypasses fresh cache entries. With ``frames``
+        the trend and map telemetry come back as DataFrames via :meth:`fetch_trend_frame`
+        and :meth:`fetch_map_frame`.
+        """
+        fetch_trend = self.fetch_trend_frame if frames else self.fetch_trend
+        fetch_map = self.fetch_map_frame if frames else self.fetch_map
+        calls: Dict[str, Callable[[], object]] = {
+            "kpis": lambda: self.fetch_kpis(route_code, week, revalidate=revalidate),
+            "trend": lambda: fetch_trend(route_code, trend_weeks, resolution=trend_resolution, revalidate=revalidate),
+            "map": lambda: fetch_map(route_code, revalidate=revalidate, **(map_options or {})),
+        }
+        selected = [part for part in DASHBOARD_PARTS if part in set(parts)]
+        bundle = DashboardBundle()
+        if not selected:
+            return bundle
+
+        with ThreadPoolExecutor(max_workers=len(selected), thread_name_prefix="scci-fetch") as executor:
+            futures = {part: executor.submit(calls[part]) for part in selected}
+            for part, future in futures.items():
+                try:
+                    setattr(bundle, part, future.result())
+                except BackendError as err:
+                    bundle.errors[part] = err
+                except (ValueError, requests.RequestException) as exc:
+                    bundle.errors[part] = BackendError(str(exc))
+        return bundle
 
 
-__all__ = ["BackendClient", "BackendError", "RouteSummary"]
+__all__ = ["BackendClient", "BackendError", "DashboardBundle", "RoutePage", "RouteSummary"]
@@ -0,0 +1,269 @@
+"""Lightweight timing spans for the Streamlit dashboard.
+
+Wrap a stage in :meth:`Instrumentation.span` (or decorate a function with
+:func:`instrumented`) to record its wall time, optional payload size and any
+``Server-Timing`` durations the backend reported. Each stage keeps a rolling window of
+recent samples for percentiles and cumulative histogram buckets for
+:meth:`Instrumentation.to_prometheus`.
+
+Like the response cache, a process-wide :data:`SHARED_INSTRUMENTATION` instance is used
+by default so every Streamlit session contributes to the same histograms.
+"""
+from __future__ import annotations
+
+import bisect
+import functools
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+DEFAULT_WINDOW = 512
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = "scci_dashboard"
+# ``Server-Timing`` metrics that cover the whole request, in order of preference. Other
+# metrics (``db``, ``cache``, ...) are usually nested inside them.
+SERVER_TOTAL_METRICS = ("total", "app")
+
+F = TypeVar("F", bound=Callable[..., object])
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """Parse a ``Server-Timing`` header into ``{metric: seconds}``.
+
+    ``"app;dur=12.5, db;dur=3"`` becomes ``{"app": 0.0125, "db": 0.003}``. Metrics
+    without a ``dur`` parameter are ignored.
+    """
+    timings: Dict[str, float] = {}
+    if not header:
+        return timings
+    for entry in header.split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "dur" and name:
+                try:
+                    timings[name] = float(value.strip().strip('"')) / 1000.0
+                except ValueError:
+                    pass
+    return timings
+
+
+class StageHistogram:
+    """Rolling samples plus cumulative Prometheus-style buckets for one stage."""
+
+    def __init__(self, *, window: int = DEFAULT_WINDOW, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.bytes_total = 0
+        self.bytes_count = 0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float, *, size: Optional[int] = None, error: bool = False) -> None:
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+        position = bisect.bisect_left(self.buckets, seconds)
+        if position < len(self.bucket_counts):
+            self.bucket_counts[position] += 1
+        if error:
+            self.errors += 1
+        if size is not None:
+            self.bytes_total += size
+            self.bytes_count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Quantile of the rolling window: the sample at index ``round(q * (n - 1))``, not interpolated."""
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[index]
+
+
+class Span:
+    """A running timing span; set ``size`` or add ``server_timings`` before it closes."""
+
+    __slots__ = ("stage", "size", "server_timings", "_owner", "_started")
+
+    def __init__(self, owner: "Instrumentation", stage: str) -> None:
+        self.stage = stage
+        self.size: Optional[int] = None
+        self.server_timings: Dict[str, float] = {}
+        self._owner = owner
+        self._started = 0.0
+
+    def __enter__(self) -> "Span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self._owner.record(
+            self.stage,
+            time.perf_counter() - self._started,
+            size=self.size,
+            server_timings=self.server_timings,
+            error=exc_type is not None,
+        )
+
+
+class _NullSpan:
+    __slots__ = ("size", "server_timings")
+
+    def __init__(self) -> None:
+        self.size = None
+        self.server_timings: Dict[str, float] = {}
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        return None
+
+
+class Instrumentation:
+    """Thread-safe registry of per-stage latency histograms."""
+
+    def __init__(self, *, enabled: bool = True, window: int = DEFAULT_WINDOW, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.enabled = enabled
+        self.window = window
+        self.buckets = tuple(buckets)
+        self._stages: Dict[str, StageHistogram] = {}
+        self._server: Dict[Tuple[str, str], StageHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, registry: Dict, key: object) -> StageHistogram:
+        histogram = registry.get(key)
+        if histogram is None:
+            histogram = registry[key] = StageHistogram(window=self.window, buckets=self.buckets)
+        return histogram
+
+    def span(self, stage: str):
+        """Context manager timing ``stage``; a no-op when instrumentation is disabled."""
+        return Span(self, stage) if self.enabled else _NullSpan()
+
+    def record(
+        self,
+        stage: str,
+        seconds: float,
+        *,
+        size: Optional[int] = None,
+        server_timings: Optional[Mapping[str, float]] = None,
+        error: bool = False,
+    ) -> None:
+        with self._lock:
+            self._histogram(self._stages, stage).observe(seconds, size=size, error=error)
+            for metric, value in (server_timings or {}).items():
+                self._histogram(self._server, (stage, metric)).observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._server.clear()
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """One row per stage with counts, rolling percentiles (ms) and mean payload size.
+
+        ``server_ms`` is the mean of the first :data:`SERVER_TOTAL_METRICS` entry the backend
+        reported for the stage; nested metrics are only in :meth:`to_prometheus`.
+        """
+        rows = []
+        with self._lock:
+            server = {key: histogram.total / histogram.count for key, histogram in self._server.items() if histogram.count}
+            for stage, histogram in sorted(self._stages.items()):
+                row: Dict[str, object] = {
+                    "stage": stage,
+                    "count": histogram.count,
+                    "errors": histogram.errors,
+                    "mean_ms": 1000 * histogram.total / histogram.count if histogram.count else None,
+                }
+                for label, q in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+                    value = histogram.quantile(q)
+                    row[label] = 1000 * value if value is not None else None
+                row["mean_bytes"] = histogram.bytes_total / histogram.bytes_count if histogram.bytes_count else None
+                server_mean = next(
+                    (server[stage, metric] for metric in SERVER_TOTAL_METRICS if (stage, metric) in server), None
+                )
+                row["server_ms"] = 1000 * server_mean if server_mean is not None else None
+                rows.append(row)
+        return rows
+
+    def to_prometheus(self, prefix: str = METRIC_PREFIX) -> str:
+        """Render every histogram in the Prometheus text exposition format."""
+        with self._lock:
+            return self._render_prometheus(prefix)
+
+    def _render_prometheus(self, prefix: str) -> str:
+        stages = sorted(self._stages.items())
+        server = sorted(self._server.items())
+        lines: List[str] = []
+        lines.extend(_histogram_lines(f"{prefix}_stage_duration_seconds", "Wall time per dashboard stage.", [
+            ({"stage": stage}, histogram) for stage, histogram in stages
+        ]))
+        lines.extend(_histogram_lines(f"{prefix}_server_duration_seconds", "Server-Timing durations reported by the backend.", [
+            ({"stage": stage, "metric": metric}, histogram) for (stage, metric), histogram in server
+        ]))
+
+        lines.append(f"# HELP {prefix}_stage_errors_total Stages that raised an exception.")
+        lines.append(f"# TYPE {prefix}_stage_errors_total counter")
+        for stage, histogram in stages:
+            lines.append(f"{prefix}_stage_errors_total{_labels({'stage': stage})} {histogram.errors}")
+
+        lines.append(f"# HELP {prefix}_payload_bytes_total Response bytes received per stage.")
+        lines.append(f"# TYPE {prefix}_payload_bytes_total counter")
+        for stage, histogram in stages:
+            if histogram.bytes_count:
+                lines.append(f"{prefix}_payload_bytes_total{_labels({'stage': stage})} {histogram.bytes_total}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Mapping[str, str]) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _histogram_lines(name: str, description: str, series: Sequence[Tuple[Mapping[str, str], StageHistogram]]) -> Iterator[str]:
+    yield f"# HELP {name} {description}"
+    yield f"# TYPE {name} histogram"
+    for labels, histogram in series:
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+            cumulative += count
+            yield f"{name}_bucket{_labels({**labels, 'le': repr(bound)})} {cumulative}"
+        yield f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {histogram.count}"
+        yield f"{name}_sum{_labels(labels)} {histogram.total!r}"
+        yield f"{name}_count{_labels(labels)} {histogram.count}"
+
+
+SHARED_INSTRUMENTATION = Instrumentation()
+
+
+def instrumented(stage: str, instrumentation: Optional[Instrumentation] = None) -> Callable[[F], F]:
+    """Decorator that times every call of the wrapped function as ``stage``."""
+
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with (instrumentation or SHARED_INSTRUMENTATION).span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+__all__ = [
+    "DEFAULT_BUCKETS",
+    "Instrumentation",
+    "SERVER_TOTAL_METRICS",
+    "SHARED_INSTRUMENTATION",
+    "Span",
+    "instrumented",
+    "parse_server_timing",
+]
@@ -0,0 +1,82 @@
+"""Level-of-detail helpers for route telemetry paths.
+
+Mirrors ``backend/services/mapService.js`` so the dashboard can simplify telemetry that
+an older backend returned in full. Simplification is a priority-driven Douglas–Peucker:
+points are added in order of their deviation from the current path until either
+``tolerance`` (in degrees) is met or ``max_points`` are kept. The first and last points
+are always retained and every output point is an original record.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+TILE_SIZE = 256
+
+
+def tolerance_for_zoom(zoom: float) -> float:
+    """Approximate width of one screen pixel, in degrees, at a web-mercator ``zoom`` level."""
+    return 360.0 / (TILE_SIZE * 2 ** zoom)
+
+
+def _farthest(coordinates: np.ndarray, start: int, end: int) -> tuple:
+    segment = coordinates[start + 1:end]
+    origin = coordinates[start]
+    direction = coordinates[end] - origin
+    length = float(np.hypot(direction[0], direction[1]))
+    offsets = segment - origin
+    if length == 0:
+        distances = np.hypot(offsets[:, 0], offsets[:, 1])
+    else:
+        distances = np.abs(direction[1] * offsets[:, 0] - direction[0] * offsets[:, 1]) / length
+    position = int(np.argmax(distances))
+    return float(distances[position]), start + 1 + position
+
+
+def simplify_indices(coordinates: np.ndarray, *, tolerance: float = 0.0, max_points: Optional[int] = None) -> np.ndarray:
+    """Return the sorted indices of ``coordinates`` (an ``(n, 2)`` array) to keep."""
+    count = len(coordinates)
+    limit = count if max_points is None else max(2, int(max_points))
+    if count <= 2 or (count <= limit and tolerance <= 0):
+        return np.arange(count)
+
+    keep = np.zeros(count, dtype=bool)
+    keep[[0, count - 1]] = True
+    kept = 2
+    heap: List[tuple] = []
+
+    def push(start: int, end: int) -> None:
+        if end - start >= 2:
+            distance, index = _farthest(coordinates, start, end)
+            heapq.heappush(heap, (-distance, start, end, index))
+
+    push(0, count - 1)
+    while heap and kept < limit:
+        negative_distance, start, end, index = heapq.heappop(heap)
+        if -negative_distance <= tolerance:
+            break
+        keep[index] = True
+        kept += 1
+        push(start, index)
+        push(index, end)
+
+    return np.flatnonzero(keep)
+
+
+def simplify_telemetry(
+    telemetry: Sequence[Dict],
+    *,
+    tolerance: float = 0.0,
+    max_points: Optional[int] = None,
+) -> List[Dict]:
+    """Simplify a list of telemetry dictionaries ordered by ``event_timestamp``."""
+    located = [point for point in telemetry if point.get("latitude") is not None and point.get("longitude") is not None]
+    if not located:
+        return []
+    coordinates = np.array([[point["longitude"], point["latitude"]] for point in located], dtype=np.float64)
+    return [located[index] for index in simplify_indices(coordinates, tolerance=tolerance, max_points=max_points)]
+
+
+__all__ = ["simplify_indices", "simplify_telemetry", "tolerance_for_zoom"]
@@ -0,0 +1,208 @@
+"""Background prefetching of the dashboard selections an analyst is likely to open next.
+
+After each render the app hands :class:`Prefetcher` a plan of keyed fetches for the
+neighbouring weeks of the selected route and the neighbouring routes in the selectbox.
+The fetches run on a small thread pool and land in the client's :class:`ResponseCache`,
+so stepping to one of them is answered from memory. Scheduling a new plan cancels the
+queued fetches that are no longer in it, at most ``max_pending`` fetches are queued at a
+time and keys fetched within ``fresh_for`` seconds are not fetched again, so moving
+quickly through the selectbox does not flood the backend.
+
+A :class:`Prefetcher` normally owns its thread pool. The app instead gives every session's
+prefetcher one process-wide pool (see :func:`create_shared_executor`), so sessions that
+end without a shutdown leave no threads behind.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, TypeVar
+
+import requests
+
+from backend_client import BackendClient, BackendError
+
+DEFAULT_PREFETCH_WORKERS = 2
+# Threads in the pool shared by every session of the app.
+DEFAULT_SHARED_WORKERS = 4
+DEFAULT_MAX_PENDING = 8
+DEFAULT_FRESH_FOR = 60.0
+DEFAULT_RADIUS = 1
+# Bound on the remembered "recently fetched" keys.
+MAX_COMPLETED = 256
+
+T = TypeVar("T")
+
+
+def neighbours(items: Sequence[T], current: T, radius: int = DEFAULT_RADIUS) -> List[T]:
+    """Items within ``radius`` positions of ``current``, nearest first and the next before the previous."""
+    try:
+        index = list(items).index(current)
+    except ValueError:
+        return []
+    found = []
+    for distance in range(1, radius + 1):
+        for position in (index + distance, index - distance):
+            if 0 <= position < len(items):
+                found.append(items[position])
+    return found
+
+
+def create_shared_executor(max_workers: int = DEFAULT_SHARED_WORKERS) -> ThreadPoolExecutor:
+    """A pool for several :class:`Prefetcher` instances; it lives as long as the process."""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scci-prefetch")
+
+
+class Prefetcher:
+    """Keyed background fetches on a bounded pool with cancellation of outdated work.
+
+    Pass ``executor`` to run on a shared pool; it is left running by :meth:`shutdown`.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = DEFAULT_PREFETCH_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        fresh_for: float = DEFAULT_FRESH_FOR,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.max_pending = max_pending
+        self.fresh_for = fresh_for
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scci-prefetch")
+        self._futures: Dict[Hashable, Future] = {}
+        self._completed: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {"scheduled": 0, "completed": 0, "cancelled": 0, "skipped": 0, "errors": 0}
+
+    def _run(self, key: Hashable, task: Callable[[], object]) -> None:
+        try:
+            task()
+        except (BackendError, ValueError, requests.RequestException):
+            # A failed prefetch only means the foreground fetch will do the work itself.
+            with self._lock:
+                self._counters["errors"] += 1
+            return
+        with self._lock:
+            self._counters["completed"] += 1
+            self._completed[key] = time.monotonic()
+            self._completed.move_to_end(key)
+            while len(self._completed) > MAX_COMPLETED:
+                self._completed.popitem(last=False)
+
+    def _recently_completed(self, key: Hashable, now: float) -> bool:
+        completed_at = self._completed.get(key)
+        return completed_at is not None and now - completed_at < self.fresh_for
+
+    def schedule(self, tasks: Mapping[Hashable, Callable[[], object]]) -> int:
+        """Replace the queued plan with ``tasks`` (in priority order) and return how many were submitted.
+
+        Queued fetches whose keys are not in ``tasks`` are cancelled. Fetches already
+        running finish in the background. Keys already queued or running are left alone.
+        """
+        now = time.monotonic()
+        submitted = 0
+        with self._lock:
+            self._futures = {key: future for key, future in self._futures.items() if not future.done()}
+            for key in [key for key in self._futures if key not in tasks]:
+                if self._futures[key].cancel():
+                    self._counters["cancelled"] += 1
+                    del self._futures[key]
+            for key, task in tasks.items():
+                if key in self._futures:
+                    continue
+                if self._recently_completed(key, now):
+                    self._counters["skipped"] += 1
+                    continue
+                if len(self._futures) >= self.max_pending:
+                    break
+                self._futures[key] = self._executor.submit(self._run, key, task)
+                self._counters["scheduled"] += 1
+                submitted += 1
+        return submitted
+
+    def wait(self, keys: Iterable[Hashable], timeout: Optional[float] = None) -> bool:
+        """Block until the in-flight fetches for ``keys`` finish, so the caller reuses them instead of repeating them.
+
+        Returns ``False`` when ``timeout`` expired first; the fetches keep running and the
+        caller should fetch for itself rather than wait out their retries.
+        """
+        with self._lock:
+            futures = [self._futures[key] for key in keys if key in self._futures]
+        if not futures:
+            return True
+        _, pending = wait(futures, timeout=timeout)
+        return not pending
+
+    def cancel(self) -> int:
+        """Cancel every queued fetch and return how many were cancelled."""
+        return self.schedule({})
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = sum(1 for future in self._futures.values() if not future.done())
+            return {**self._counters, "pending": pending}
+
+    def shutdown(self) -> None:
+        self.cancel()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ----------------------------------------------------------------------
+# Dashboard plan
+# ----------------------------------------------------------------------
+def kpi_key(route_code: str, week: str) -> Hashable:
+    return ("kpis", route_code, week)
+
+
+def route_key(route_code: str, trend_resolution: str, map_options: Mapping[str, object]) -> Hashable:
+    return ("route", route_code, trend_resolution, tuple(sorted(map_options.items())))
+
+
+def plan_dashboard_prefetch(
+    client: BackendClient,
+    route_codes: Sequence[str],
+    route_code: str,
+    weeks: Sequence[str],
+    week: str,
+    *,
+    trend_resolution: str,
+    map_options: Mapping[str, object],
+    radius: int = DEFAULT_RADIUS,
+) -> Dict[Hashable, Callable[[], object]]:
+    """Keyed fetches for the selections one step away from the current one.
+
+    Adjacent weeks of the current route only need their KPIs (the trend and map do not
+    depend on the week). A neighbouring route opens on its latest week with every week
+    in the trend, so its task loads the week list and then warms the same KPI, trend
+    frame and map frame requests that ``app.py`` will make. Returns no tasks when the
+    client has no response cache to warm.
+
+    The tasks run on worker threads, so they only call the client and never touch the
+    session's :class:`RouteCatalog`; the catalogue picks the warmed week list up from the
+    response cache when the script thread asks for it.
+    """
+    if client.cache is None:
+        return {}
+
+    def warm_route(code: str) -> None:
+        route_weeks = client.fetch_route_weeks(code)
+        if not route_weeks:
+            return
+        client.fetch_kpis(code, route_weeks[-1])
+        client.fetch_trend_frame(code, sorted(route_weeks), resolution=trend_resolution)
+        client.fetch_map_frame(code, **map_options)
+
+    tasks: Dict[Hashable, Callable[[], object]] = {}
+    for adjacent in neighbours(weeks, week, radius):
+        tasks[kpi_key(route_code, adjacent)] = lambda adjacent=adjacent: client.fetch_kpis(route_code, adjacent)
+    for code in neighbours(route_codes, route_code, radius):
+        tasks[route_key(code, trend_resolution, map_options)] = lambda code=code: warm_route(code)
+    return tasks
+
+
+__all__ = ["Prefetcher", "create_shared_executor", "kpi_key", "neighbours", "plan_dashboard_prefetch", "route_key"]
@@ -0,0 +1,151 @@
+"""Process-wide HTTP response cache shared by every :class:`BackendClient`.
+
+Streamlit runs every browser session in the same Python process, so a module-level cache
+lets analysts who look at the same route share one backend round trip. Entries are keyed
+by endpoint, request parameters and the caller's role. They expire after a per-endpoint
+TTL, and stale entries that carried an ``ETag`` are revalidated with ``If-None-Match``
+rather than downloaded again.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Mapping, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTLS: Mapping[str, float] = {
+    "routes": 60.0,
+    "route_search": 60.0,
+    "route_weeks": 120.0,
+    "kpis": 300.0,
+    "kpis_batch": 300.0,
+    "trend": 300.0,
+    "map": 600.0,
+}
+FALLBACK_TTL = 60.0
+
+CacheKey = Tuple[Hashable, ...]
+
+
+@dataclass
+class CacheEntry:
+    value: object
+    etag: Optional[str]
+    expires_at: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+
+def make_cache_key(
+    endpoint: str,
+    method: str,
+    path: str,
+    body: object = None,
+    role: Optional[str] = None,
+    *,
+    variant: Optional[str] = None,
+) -> CacheKey:
+    """Build a hashable key from the request shape and the caller's role.
+
+    ``variant`` separates responses to the same request in different representations,
+    such as Arrow and JSON bodies negotiated through ``Accept``.
+    """
+    encoded_body = json.dumps(body, sort_keys=True, default=str) if body is not None else None
+    if variant is None:
+        return (endpoint, method.upper(), path, encoded_body, role)
+    return (endpoint, method.upper(), path, encoded_body, role, variant)
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of decoded JSON responses with per-endpoint TTLs."""
+
+    def __init__(self, *, max_entries: int = DEFAULT_MAX_ENTRIES, ttls: Optional[Mapping[str, float]] = None) -> None:
+        self.max_entries = max_entries
+        self.ttls: Dict[str, float] = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, FALLBACK_TTL)
+
+    def _count(self, name: str) -> None:
+        self._counters[name] += 1
+
+    def lookup(self, key: CacheKey) -> Tuple[Optional[CacheEntry], bool]:
+        """Return ``(entry, fresh)``. A stale entry is still returned so its ETag can be reused."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._count("misses")
+                return None, False
+            self._entries.move_to_end(key)
+            if entry.is_fresh(now):
+                self._count("hits")
+                return entry, True
+            self._count("misses")
+            return entry, False
+
+    def store(self, key: CacheKey, value: object, *, etag: Optional[str]) -> None:
+        endpoint = str(key[0])
+        entry = CacheEntry(value=value, etag=etag, expires_at=time.monotonic() + self.ttl_for(endpoint))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._count("stores")
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._count("evictions")
+
+    def refresh(self, key: CacheKey) -> Optional[object]:
+        """Extend a revalidated (HTTP 304) entry and return its cached value."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.expires_at = time.monotonic() + self.ttl_for(str(key[0]))
+            self._entries.move_to_end(key)
+            self._count("revalidated")
+            return entry.value
+
+    def expire(self, key: CacheKey) -> None:
+        """Mark an entry stale so the next request revalidates it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires_at = 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            counters: Dict[str, float] = dict(self._counters)
+            counters["entries"] = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_ratio"] = counters["hits"] / lookups if lookups else 0.0
+        return counters
+
+
+SHARED_RESPONSE_CACHE = ResponseCache()
+
+
+__all__ = [
+    "DEFAULT_MAX_ENTRIES",
+    "DEFAULT_TTLS",
+    "ResponseCache",
+    "SHARED_RESPONSE_CACHE",
+    "make_cache_key",
+]
@@ -0,0 +1,139 @@
+"""Client-side route catalogue backed by the paginated route search API.
+
+:class:`RouteCatalog` keeps every route it has seen in a dict keyed by code, so looking up
+the selected route is O(1), and loads a route's weeks only when they are first asked for.
+Against an older backend without ``GET /api/kpi/routes`` it falls back to the full
+``list_routes`` payload once and answers prefix searches from a sorted code list.
+"""
+from __future__ import annotations
+
+import bisect
+from typing import Dict, Iterator, List, Optional
+
+from backend_client import (
+    DEFAULT_ROUTE_PAGE_SIZE,
+    LEADERBOARD_METRICS,
+    MAX_ROUTE_PAGE_SIZE,
+    BackendClient,
+    BackendError,
+    RoutePage,
+    RouteSummary,
+)
+
+
+class RouteCatalog:
+    """Prefix-searchable index of :class:`RouteSummary` records with lazy week lists."""
+
+    def __init__(self, client: BackendClient, *, page_size: int = DEFAULT_ROUTE_PAGE_SIZE) -> None:
+        self.client = client
+        self.page_size = page_size
+        self._index: Dict[str, RouteSummary] = {}
+        # Sorted codes, populated only when the backend has no search endpoint.
+        self._legacy_codes: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, route_code: object) -> bool:
+        return route_code in self._index
+
+    def get(self, route_code: str) -> Optional[RouteSummary]:
+        return self._index.get(route_code)
+
+    def _remember(self, route: RouteSummary) -> RouteSummary:
+        known = self._index.get(route.code)
+        if known is None:
+            self._index[route.code] = route
+            return route
+        # Keep the already-indexed record (and any weeks loaded on it) but refresh its details.
+        known.origin, known.destination, known.mode = route.origin, route.destination, route.mode
+        if route.weeks is not None:
+            known.weeks = route.weeks
+        return known
+
+    def search(self, prefix: str = "", *, cursor: Optional[str] = None, limit: Optional[int] = None) -> RoutePage:
+        """Return routes whose code starts with ``prefix``, one page at a time."""
+        limit = limit or self.page_size
+        if self._legacy_codes is None:
+            try:
+                page = self.client.search_routes(prefix, cursor=cursor, limit=limit)
+            except BackendError as err:
+                if err.status_code != 404:
+                    raise
+                self._load_legacy()
+            else:
+                return RoutePage(routes=[self._remember(route) for route in page.routes], next_cursor=page.next_cursor)
+        return self._search_legacy(prefix, cursor, limit)
+
+    def iter_routes(self, prefix: str = "", *, limit: int = MAX_ROUTE_PAGE_SIZE) -> Iterator[RouteSummary]:
+        """Yield every route whose code starts with ``prefix``, following the search cursor."""
+        cursor: Optional[str] = None
+        while True:
+            page = self.search(prefix, cursor=cursor, limit=limit)
+            yield from page.routes
+            if not page.next_cursor:
+                return
+            cursor = page.next_cursor
+
+    def weeks(self, route_code: str) -> List[str]:
+        """Return the route's weeks, fetching them on first use."""
+        route = self._index.get(route_code)
+        if route is not None and route.weeks is not None:
+            return route.weeks
+        weeks = self.client.fetch_route_weeks(route_code)
+        if route is None:
+            route = self._remember(RouteSummary(code=route_code))
+        route.weeks = weeks
+        return weeks
+
+    def _load_legacy(self) -> None:
+        for route in self.client.list_routes():
+            self._remember(route)
+        self._legacy_codes = sorted(self._index)
+
+    def _search_legacy(self, prefix: str, cursor: Optional[str], limit: int) -> RoutePage:
+        codes = self._legacy_codes or []
+        start = bisect.bisect_left(codes, prefix)
+        if cursor is not None:
+            start = max(start, bisect.bisect_right(codes, cursor))
+        matches: List[RouteSummary] = []
+        for code in codes[start:]:
+            if not code.startswith(prefix):
+                break
+            if len(matches) == limit:
+                return RoutePage(routes=matches, next_cursor=matches[-1].code)
+            matches.append(self._index[code])
+        return RoutePage(routes=matches)
+
+
+def rank_catalog_routes(catalog: RouteCatalog, week: str, *, metric: str, descending: bool, limit: int) -> Dict:
+    """Leaderboard for backends without ``GET /api/kpi/leaderboard``.
+
+    Pages through the whole catalogue and fetches the week's KPIs in batches, so it ranks
+    the same routes as the endpoint, in the same order, with more requests.
+    """
+    # Routes whose weeks are not loaded yet are included; the batch endpoint returns null for misses.
+    candidates = [route for route in catalog.iter_routes() if route.weeks is None or week in route.weeks]
+    results = catalog.client.fetch_kpis_many([(route.code, week) for route in candidates])
+    rows = []
+    for route in candidates:
+        payload = results.get((route.code, week))
+        if payload:
+            row = {"routeCode": route.code, "origin": route.origin, "destination": route.destination}
+            row.update({name: payload.get(name) for name in LEADERBOARD_METRICS})
+            rows.append(row)
+
+    # Routes without the metric go last, as in ``rankRoutesForWeek``.
+    ranked = sorted((row for row in rows if row[metric] is not None), key=lambda row: row["routeCode"])
+    ranked.sort(key=lambda row: row[metric], reverse=descending)
+    ranked += [row for row in rows if row[metric] is None]
+    return {
+        "week": week,
+        "metric": metric,
+        "order": "desc" if descending else "asc",
+        "total": len(ranked),
+        "results": [{"rank": rank, **row} for rank, row in enumerate(ranked[:limit], start=1)],
+    }
+
+
+__all__ = ["RouteCatalog", "rank_catalog_routes"]
@@ -0,0 +1,19 @@
+"""Make the ``code`` package and the Streamlit modules importable from the repository root.
+
+Run the suite from the repository root with ``python -m pytest tests``.
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for path in (ROOT / "streamlit_app", ROOT):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+# The repository's ``code`` package shadows the standard library module of the same name,
+# which the test runner may already have imported.
+if getattr(sys.modules.get("code"), "__file__", None) != str(ROOT / "code" / "__init__.py"):
+    sys.modules.pop("code", None)
@@ -0,0 +1,157 @@
+"""Retries, re-login and bounded concurrency in :mod:`async_client` against the stub backend."""
+from __future__ import annotations
+
+import asyncio
+from typing import List, Tuple
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from async_client import MAX_BACKOFF, AsyncBackendClient  # noqa: E402
+from backend_client import BackendError  # noqa: E402
+from benchmarks.stub_backend import StubBackend  # noqa: E402
+
+
+class _RecordingRandom:
+    """Stands in for ``random.Random``: records each backoff range and sleeps for none of it."""
+
+    def __init__(self) -> None:
+        self.ranges: List[Tuple[float, float]] = []
+
+    def uniform(self, low: float, high: float) -> float:
+        self.ranges.append((low, high))
+        return 0.0
+
+
+def _client(stub: StubBackend, **options) -> AsyncBackendClient:
+    client = AsyncBackendClient(stub.base_url, **options)
+    client._random = _RecordingRandom()
+    return client
+
+
+def test_transient_failures_are_retried_until_they_succeed() -> None:
+    with StubBackend(routes=4, weeks=5, error_rate=0.3, seed=3) as stub:
+        pairs = [(route, week) for route in stub.route_codes for week in stub.weeks]
+
+        async def run():
+            async with _client(stub, concurrency=4, retries=20) as client:
+                await client.login("analyst@example.com", "secret")
+                results = [item async for item in client.iter_kpis(pairs)]
+            return client, results
+
+        client, results = asyncio.run(run())
+        assert sorted(pair for pair, _ in results) == sorted(pairs)
+        assert all(kpis == stub.kpis(*pair) for pair, kpis in results)
+        # Every injected 503 cost exactly one retry.
+        assert client.retried > 0
+        assert client.requests == stub.requests == 1 + len(pairs) + client.retried
+
+
+def test_backoff_is_full_jitter_exponential_and_gives_up_after_the_retries() -> None:
+    with StubBackend(routes=1, weeks=1, error_rate=1.0) as stub:
+
+        async def run():
+            async with _client(stub, retries=6, backoff=1.0) as client:
+                with pytest.raises(BackendError) as raised:
+                    await client.fetch_kpis(stub.route_codes[0], stub.weeks[0])
+            return client, raised.value
+
+        client, error = asyncio.run(run())
+        assert error.status_code == 503
+        assert stub.requests == client.requests == 7
+        assert client._random.ranges == [(0, 1.0), (0, 2.0), (0, 4.0), (0, 8.0), (0, MAX_BACKOFF), (0, MAX_BACKOFF)]
+
+
+def test_connection_errors_are_retried_and_then_raised() -> None:
+    with StubBackend(routes=1, weeks=1) as stub:
+        base_url = stub.base_url
+
+    async def run():
+        async with AsyncBackendClient(base_url, retries=2) as client:
+            client._random = _RecordingRandom()
+            with pytest.raises(BackendError):
+                await client.list_routes()
+        return client
+
+    client = asyncio.run(run())
+    assert client.requests == 3 and client.retried == 2
+
+
+def test_expired_token_triggers_one_shared_relogin() -> None:
+    with StubBackend(routes=3, weeks=4, latency=0.02, require_auth=True) as stub:
+        pairs = [(route, week) for route in stub.route_codes for week in stub.weeks]
+
+        async def run():
+            async with _client(stub, concurrency=6) as client:
+                await client.login("analyst@example.com", "secret")
+                first = client.token
+                stub.expire_token()
+                results = [item async for item in client.iter_kpis(pairs)]
+            return client, first, results
+
+        client, first, results = asyncio.run(run())
+        assert stub.logins == 2
+        assert client.token == stub.token != first
+        assert all(kpis == stub.kpis(*pair) for pair, kpis in results) and len(results) == len(pairs)
+        assert client.retried == 0
+
+
+def test_401_without_credentials_is_not_retried() -> None:
+    with StubBackend(routes=1, weeks=1, require_auth=True) as stub:
+
+        async def run():
+            async with _client(stub, token="stale") as client:
+                with pytest.raises(BackendError) as raised:
+                    await client.list_routes()
+            return raised.value
+
+        error = asyncio.run(run())
+        assert error.status_code == 401 and str(error) == "Invalid or expired token"
+        assert stub.requests == 1 and stub.logins == 0
+
+
+def test_stream_keeps_at_most_concurrency_requests_scheduled() -> None:
+    with StubBackend(routes=10, weeks=6, latency=0.02) as stub:
+        pulled = 0
+
+        def pairs():
+            nonlocal pulled
+            for route in stub.route_codes:
+                for week in stub.weeks:
+                    pulled += 1
+                    yield route, week
+
+        async def run():
+            outstanding = []
+            async with _client(stub, concurrency=4) as client:
+                await client.login("analyst@example.com", "secret")
+                received = 0
+                async for _ in client.iter_kpis(pairs()):
+                    received += 1
+                    outstanding.append(pulled - received)
+            return received, outstanding
+
+        received, outstanding = asyncio.run(run())
+        assert received == pulled == 60
+        assert max(outstanding) <= 3
+        assert stub.max_in_flight == 4
+
+
+def test_closing_the_stream_early_cancels_pending_requests() -> None:
+    with StubBackend(routes=10, weeks=6, latency=0.05) as stub:
+        pairs = [(route, week) for route in stub.route_codes for week in stub.weeks]
+
+        async def run():
+            async with _client(stub, concurrency=5) as client:
+                await client.login("analyst@example.com", "secret")
+                stream = client.iter_kpis(iter(pairs))
+                first = await stream.__anext__()
+                await stream.aclose()
+                requests = client.requests
+                await asyncio.sleep(0.1)
+                return first, requests, client.requests
+
+        (pair, kpis), requests, later = asyncio.run(run())
+        assert kpis == stub.kpis(*pair)
+        assert requests == later <= 1 + 5
@@ -0,0 +1,44 @@
+"""Thread safety of :class:`backend_client.BackendClient` sessions."""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend_client import BackendClient
+from benchmarks.stub_backend import StubBackend
+
+
+def test_each_thread_gets_its_own_session_over_one_pool() -> None:
+    client = BackendClient("http://127.0.0.1:9", cache=None, instrumentation=None)
+    barrier = threading.Barrier(4)
+
+    def sessions():
+        # The barrier keeps all four workers alive at once, so none is reused.
+        barrier.wait(timeout=5)
+        return client._session, client._session
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pairs = list(executor.map(lambda _: sessions(), range(4)))
+    assert all(first is second for first, second in pairs)
+    assert len({id(first) for first, _ in pairs} | {id(client._session)}) == 5
+    assert all(session.get_adapter(client.base_url) is client._adapter for session, _ in pairs)
+
+
+def test_concurrent_dashboards_share_the_connection_pool() -> None:
+    with StubBackend(routes=6, weeks=4, map_points=50, latency=0.01) as stub:
+        client = BackendClient(stub.base_url, pool_size=4, cache=None, instrumentation=None, arrow=False)
+        client.login("analyst@example.com", "secret")
+
+        def dashboard(route_code):
+            return route_code, client.fetch_dashboard(route_code, stub.weeks[0], stub.weeks, map_options={"max_points": 50})
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            bundles = list(executor.map(dashboard, stub.route_codes * 3))
+
+        for route_code, bundle in bundles:
+            assert bundle.errors == {}
+            assert bundle.kpis == stub.kpis(route_code, stub.weeks[0])
+            assert [point["week"] for point in bundle.trend] == stub.weeks
+            assert bundle.map["route"]["code"] == route_code
+        assert stub.max_in_flight > 1
+        assert len(client._adapter.poolmanager.pools) == 1
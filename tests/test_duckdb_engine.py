@@ -0,0 +1,179 @@
+"""Parity of :class:`code.duckdb_engine.DuckDbKpiEngine` with :func:`summarize_kpis` over Parquet files.
+
+Skipped when ``duckdb`` is not installed.
+"""
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from code.ingestion_utils import DatasetPaths, build_orbcomm_payloads, build_transearch_payloads, normalize_week, week_label
+from code.kpi_utils import summarize_kpis
+
+pytest.importorskip("duckdb")
+
+from code.duckdb_engine import DuckDbKpiEngine  # noqa: E402
+
+
+def _county(path: Path, columns: Dict[str, object]) -> Path:
+    pq.write_table(pa.table(columns), path, row_group_size=2)
+    return path
+
+
+@pytest.fixture()
+def data_dir(tmp_path: Path) -> Path:
+    # Text weeks with a duplicate route-week inside the file and one padded label.
+    _county(tmp_path / "county_a.parquet", {
+        "route_code": ["R1", "R1", "R2", "R1", "R3"],
+        "week": ["202401", "202402", "202401", "202401", " 202403"],
+        "available": [1.0, 2.0, 3.0, 10.0, 5.0],
+        "loaded": [4.0, 4.0, 0.0, 8.0, 5.0],
+        "used": [1.0, None, 2.0, 3.0, 1.0],
+        "total": [2.0, 2.0, 4.0, 6.0, 3.0],
+        "avg_stop_duration": [3.0, 0.0, 1.5, 2.0, None],
+        "trips_over_five": [1, 2, 0, 3, 1],
+        "total_trips": [4, 4, 0, 6, 2],
+    })
+    # Integer weeks and camelCase aliases; later files win for repeated route-weeks.
+    _county(tmp_path / "county_b.parquet", {
+        "routeCode": ["R2", "R4", "R1"],
+        "week": pa.array([202401, 202401, 202402], type=pa.int64()),
+        "available": [7.0, 1.0, 6.0],
+        "loaded": [7.0, 2.0, 3.0],
+        "used": [1.0, 1.0, 1.0],
+        "total": [1.0, 5.0, 2.0],
+        "avgStopDuration": [4.0, 1.0, 2.5],
+        "tripsOverFive": [2, 1, 1],
+        "totalTrips": [8, 3, 5],
+    })
+    # Float weeks.
+    _county(tmp_path / "county_c.parquet", {
+        "route_code": ["R3"],
+        "week": pa.array([202404.0], type=pa.float64()),
+        "available": [9.0],
+        "loaded": [3.0],
+    })
+    pq.write_table(pa.table({
+        "route_code": ["R1", "R1", "R2", "R4", "R3", "R9"],
+        "week": ["202401", "202401", "202401", "202401.0", " 202403", "202401"],
+        "performance_variation": [0.1, 0.25, 0.4, 0.6, 0.3, 0.9],
+    }), tmp_path / "transearch_a.parquet")
+    pq.write_table(pa.table({
+        "route_code": ["R2"],
+        "week": pa.array([202401], type=pa.int64()),
+        "performance_variation": [-0.5],
+    }), tmp_path / "transearch_b.parquet")
+    return tmp_path
+
+
+@pytest.fixture()
+def engine(data_dir: Path):
+    paths = DatasetPaths(county_pair_glob="county_*.parquet", transearch_glob="transearch_*.parquet")
+    with DuckDbKpiEngine(paths, data_dir=data_dir, threads=1) as duck:
+        yield duck
+
+
+def _last_per_key(frames: List[pd.DataFrame]) -> Dict[Tuple[str, str], dict]:
+    rows: Dict[Tuple[str, str], dict] = {}
+    for frame in frames:
+        for payload in frame.to_dict("records"):
+            if pd.isna(payload["route_code"]) or pd.isna(payload["week"]):
+                continue
+            key = (payload["route_code"], normalize_week(payload["week"]))
+            rows.pop(key, None)
+            rows[key] = payload
+    return rows
+
+
+def _reference(data_dir: Path) -> pd.DataFrame:
+    """Dedup in file order, join Transearch, and compute KPIs row by row."""
+    county = _last_per_key([
+        build_orbcomm_payloads(pd.read_parquet(path), output="frame") for path in sorted(data_dir.glob("county_*.parquet"))
+    ])
+    transearch = _last_per_key([
+        build_transearch_payloads(pd.read_parquet(path), output="frame") for path in sorted(data_dir.glob("transearch_*.parquet"))
+    ])
+    records = []
+    for key, payload in county.items():
+        rpi = transearch.get(key, {}).get("performance_variation")
+        record = {"route_code": key[0], "week": week_label(payload["week"]), "week_key": key[1]}
+        record.update(summarize_kpis({**payload, "performance_variation": rpi}))
+        records.append(record)
+    return pd.DataFrame(records).sort_values(["route_code", "week"]).reset_index(drop=True)
+
+
+def _same(left: object, right: object) -> bool:
+    left_missing = left is None or (isinstance(left, float) and math.isnan(left))
+    right_missing = right is None or (isinstance(right, float) and math.isnan(right))
+    return left_missing == right_missing and (left_missing or left == pytest.approx(right))
+
+
+def test_kpi_frame_matches_summarize_kpis(engine: DuckDbKpiEngine, data_dir: Path) -> None:
+    frame = engine.kpi_frame()
+    reference = _reference(data_dir)
+
+    assert list(zip(frame["route_code"], frame["week"], frame["week_key"])) == list(
+        zip(reference["route_code"], reference["week"], reference["week_key"])
+    )
+    for name in ("sdei", "sdcui", "sii", "rpi"):
+        for got, wanted in zip(frame[name], reference[name]):
+            assert _same(got, wanted), (name, got, wanted)
+
+
+def test_dedup_keeps_the_last_row_in_file_order(engine: DuckDbKpiEngine) -> None:
+    # R1-202401 repeats inside county_a; R2-202401 and R1-202402 are overridden by county_b.
+    assert engine.lookup("R1", "202401")["raw"]["available"] == 10.0
+    assert engine.lookup("R2", "202401")["raw"]["available"] == 7.0
+    assert engine.lookup("R1", "202402")["raw"]["available"] == 6.0
+    # The last Transearch row per route-week wins, across files and week types.
+    assert engine.lookup("R1", "202401")["rpi"] == 0.25
+    assert engine.lookup("R2", 202401)["rpi"] == -0.5
+
+
+def test_unfiltered_join_uses_the_normalised_week(engine: DuckDbKpiEngine) -> None:
+    frame = engine.kpi_frame().set_index(["route_code", "week_key"])
+    assert frame.loc[("R4", "202401"), "rpi"] == 0.6
+    assert frame.loc[("R3", "202403"), "week"] == " 202403" and frame.loc[("R3", "202403"), "rpi"] == 0.3
+    # Filters match the stored label forms of the requested week, as normalizeWeekFilter does.
+    assert engine.lookup("R3", " 202403")["rpi"] == 0.3
+    assert engine.lookup("R3", "202403") is None
+
+
+@pytest.mark.parametrize("week", ["202401", 202401, 202401.0, "202401.0", " 202401"])
+def test_every_week_form_finds_the_row(engine: DuckDbKpiEngine, week) -> None:
+    result = engine.lookup("R2", week)
+    assert result is not None and result["week"] == week and result["sdei"] == 1.0
+
+
+def test_float_week_labels(engine: DuckDbKpiEngine) -> None:
+    assert engine.lookup("R3", 202404)["sdei"] == 3.0
+    assert engine.lookup("R3", "202404.0")["sdei"] == 3.0
+    assert [point["week"] for point in engine.trend("R3")] == [" 202403", "202404"]
+
+
+def test_lookup_many_and_trend_match_lookup(engine: DuckDbKpiEngine) -> None:
+    pairs = [("R1", "202401"), ("R2", 202401), ("R4", "202401"), ("R1", "209999"), ("R9", "202401")]
+    many = engine.lookup_many(pairs)
+    assert many == [engine.lookup(route_code, week) for route_code, week in pairs]
+    assert many[-1] is None and many[-2] is None
+
+    trend = engine.trend("R1")
+    assert [point["week"] for point in trend] == ["202401", "202402"]
+    assert [point["sdei"] for point in trend] == [engine.lookup("R1", week)["sdei"] for week in ("202401", "202402")]
+
+
+def test_sql_views_are_deduplicated(engine: DuckDbKpiEngine) -> None:
+    counts = engine.sql("SELECT route_code, count(*) AS n FROM orbcomm GROUP BY route_code ORDER BY route_code")
+    assert counts.values.tolist() == [["R1", 2], ["R2", 1], ["R3", 2], ["R4", 1]]
+
+
+def test_missing_transearch_files_leave_rpi_empty(data_dir: Path) -> None:
+    with DuckDbKpiEngine(DatasetPaths(county_pair_glob="county_*.parquet"), data_dir=data_dir) as duck:
+        assert duck.transearch_files == ()
+        assert duck.lookup("R1", "202401")["rpi"] is None
@@ -0,0 +1,78 @@
+"""Last-file-wins behaviour of :class:`code.incremental_ingestion.IncrementalIngestor`."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from code.incremental_ingestion import IncrementalIngestor
+
+
+def _write(path: Path, rows: List[Dict[str, object]]) -> Path:
+    pq.write_table(pa.Table.from_pylist(rows), path)
+    # Make the edit visible even on filesystems with coarse timestamps.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    return path
+
+
+def _row(available: float, route_code: str = "R", week: str = "202401") -> Dict[str, object]:
+    return {"route_code": route_code, "week": week, "available": available, "loaded": 1.0}
+
+
+def _emitted(ingestor: IncrementalIngestor, paths: List[Path]) -> Dict[tuple, float]:
+    batch = ingestor.scan(paths)
+    ingestor.commit(batch)
+    return {(row.route_code, row.week): row.available for row in batch.frame.itertuples(index=False)}
+
+
+@pytest.fixture()
+def ingestor(tmp_path: Path) -> IncrementalIngestor:
+    return IncrementalIngestor(state_dir=tmp_path / "state")
+
+
+def test_edit_to_an_earlier_file_does_not_override_a_later_file(tmp_path: Path, ingestor: IncrementalIngestor) -> None:
+    first = _write(tmp_path / "a.parquet", [_row(1.0), _row(2.0, route_code="S")])
+    second = _write(tmp_path / "b.parquet", [_row(9.0)])
+    assert _emitted(ingestor, [first, second]) == {("R", "202401"): 9.0, ("S", "202401"): 2.0}
+
+    _write(first, [_row(5.0), _row(3.0, route_code="S")])
+    # R-202401 still belongs to the unchanged b.parquet; only S-202401 changed.
+    assert _emitted(ingestor, [first, second]) == {("S", "202401"): 3.0}
+    assert _emitted(ingestor, [first, second]) == {}
+
+
+def test_earlier_file_wins_again_once_the_later_file_drops_the_key(tmp_path: Path, ingestor: IncrementalIngestor) -> None:
+    first = _write(tmp_path / "a.parquet", [_row(1.0)])
+    second = _write(tmp_path / "b.parquet", [_row(9.0)])
+    _emitted(ingestor, [first, second])
+
+    _write(second, [_row(4.0, week="202402")])
+    assert _emitted(ingestor, [first, second]) == {("R", "202402"): 4.0}
+    _write(first, [_row(5.0)])
+    assert _emitted(ingestor, [first, second]) == {("R", "202401"): 5.0}
+
+
+def test_later_file_edit_still_wins(tmp_path: Path, ingestor: IncrementalIngestor) -> None:
+    first = _write(tmp_path / "a.parquet", [_row(1.0)])
+    second = _write(tmp_path / "b.parquet", [_row(9.0)])
+    _emitted(ingestor, [first, second])
+
+    _write(first, [_row(5.0)])
+    _write(second, [_row(7.0)])
+    assert _emitted(ingestor, [first, second]) == {("R", "202401"): 7.0}
+
+
+def test_ownership_follows_unchanged_values(tmp_path: Path, ingestor: IncrementalIngestor) -> None:
+    first = _write(tmp_path / "a.parquet", [_row(1.0)])
+    _emitted(ingestor, [first])
+
+    # b.parquet repeats the same value, so nothing is emitted, but it now owns the key.
+    second = _write(tmp_path / "b.parquet", [_row(1.0)])
+    assert _emitted(ingestor, [first, second]) == {}
+    _write(first, [_row(5.0)])
+    assert _emitted(ingestor, [first, second]) == {}
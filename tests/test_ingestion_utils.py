@@ -0,0 +1,121 @@
+"""Filtering and payload building in :mod:`code.ingestion_utils`."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from code.ingestion_utils import (
+    DatasetCache,
+    DatasetPaths,
+    build_orbcomm_payloads,
+    iter_dict_rows,
+    iter_parquet_batches,
+    load_county_pair_moves,
+    prepare_orbcomm_payload,
+)
+
+
+def _write(path: Path, weeks: pa.Array) -> Path:
+    rows = len(weeks)
+    table = pa.table({
+        "route_code": pa.array([f"R{index % 4}" for index in range(rows)]),
+        "week": weeks,
+        "available": pa.array([float(index) for index in range(rows)]),
+    })
+    pq.write_table(table, path, row_group_size=250)
+    return path
+
+
+def _rows(path: Path, **filters) -> int:
+    return sum(len(frame) for frame in iter_parquet_batches(path, **filters))
+
+
+@pytest.mark.parametrize("weeks", [["202401"], [202401], [202401.0], ["202401.0"], [" 202401"]])
+def test_week_filter_matches_text_columns_in_every_form(tmp_path: Path, weeks) -> None:
+    path = _write(tmp_path / "text.parquet", pa.array(["202401"] * 1000))
+    assert _rows(path, weeks=weeks) == 1000
+
+
+@pytest.mark.parametrize("weeks", [["202401"], [202401], [202401.0]])
+def test_week_filter_matches_integer_columns_in_every_form(tmp_path: Path, weeks) -> None:
+    path = _write(tmp_path / "int.parquet", pa.array([202401] * 500 + [202402] * 500, type=pa.int64()))
+    assert _rows(path, weeks=weeks) == 500
+
+
+def test_route_filter_is_not_week_normalised(tmp_path: Path) -> None:
+    path = tmp_path / "routes.parquet"
+    pq.write_table(pa.table({"route_code": ["001", "1"], "week": ["202401", "202401"]}), path)
+    frame = pd.concat(iter_parquet_batches(path, route_codes=["1"]))
+    assert frame["route_code"].tolist() == ["1"]
+
+
+@pytest.mark.parametrize("cache", [False, "cache"])
+def test_multi_file_loads_keep_columns_when_no_row_matches(tmp_path: Path, cache) -> None:
+    for name in ("county_a.parquet", "county_b.parquet"):
+        _write(tmp_path / name, pa.array(["202401", "202402"]))
+    options = dict(
+        data_dir=tmp_path,
+        paths=DatasetPaths(county_pair_glob="county_*.parquet"),
+        columns=["route_code", "available"],
+        cache=DatasetCache(tmp_path / "cache") if cache else False,
+    )
+
+    empty = load_county_pair_moves(weeks=["209999"], **options)
+    assert empty.empty and list(empty.columns) == ["route_code", "available"]
+    loaded = load_county_pair_moves(weeks=["202402"], **options)
+    assert loaded.values.tolist() == [["R1", 1.0], ["R1", 1.0]]
+    assert list(load_county_pair_moves(weeks=["209999"], stream=True, **options)) == []
+
+
+def _same(left: object, right: object) -> bool:
+    if left is pd.NaT or right is pd.NaT:
+        return left is right
+    if left is None or right is None:
+        return left is right
+    if isinstance(left, float) and isinstance(right, float) and left != left:
+        return right != right
+    return left == right
+
+
+def _assert_payload_parity(frame: pd.DataFrame) -> None:
+    expected = [prepare_orbcomm_payload(row) for row in iter_dict_rows(frame)]
+    actual = build_orbcomm_payloads(frame)
+    assert len(actual) == len(expected)
+    for position, (got, wanted) in enumerate(zip(actual, expected)):
+        assert got.keys() == wanted.keys()
+        for key in wanted:
+            assert _same(got[key], wanted[key]), (position, key, got[key], wanted[key])
+
+
+@pytest.mark.parametrize("camel_timestamp", [False, True])
+def test_orbcomm_payloads_match_per_row_builder_with_nat(camel_timestamp: bool) -> None:
+    rows = 12
+    frame = pd.DataFrame({
+        "route_code": pd.Series(["R1", None, "", "R4"] * 3, dtype=object),
+        "routeCode": ["C1", "C2", "C3", None] * 3,
+        "week": ["202401", "202402", "202403"] * 4,
+        "available": [1.0, 0.0, float("nan"), None] * 3,
+        "avg_stop_duration": [0.0, float("nan"), 3.5, None] * 3,
+        "avgStopDuration": [9.0, 8.0, 7.0, 6.0] * 3,
+        "trips_over_five": pd.array([0, 2, None, 4] * 3, dtype="Int64"),
+        "event_timestamp": pd.to_datetime(["2024-01-01", None, "2024-01-03", None] * 3, utc=True),
+        "origin_county": pd.Categorical(["06037", None, "", "04019"] * 3),
+    })
+    if camel_timestamp:
+        frame["eventTimestamp"] = pd.to_datetime(["2023-12-31"] * rows, utc=True)
+    _assert_payload_parity(frame)
+
+
+def test_orbcomm_payloads_keep_nat_from_object_columns() -> None:
+    frame = pd.DataFrame({
+        "route_code": ["R1", "R2"],
+        "week": [202401, 202402],
+        "event_timestamp": pd.Series([pd.NaT, pd.Timestamp("2024-01-02")], dtype=object),
+        "eventTimestamp": ["fallback", "fallback"],
+    })
+    _assert_payload_parity(frame)
+    assert build_orbcomm_payloads(frame)[0]["event_timestamp"] is pd.NaT
@@ -0,0 +1,31 @@
+"""Stage snapshots and quantiles in :mod:`instrumentation`."""
+from __future__ import annotations
+
+import pytest
+
+from instrumentation import Instrumentation, StageHistogram, parse_server_timing
+
+
+def test_server_ms_uses_the_whole_request_metric_only() -> None:
+    instrumentation = Instrumentation()
+    for app, db in ((0.010, 0.006), (0.020, 0.014)):
+        instrumentation.record("http.kpis", 0.05, server_timings={"app": app, "db": db})
+    instrumentation.record("http.map", 0.05, server_timings=parse_server_timing("total;dur=8, app;dur=7, db;dur=3"))
+    instrumentation.record("http.trend", 0.05, server_timings={"db": 0.004})
+    instrumentation.record("decode.kpis", 0.001)
+
+    rows = {row["stage"]: row for row in instrumentation.snapshot()}
+    assert rows["http.kpis"]["server_ms"] == pytest.approx(15.0)
+    assert rows["http.map"]["server_ms"] == pytest.approx(8.0)
+    assert rows["http.trend"]["server_ms"] is None and rows["decode.kpis"]["server_ms"] is None
+    # Nested metrics are still exported on their own.
+    assert 'scci_dashboard_server_duration_seconds_count{stage="http.kpis",metric="db"} 2' in instrumentation.to_prometheus()
+
+
+@pytest.mark.parametrize("q, expected", [(0.0, 1.0), (0.25, 2.0), (0.5, 3.0), (0.6, 3.0), (0.65, 4.0), (0.95, 5.0), (1.0, 5.0)])
+def test_quantile_takes_the_sample_at_the_rounded_index(q, expected) -> None:
+    histogram = StageHistogram()
+    for value in (5.0, 1.0, 4.0, 2.0, 3.0):
+        histogram.observe(value)
+    assert histogram.quantile(q) == expected
+    assert StageHistogram().quantile(q) is None
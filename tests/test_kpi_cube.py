@@ -0,0 +1,66 @@
+"""Lookups on a memory-mapped :class:`code.kpi_cube.KpiCube`."""
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from code.kpi_cube import KPI_COLUMNS, KpiCube, build_kpi_cube_table, write_kpi_cube
+
+
+def _frame(weeks) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    rows = 3_000
+    return pd.DataFrame({
+        "route_code": rng.choice([f"{index:05d}-{index * 7:05d}" for index in range(60)], rows),
+        "week": rng.choice(weeks, rows),
+        "available": rng.integers(0, 40, rows).astype(float),
+        "loaded": rng.integers(0, 4, rows).astype(float),
+        "used": rng.random(rows),
+        "total": rng.random(rows),
+        "avg_stop_duration": rng.random(rows),
+        "trips_over_five": rng.integers(0, 5, rows),
+        "total_trips": rng.integers(0, 9, rows),
+    })
+
+
+@pytest.mark.parametrize(
+    "weeks",
+    [
+        [f"2024{week:02d}" for week in range(1, 53)],
+        # Labels whose sort order differs from their normalised keys.
+        ["202401", "202402", " 202360", "202359.0", "wk-x"],
+    ],
+)
+def test_lookups_match_the_table(tmp_path: Path, weeks) -> None:
+    table = build_kpi_cube_table(_frame(weeks))
+    cube = KpiCube.open(write_kpi_cube(table, tmp_path / "cube.arrow"), route_cache_size=8)
+    reference = table.to_pandas()
+
+    assert len(cube) == len(reference)
+    assert cube.routes == list(dict.fromkeys(reference["route_code"].astype(str)))
+    for row in reference.itertuples(index=False):
+        route_code = str(row.route_code)
+        for week in {row.week, row.week_key} | ({int(row.week_key), float(row.week_key)} if row.week_key.isdigit() else set()):
+            result = cube.lookup(route_code, week)
+            assert result is not None and result["week"] == week
+            for name in KPI_COLUMNS:
+                expected = getattr(row, name)
+                assert result[name] is None if math.isnan(expected) else result[name] == expected
+            assert (route_code, week) in cube
+
+    route_code = str(reference["route_code"].iloc[0])
+    span = reference[reference["route_code"] == route_code]
+    assert cube.weeks(route_code) == span["week"].tolist()
+    assert [point["week"] for point in cube.trend(route_code)] == span["week"].tolist()
+    assert [point["week"] for point in cube.trend(route_code, [span["week_key"].iloc[-1], "missing"])] == [span["week"].iloc[-1]]
+    assert cube.lookup(route_code, "missing") is None
+    assert cube.lookup("missing", weeks[0]) is None and cube.trend("missing") == [] and cube.weeks("missing") == []
+
+
+def test_empty_cube() -> None:
+    cube = KpiCube(build_kpi_cube_table(pd.DataFrame({"route_code": pd.Series([], dtype=object), "week": pd.Series([], dtype=object)})))
+    assert len(cube) == 0 and cube.routes == [] and cube.lookup("a", "202401") is None
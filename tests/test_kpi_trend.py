@@ -0,0 +1,50 @@
+"""Trend aggregation in :mod:`code.kpi_utils`."""
+from __future__ import annotations
+
+import pytest
+
+from code.kpi_utils import aggregate_trend, pool_kpi_inputs
+
+
+def test_each_ratio_pools_only_weeks_with_both_inputs() -> None:
+    records = [
+        {"week": "202401", "available": None, "loaded": 100.0, "used": 5.0, "total": None},
+        {"week": "202402", "available": 50.0, "loaded": 50.0, "used": 1.0, "total": 2.0},
+    ]
+    assert aggregate_trend(records, "month")[1] == [{"week": "2024-01", "weeks": 2, "sdei": 1.0, "sdcui": 0.5, "sii": None}]
+
+
+def test_stop_ratio_pools_only_weeks_with_both_trip_counts() -> None:
+    pooled = pool_kpi_inputs([
+        {"avg_stop_duration": 10.0, "trips_over_five": 2, "total_trips": 4},
+        {"avg_stop_duration": 20.0, "trips_over_five": None, "total_trips": 4},
+        {"avg_stop_duration": None, "trips_over_five": float("nan"), "total_trips": 8},
+    ])
+    assert (pooled["trips_over_five"], pooled["total_trips"]) == (2.0, 4.0)
+    assert pooled["avg_stop_duration"] == 15.0
+    assert pooled["available"] is None and pooled["loaded"] is None
+
+
+@pytest.mark.parametrize(
+    "record, expected",
+    [
+        # The per-row formula: a missing trips_over_five counts as no long stops.
+        ({"avg_stop_duration": 10.0, "trips_over_five": None, "total_trips": 4}, 0.0),
+        ({"avg_stop_duration": 10.0, "trips_over_five": 1, "total_trips": 4}, 2.5),
+        ({"avg_stop_duration": 0.0, "trips_over_five": 1, "total_trips": 4}, None),
+        ({"avg_stop_duration": 10.0, "trips_over_five": 1, "total_trips": None}, None),
+    ],
+)
+def test_single_week_points_keep_the_per_row_sii(record, expected) -> None:
+    for resolution in ("week", "month"):
+        (point,) = aggregate_trend([{"week": "202405", **record}], resolution)[1]
+        assert point["weeks"] == 1 and point["sii"] == expected
+
+
+def test_weekly_points_match_per_row_ratios() -> None:
+    records = [
+        {"week": "202401", "available": 3.0, "loaded": 4.0, "used": None, "total": 2.0},
+        {"week": "202402", "available": 1.0, "loaded": 0.0, "used": 1.0, "total": 3.0},
+    ]
+    points = aggregate_trend(records, "week")[1]
+    assert [(point["sdei"], point["sdcui"]) for point in points] == [(0.75, None), (None, 0.3333)]
@@ -0,0 +1,133 @@
+"""Parity of the columnar KPI engine with the scalar reference functions."""
+from __future__ import annotations
+
+import math
+from decimal import Decimal
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from code.kpi_utils import (
+    _round_array,
+    _safe_divide,
+    _safe_divide_array,
+    calculate_rpi,
+    calculate_rpi_array,
+    calculate_sii,
+    calculate_sii_array,
+    summarize_kpis,
+    summarize_kpis_columnar,
+)
+
+PRECISIONS = (-1, 0, 1, 2, 4, 6, 10)
+ROWS = 2_000
+
+
+def _random_values(rng: np.random.Generator, size: int) -> List[object]:
+    """A mix of the inputs the scalar helpers accept or reject, as an object column."""
+    values: List[object] = []
+    for kind in rng.integers(0, 12, size=size):
+        number = float(rng.normal(0, 50))
+        if kind == 0:
+            values.append(None)
+        elif kind == 1:
+            values.append(0)
+        elif kind == 2:
+            values.append(str(round(number, 3)))
+        elif kind == 3:
+            values.append(rng.choice(["n/a", "", "abc", "1,5"]))
+        elif kind == 4:
+            values.append(Decimal(str(round(number, 5))))
+        elif kind == 5:
+            values.append(rng.choice([math.nan, math.inf, -math.inf]))
+        elif kind == 6:
+            values.append(int(rng.integers(-20, 20)))
+        elif kind == 7:
+            # Exact binary fractions sit on rounding half-way points at low precisions.
+            values.append(int(rng.integers(-400, 400)) / 8)
+        elif kind == 8:
+            values.append(0.0)
+        else:
+            values.append(number)
+    return values
+
+
+def _assert_matches(columnar: np.ndarray, expected: List[Optional[float]]) -> None:
+    assert columnar.dtype == np.float64
+    assert len(columnar) == len(expected)
+    for position, (actual, wanted) in enumerate(zip(columnar.tolist(), expected)):
+        if wanted is None or (isinstance(wanted, float) and math.isnan(wanted)):
+            assert math.isnan(actual), (position, actual, wanted)
+        else:
+            assert actual == wanted, (position, actual, wanted)
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+@pytest.mark.parametrize("seed", range(3))
+def test_safe_divide_matches_scalar(seed: int, precision: int) -> None:
+    rng = np.random.default_rng(seed)
+    numerators = _random_values(rng, ROWS)
+    denominators = _random_values(rng, ROWS)
+    expected = [_safe_divide(n, d, precision) for n, d in zip(numerators, denominators)]
+    columnar = _safe_divide_array(pd.Series(numerators, dtype=object), pd.Series(denominators, dtype=object), precision)
+    _assert_matches(columnar, expected)
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_sii_and_rpi_match_scalar(precision: int) -> None:
+    rng = np.random.default_rng(precision + 100)
+    durations, over_five, trips = (_random_values(rng, ROWS) for _ in range(3))
+    expected = [calculate_sii(a, b, c, precision=precision) for a, b, c in zip(durations, over_five, trips)]
+    _assert_matches(calculate_sii_array(durations, over_five, trips, precision=precision), expected)
+    _assert_matches(
+        calculate_rpi_array(durations, precision=precision),
+        [calculate_rpi(value, precision=precision) for value in durations],
+    )
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_round_array_matches_builtin_round_on_half_way_points(precision: int) -> None:
+    steps = np.arange(-2_000, 2_001)
+    values = np.concatenate([
+        steps / 8,
+        (steps + 0.5) / 10.0 ** max(precision, 0),
+        np.array([2.675, 1.005, 0.125, 0.375, 2.5, -2.5, 1e300, -1e-300, 5e15 + 0.5]),
+    ])
+    expected = [round(float(value), precision) for value in values]
+    assert _round_array(values, precision).tolist() == expected
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_summarize_kpis_columnar_matches_scalar(precision: int) -> None:
+    rng = np.random.default_rng(precision + 200)
+    names = ("available", "loaded", "used", "total", "avg_stop_duration", "trips_over_five", "total_trips", "performance_variation")
+    frame = pd.DataFrame({name: pd.Series(_random_values(rng, ROWS), dtype=object) for name in names})
+
+    results = summarize_kpis_columnar(frame, precision=precision)
+    expected = [summarize_kpis(record, precision=precision) for record in frame.to_dict("records")]
+    for name in ("sdei", "sdcui", "sii", "rpi"):
+        _assert_matches(results[name], [row[name] for row in expected])
+
+
+def test_nullable_integer_columns_match_scalar_none() -> None:
+    rng = np.random.default_rng(7)
+    available = pd.array(rng.integers(-5, 50, size=ROWS), dtype="Int64")
+    loaded = pd.array(rng.integers(0, 5, size=ROWS), dtype="Int64")
+    available[rng.random(ROWS) < 0.1] = pd.NA
+    loaded[rng.random(ROWS) < 0.1] = pd.NA
+    frame = pd.DataFrame({"available": available, "loaded": loaded})
+
+    results = summarize_kpis_columnar(frame)
+    # ``pd.NA`` is the nullable column's ``None``; the scalar API is called with ``None``.
+    records = [{key: None if value is pd.NA else value for key, value in row.items()} for row in frame.to_dict("records")]
+    _assert_matches(results["sdei"], [summarize_kpis(record)["sdei"] for record in records])
+    assert np.isnan(results["sdcui"]).all() and results["sdcui"].shape == (ROWS,)
+
+
+def test_missing_columns_broadcast_to_frame_length() -> None:
+    results = summarize_kpis_columnar(pd.DataFrame({"available": [1.0, 2.0], "loaded": [0, 4]}))
+    assert results["sdei"].tolist()[1] == 0.5 and math.isnan(results["sdei"][0])
+    assert all(array.shape == (2,) for array in results.values())
+    assert np.isnan(results["rpi"]).all()
@@ -0,0 +1,29 @@
+"""Dataset ingestion in :mod:`code.parallel_ingestion`."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from code.ingestion_utils import DatasetPaths
+from code.parallel_ingestion import ingest_datasets, main
+
+
+def _write_county(path: Path, available: float) -> None:
+    pq.write_table(pa.table({"route_code": ["R1", "R2"], "week": ["202401", "202401"], "available": [available, 1.0]}), path)
+
+
+def test_county_only_directory(tmp_path: Path, capsys) -> None:
+    _write_county(tmp_path / "county_pair_a.parquet", 1.0)
+    _write_county(tmp_path / "county_pair_b.parquet", 5.0)
+
+    county, transearch = ingest_datasets(DatasetPaths(county_pair_glob="county_pair_*.parquet"), data_dir=tmp_path, max_workers=1)
+    assert county.frame[["route_code", "available"]].values.tolist() == [["R1", 5.0], ["R2", 1.0]]
+    assert county.duplicates_dropped == 2
+    assert transearch.files == [] and transearch.frame.empty
+
+    output = tmp_path / "out"
+    main(["--data-dir", str(tmp_path), "--county-pair-glob", "county_pair_*.parquet", "--workers", "1", "--output-dir", str(output)])
+    assert "2 files, 4 rows read, 2 kept" in capsys.readouterr().out
+    assert sorted(path.name for path in output.iterdir()) == ["county_pair_moves.parquet"]
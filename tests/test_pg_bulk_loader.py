@@ -0,0 +1,118 @@
+"""Round trips through :class:`code.pg_bulk_loader.PostgresBulkLoader` against a real database.
+
+Skipped unless ``$DATABASE_URL`` points at a PostgreSQL server and ``psycopg`` is installed.
+Each test loads into its own schema, which is dropped afterwards.
+"""
+from __future__ import annotations
+
+import os
+import uuid
+from typing import Dict, Iterator, List, Tuple
+
+import pandas as pd
+import pytest
+
+from code.pg_bulk_loader import DEFAULT_DSN_ENV, PostgresBulkLoader
+
+psycopg = pytest.importorskip("psycopg")
+
+DSN = os.environ.get(DEFAULT_DSN_ENV)
+pytestmark = pytest.mark.skipif(not DSN, reason=f"${DEFAULT_DSN_ENV} is not set")
+
+
+@pytest.fixture()
+def loader() -> Iterator[PostgresBulkLoader]:
+    schema = f"bulk_test_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(DSN, autocommit=True) as admin:
+        admin.execute(f'CREATE SCHEMA "{schema}"')
+        try:
+            conninfo = psycopg.conninfo.make_conninfo(DSN, options=f"-c search_path={schema}")
+            # Two staging rows per chunk, so duplicates of one key land in different chunks.
+            with PostgresBulkLoader(conninfo, chunk_size=2) as bulk:
+                bulk.create_schema()
+                yield bulk
+        finally:
+            admin.execute(f'DROP SCHEMA "{schema}" CASCADE')
+
+
+def _rows(loader: PostgresBulkLoader, sql: str) -> List[Tuple]:
+    return loader.connection.execute(sql).fetchall()
+
+
+def _orbcomm(route_code: str, week: object, available: float, **extra: object) -> Dict[str, object]:
+    return {"route_code": route_code, "week": week, "available": available, "loaded": 1.0, "trips_over_five": 2.4, **extra}
+
+
+def test_last_row_per_route_week_wins(loader: PostgresBulkLoader) -> None:
+    stats = loader.load_orbcomm([
+        _orbcomm("R1", "202401", 1.0, origin_county="06037"),
+        _orbcomm("R1", 202402, 2.0),
+        _orbcomm("R2", "202401", 3.0),
+        _orbcomm("R1", "202401", 4.0, origin_county="04019"),
+        _orbcomm("R1", None, 5.0),
+        _orbcomm("", "202401", 6.0),
+    ])
+
+    assert (stats.rows_read, stats.rows_skipped, stats.chunks) == (6, 2, 3)
+    assert _rows(loader, "SELECT route_code, week, available, trips_over_five FROM orbcomm_data ORDER BY route_code, week") == [
+        ("R1", "202401", 4.0, 2),
+        ("R1", "202402", 2.0, 2),
+        ("R2", "202401", 3.0, 2),
+    ]
+    assert _rows(loader, "SELECT route_code, origin_county FROM routes ORDER BY route_code") == [("R1", None), ("R2", None)]
+
+
+def test_non_finite_numbers_become_null(loader: PostgresBulkLoader) -> None:
+    loader.load_orbcomm(pd.DataFrame([
+        _orbcomm("R1", "202401", float("nan"), used=float("inf"), total=float("-inf"), latitude=41.5),
+    ]))
+    assert _rows(loader, "SELECT available, used, total, latitude FROM orbcomm_data") == [(None, None, None, 41.5)]
+
+
+def test_transearch_rows_get_placeholder_routes(loader: PostgresBulkLoader) -> None:
+    loader.load_orbcomm([_orbcomm("R1", "202401", 1.0, origin_county="06037", mode="truck")])
+    stats = loader.load_transearch([
+        {"route_code": "R1", "week": "202401", "performance_variation": 0.5},
+        {"route_code": "T9", "week": "202401", "performance_variation": float("inf")},
+    ])
+
+    assert stats.routes_merged == 1
+    assert _rows(loader, "SELECT route_code, origin_county, mode FROM routes ORDER BY route_code") == [
+        ("R1", "06037", "truck"),
+        ("T9", None, None),
+    ]
+    assert _rows(loader, "SELECT route_code, performance_variation FROM transearch_data ORDER BY route_code") == [
+        ("R1", 0.5),
+        ("T9", None),
+    ]
+
+
+def test_rerun_updates_rows_in_place(loader: PostgresBulkLoader) -> None:
+    batch = [_orbcomm("R1", "202401", 1.0), _orbcomm("R2", "202401", 2.0), _orbcomm("R2", "202402", 3.0)]
+    loader.load_orbcomm(batch)
+    before = _rows(loader, "SELECT id, route_code, week FROM orbcomm_data ORDER BY id")
+
+    batch[1] = _orbcomm("R2", "202401", 20.0)
+    stats = loader.load_orbcomm(batch)
+
+    assert stats.rows_merged == 3
+    assert _rows(loader, "SELECT id, route_code, week FROM orbcomm_data ORDER BY id") == before
+    assert _rows(loader, "SELECT available FROM orbcomm_data ORDER BY id") == [(1.0,), (20.0,), (3.0,)]
+    assert _rows(loader, "SELECT count(*) FROM routes") == [(2,)]
+
+
+def test_truncate_replaces_the_table(loader: PostgresBulkLoader) -> None:
+    loader.load_orbcomm([_orbcomm("R1", "202401", 1.0), _orbcomm("R2", "202401", 2.0)])
+    loader.load_orbcomm([_orbcomm("R3", "202401", 3.0)], truncate=True)
+    assert _rows(loader, "SELECT id, route_code FROM orbcomm_data") == [(1, "R3")]
+
+    loader.load_orbcomm([], truncate=True)
+    assert _rows(loader, "SELECT count(*) FROM orbcomm_data") == [(0,)]
+
+
+def test_truncate_rolls_back_with_a_failed_first_chunk(loader: PostgresBulkLoader) -> None:
+    loader.load_orbcomm([_orbcomm("R1", "202401", 1.0)])
+    with pytest.raises(psycopg.errors.NumericValueOutOfRange):
+        # The trip count overflows INTEGER in the first merge chunk.
+        loader.load_orbcomm([_orbcomm("R2", "202401", 2.0, total_trips=1e12)], truncate=True)
+    assert _rows(loader, "SELECT route_code, available FROM orbcomm_data") == [("R1", 1.0)]
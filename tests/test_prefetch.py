@@ -0,0 +1,68 @@
+"""Background prefetching in :mod:`prefetch`."""
+from __future__ import annotations
+
+import threading
+import time
+
+from backend_client import BackendClient
+from benchmarks.stub_backend import StubBackend
+from prefetch import Prefetcher, create_shared_executor, plan_dashboard_prefetch
+from response_cache import ResponseCache
+from route_catalog import RouteCatalog
+
+
+def test_wait_gives_up_after_the_timeout() -> None:
+    release = threading.Event()
+    prefetcher = Prefetcher(max_workers=1)
+    try:
+        prefetcher.schedule({"slow": lambda: release.wait(5)})
+        started = time.perf_counter()
+        assert prefetcher.wait(["slow"], timeout=0.05) is False
+        assert time.perf_counter() - started < 1
+        release.set()
+        assert prefetcher.wait(["slow"], timeout=5) is True
+        assert prefetcher.wait(["unknown"], timeout=0) is True
+    finally:
+        release.set()
+        prefetcher.shutdown()
+
+
+def test_shutdown_leaves_a_shared_executor_running() -> None:
+    executor = create_shared_executor(max_workers=1)
+    try:
+        sessions = [Prefetcher(executor=executor) for _ in range(3)]
+        for index, prefetcher in enumerate(sessions):
+            prefetcher.schedule({index: lambda: None})
+            assert prefetcher.wait([index], timeout=5)
+            prefetcher.shutdown()
+        assert executor.submit(lambda: "alive").result(timeout=5) == "alive"
+    finally:
+        executor.shutdown()
+
+
+def test_route_tasks_warm_the_cache_without_touching_the_catalog() -> None:
+    with StubBackend(routes=5, weeks=3, map_points=50) as stub:
+        client = BackendClient(stub.base_url, cache=ResponseCache(), instrumentation=None, arrow=False)
+        client.login("analyst@example.com", "secret")
+        catalog = RouteCatalog(client)
+        route_codes = stub.route_codes
+        tasks = plan_dashboard_prefetch(
+            client,
+            route_codes,
+            route_codes[2],
+            stub.weeks,
+            stub.weeks[1],
+            trend_resolution="week",
+            map_options={"zoom": 5, "max_points": 50},
+        )
+        prefetcher = Prefetcher(max_workers=2)
+        try:
+            prefetcher.schedule(tasks)
+            assert prefetcher.wait(tasks, timeout=10)
+        finally:
+            prefetcher.shutdown()
+
+        assert len(catalog) == 0
+        requests_before = stub.requests
+        assert catalog.weeks(route_codes[1]) == catalog.weeks(route_codes[3]) == stub.weeks
+        assert stub.requests == requests_before
@@ -0,0 +1,121 @@
+"""Rolling windows, deltas and persistence in :mod:`code.rolling_kpis`."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from code.rolling_kpis import QuantileSketch, RollingKpiEngine
+
+
+def _engine(window: int = 4) -> RollingKpiEngine:
+    return RollingKpiEngine(window=window, metrics=("sdei",))
+
+
+def test_push_evicts_the_oldest_week() -> None:
+    engine = _engine(window=3)
+    for week, value in zip(["202401", "202402", "202403", "202404"], [1.0, 2.0, 4.0, 8.0]):
+        summary = engine.update("R", week, {"sdei": value})
+    assert summary["week"] == "202404" and summary["weeks"] == 3
+    assert summary["sdei_avg"] == round((2.0 + 4.0 + 8.0) / 3, 4)
+    assert summary["sdei_delta"] == 4.0
+
+
+def test_revising_a_week_in_the_window_replaces_its_value() -> None:
+    engine = _engine()
+    for week, value in [("202401", 1.0), ("202402", 2.0), ("202401", 3.0)]:
+        engine.update("R", week, {"sdei": value})
+    summary = engine.summary("R")
+    assert summary["week"] == "202402" and summary["sdei_avg"] == 2.5 and summary["sdei_delta"] == -1.0
+    assert engine.percentile("sdei", "202401", 0.5) == pytest.approx(3.0, rel=0.01)
+
+
+def test_weeks_before_the_window_or_out_of_order_are_rejected() -> None:
+    engine = _engine(window=2)
+    for week in ["202401", "202402", "202403"]:
+        engine.update("R", week, {"sdei": 1.0})
+    with pytest.raises(ValueError, match="older than the rolling window"):
+        engine.update("R", "202401", {"sdei": 1.0})
+    # Labels that are not ISO weeks have no gaps to fill, so an unseen earlier one is out of order.
+    engine.update("S", "wk-b", {"sdei": 1.0})
+    with pytest.raises(ValueError, match="arrived after wk-b"):
+        engine.update("S", "wk-a", {"sdei": 1.0})
+
+
+def test_skipped_weeks_become_empty_slots() -> None:
+    engine = _engine(window=4)
+    engine.update("R", "202401", {"sdei": 1.0})
+    engine.update("R", "202402", {"sdei": 3.0})
+    summary = engine.update("R", "202404", {"sdei": 5.0})
+    # 202403 is missing, so there is no week-over-week delta and the mean covers 202401-202404.
+    assert summary["sdei_delta"] is None
+    assert summary["sdei_avg"] == 3.0 and summary["weeks"] == 4
+
+    summary = engine.update("R", "202405", {"sdei": 9.0})
+    # 202401 left the four-week window.
+    assert summary["sdei_avg"] == round((3.0 + 5.0 + 9.0) / 3, 4) and summary["sdei_delta"] == 4.0
+
+    # A skipped week still in the window can arrive late.
+    engine.update("R", "202403", {"sdei": 7.0})
+    assert engine.summary("R")["sdei_avg"] == 6.0
+
+
+def test_a_gap_longer_than_the_window_clears_it() -> None:
+    engine = _engine(window=4)
+    engine.update("R", "202401", {"sdei": 1.0})
+    summary = engine.update("R", "202410", {"sdei": 2.0})
+    assert summary["sdei_avg"] == 2.0 and summary["sdei_delta"] is None
+    assert engine.to_dict()["routes"]["R"]["weeks"] == ["202407", "202408", "202409", "202410"]
+
+
+@pytest.mark.parametrize(
+    "weeks, delta",
+    [
+        (["202452", "202501"], 1.0),
+        # 2020 has an ISO week 53.
+        (["202053", "202101"], 1.0),
+        (["202052", "202101"], None),
+    ],
+)
+def test_year_boundaries_follow_iso_weeks(weeks, delta) -> None:
+    engine = _engine()
+    engine.update("R", weeks[0], {"sdei": 1.0})
+    assert engine.update("R", weeks[1], {"sdei": 2.0})["sdei_delta"] == delta
+
+
+def test_save_and_load_round_trip(tmp_path: Path) -> None:
+    rng = np.random.default_rng(11)
+    frame = pd.DataFrame({
+        "route_code": rng.choice(["R1", "R2", "R3"], 60),
+        "week": rng.choice([202401, 202402, 202404, 202405, 202407], 60),
+        "available": rng.uniform(0, 10, 60),
+        "loaded": rng.uniform(1, 10, 60),
+        "used": rng.uniform(0, 10, 60),
+        "total": rng.uniform(1, 10, 60),
+    })
+    engine = RollingKpiEngine(window=3)
+    assert engine.update_frame(frame) == 60
+
+    restored = RollingKpiEngine.load(engine.save(tmp_path / "state.json"))
+    assert restored.to_dict() == engine.to_dict()
+    assert restored.summaries().equals(engine.summaries())
+
+    for state in (engine, restored):
+        state.update("R1", "202408", {"sdei": 0.5, "sdcui": None, "sii": 2.0})
+    assert restored.summary("R1") == engine.summary("R1")
+    assert RollingKpiEngine.load(tmp_path / "missing.json", window=5).window == 5
+
+
+def test_quantile_sketch_stays_within_its_relative_accuracy() -> None:
+    values = np.random.default_rng(5).lognormal(0, 2, 5_000) * np.where(np.arange(5_000) % 5 == 0, -1, 1)
+    sketch = QuantileSketch(0.01)
+    for value in values:
+        sketch.add(float(value))
+    ordered = np.sort(values)
+    for q in (0.0, 0.1, 0.5, 0.9, 1.0):
+        exact = ordered[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+    sketch.remove(float(values[0]))
+    assert len(sketch) == len(values) - 1
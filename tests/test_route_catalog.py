@@ -0,0 +1,46 @@
+"""Fleet-wide leaderboard through the endpoint and the catalogue fallback."""
+from __future__ import annotations
+
+import pytest
+
+from backend_client import BackendClient
+from benchmarks.stub_backend import StubBackend
+from route_catalog import RouteCatalog, rank_catalog_routes
+
+
+@pytest.fixture(scope="module")
+def stub():
+    # More routes than one catalogue page, so a page-limited ranking would miss some.
+    with StubBackend(routes=1_200, weeks=4) as backend:
+        yield backend
+
+
+@pytest.fixture()
+def client(stub: StubBackend) -> BackendClient:
+    client = BackendClient(stub.base_url, cache=None, instrumentation=None, arrow=False)
+    client.login("analyst@example.com", "secret")
+    return client
+
+
+def test_iter_routes_follows_the_cursor(client: BackendClient, stub: StubBackend) -> None:
+    catalog = RouteCatalog(client)
+    assert [route.code for route in catalog.iter_routes(limit=128)] == stub.route_codes
+    assert [route.code for route in catalog.iter_routes("R0001")] == [code for code in stub.route_codes if code.startswith("R0001")]
+
+
+@pytest.mark.parametrize("metric", ["sdei", "sii", "rpi"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_fallback_ranks_the_same_fleet_as_the_endpoint(client: BackendClient, stub: StubBackend, metric: str, descending: bool) -> None:
+    week = stub.weeks[-1]
+    endpoint = client.fetch_leaderboard(week, metric=metric, descending=descending, limit=50)
+    fallback = rank_catalog_routes(RouteCatalog(client), week, metric=metric, descending=descending, limit=50)
+
+    assert endpoint["total"] == fallback["total"] == len(stub.route_codes)
+    assert endpoint["results"] == fallback["results"]
+    values = [row[metric] for row in endpoint["results"]]
+    assert values == sorted(values, reverse=descending)
+    assert [row["rank"] for row in endpoint["results"]] == list(range(1, 51))
+
+
+def test_unknown_week_ranks_nothing(client: BackendClient) -> None:
+    assert client.fetch_leaderboard("190001")["results"] == []
@@ -0,0 +1,90 @@
+"""Grid queries in :mod:`code.spatial_index` against a brute-force filter."""
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from code.spatial_index import SpatialIndex, _inside_polygon, build_spatial_index_table, haversine_km, write_spatial_index
+
+ROWS = 20_000
+
+
+def _wrap(longitude: np.ndarray) -> np.ndarray:
+    return (longitude + 180.0) % 360.0 - 180.0
+
+
+@pytest.fixture(scope="module")
+def points() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        "route_code": rng.choice(["R1", "R2", "R3", "R4"], ROWS),
+        "week": rng.choice(["202401", "202402", 202403], ROWS),
+        "latitude": rng.uniform(-89.5, 89.5, ROWS),
+        # Dense near the antimeridian as well as everywhere else.
+        "longitude": _wrap(np.concatenate([rng.uniform(-180.0, 180.0, ROWS // 2), rng.uniform(170.0, 190.0, ROWS // 2)])),
+        "event_timestamp": pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 21 * 24, ROWS), unit="h"),
+    })
+
+
+@pytest.fixture(scope="module", params=[1.0, 0.25])
+def index(request, points: pd.DataFrame, tmp_path_factory) -> SpatialIndex:
+    path = tmp_path_factory.mktemp("spatial") / "index.arrow"
+    return SpatialIndex.open(write_spatial_index(build_spatial_index_table(points, cell_size=request.param), path))
+
+
+def _keys(frame: pd.DataFrame) -> List[Tuple[str, float, float]]:
+    return sorted(zip(frame["route_code"], frame["latitude"], frame["longitude"]))
+
+
+@pytest.mark.parametrize(
+    "box",
+    [
+        (33.5, -118.7, 34.4, -117.6),
+        (-10.0, 170.0, 10.0, -170.0),
+        # Crosses the antimeridian with both ends in the same 1-degree column.
+        (2.3, 147.718, 48.3, 147.702),
+        (-5.0, 175.0, 5.0, 180.0),
+        (-90.0, -180.0, 90.0, 180.0),
+        (10.0, 0.0, 5.0, 1.0),
+    ],
+)
+def test_bbox_matches_brute_force(index: SpatialIndex, points: pd.DataFrame, box) -> None:
+    min_lat, min_lon, max_lat, max_lon = box
+    longitude = points["longitude"].to_numpy()
+    if min_lon <= max_lon:
+        in_longitude = (longitude >= min_lon) & (longitude <= max_lon)
+    else:
+        in_longitude = (longitude >= min_lon) | (longitude <= max_lon)
+    expected = points[(points["latitude"] >= min_lat) & (points["latitude"] <= max_lat) & in_longitude]
+    assert _keys(index.bbox(*box)) == _keys(expected)
+
+
+@pytest.mark.parametrize("centre, km", [((34.05, -118.24), 500.0), ((0.0, 179.9), 800.0), ((60.0, -179.5), 4_000.0), ((10.0, 20.0), 15_000.0), ((89.0, 0.0), 300.0)])
+def test_radius_matches_brute_force(index: SpatialIndex, points: pd.DataFrame, centre, km: float) -> None:
+    distance = haversine_km(points["latitude"].to_numpy(), points["longitude"].to_numpy(), *centre)
+    expected = points[distance <= km]
+    result = index.radius(*centre, km=km)
+    assert _keys(result) == _keys(expected)
+    assert (result["distance_km"] <= km).all()
+
+
+def test_polygon_matches_brute_force(index: SpatialIndex, points: pd.DataFrame) -> None:
+    ring = np.array([(40.0, -120.0), (40.0, -80.0), (20.0, -95.0), (25.0, -120.0)])
+    expected = points[_inside_polygon(points["latitude"].to_numpy(), points["longitude"].to_numpy(), ring)]
+    assert len(expected) > 0
+    assert _keys(index.polygon([tuple(vertex) for vertex in ring])) == _keys(expected)
+
+
+def test_time_and_week_filters(index: SpatialIndex, points: pd.DataFrame) -> None:
+    box = (-10.0, 170.0, 10.0, -170.0)
+    start, end = pd.Timestamp("2024-01-05", tz="UTC"), pd.Timestamp("2024-01-12", tz="UTC")
+    longitude = points["longitude"].to_numpy()
+    inside = (points["latitude"].between(-10.0, 10.0)) & ((longitude >= 170.0) | (longitude <= -170.0))
+    in_time = (points["event_timestamp"] >= start) & (points["event_timestamp"] < end)
+    in_weeks = points["week"].astype(str).isin(["202401", "202403"])
+
+    assert _keys(index.bbox(*box, start=start, end=end)) == _keys(points[inside & in_time])
+    assert _keys(index.bbox(*box, weeks=[202401, "202403"])) == _keys(points[inside & in_weeks])